@@ -0,0 +1,48 @@
+"""
+Zwei Ergebnisdateien von benchmarks/run.py vergleichen (Regressionen finden)
+
+    python benchmarks/compare.py baseline.json current.json --threshold 1.25
+
+Verhältnis > threshold (langsamer) gilt als Regression → Exit-Code 1.
+"""
+import argparse, json, sys
+
+
+def keyed(report):
+    rows = {}
+    for r in report.get("micro", []):
+        rows[(r["bench"], r["size"])] = r["median_s"]
+    for r in report.get("http", []):
+        rows[(r["endpoint"], r["threads"])] = r["latency_p50_ms"] / 1e3
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark-Ergebnisse vergleichen")
+    ap.add_argument("baseline")
+    ap.add_argument("current")
+    ap.add_argument("--threshold", type=float, default=1.25)
+    args = ap.parse_args()
+
+    with open(args.baseline) as f:
+        base = keyed(json.load(f))
+    with open(args.current) as f:
+        cur = keyed(json.load(f))
+
+    regressions = 0
+    for key in sorted(base.keys() & cur.keys(), key=str):
+        ratio = cur[key] / base[key] if base[key] else float("inf")
+        flag = ""
+        if ratio > args.threshold:
+            flag, regressions = "  REGRESSION", regressions + 1
+        elif ratio < 1 / args.threshold:
+            flag = "  schneller"
+        print(f"{key[0]:26s} {key[1]:>10}  {1e3 * base[key]:10.3f} → {1e3 * cur[key]:10.3f} ms"
+              f"  ×{ratio:5.2f}{flag}")
+    for key in sorted(base.keys() ^ cur.keys(), key=str):
+        print(f"{key[0]:26s} {key[1]:>10}  nur in {'Baseline' if key in base else 'aktuellem Lauf'}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+FFT-Backend: bisheriger Pfad (np.fft, float64) gegen modules.dsp (scipy.fft,
+float32, next_fast_len, workers) – einzelne FFTs und Wasserfall-Batches
+
+    python benchmarks/fft_backend.py [--grid quick|default|full] [--workers 1,4]
+"""
+import argparse, json, os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from run import ROOT, measure   # noqa: E402  (setzt auch sys.path auf das Repo)
+
+import numpy as np
+from modules import dsp
+
+# Längen wie aus Uploads: Zweierpotenzen und "krumme" (prim/ungünstig) Längen
+SIZES = {
+    "quick":   [4_096, 100_003, 262_144],
+    "default": [4_096, 100_003, 262_144, 1_000_003, 4_194_304],
+    "full":    [4_096, 100_003, 262_144, 1_000_003, 4_194_304, 16_777_259, 67_108_864],
+}
+BATCH = {"quick": (2_000, 512), "default": (20_000, 512), "full": (200_000, 512)}
+
+
+def old_spectrum(sig):
+    N = len(sig)
+    S = np.fft.rfft(sig * np.hanning(N))
+    return 20 * np.log10(np.abs(S) / N + 1e-12)
+
+def old_frames(frames):
+    S = np.fft.rfft(frames * np.hanning(frames.shape[1]), axis=1)
+    return 20 * np.log10(np.abs(S) + 1e-12)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="np.fft vs. scipy.fft-Backend")
+    ap.add_argument("--grid", choices=list(SIZES), default="default")
+    ap.add_argument("--workers", default=f"1,{dsp.WORKERS}")
+    args = ap.parse_args()
+    worker_counts = sorted({int(w) for w in args.workers.split(",")})
+    rng = np.random.default_rng(0)
+    rows = []
+
+    def record(case, size, old, new, workers):
+        rows.append({"case": case, "size": size, "workers": workers,
+                     "numpy_f64_ms": round(1e3 * old["median_s"], 3),
+                     "scipy_f32_ms": round(1e3 * new["median_s"], 3),
+                     "speedup": round(old["median_s"] / new["median_s"], 2)})
+        print(json.dumps(rows[-1]), file=sys.stderr, flush=True)
+
+    for n in SIZES[args.grid]:
+        sig = rng.standard_normal(n)
+        old = measure(lambda: old_spectrum(sig))
+        for w in worker_counts:
+            dsp.WORKERS = w
+            record("spectrum", n, old, measure(lambda: dsp.power_spectrum_db(sig, 1e6)), w)
+
+    n_frames, nfft = BATCH[args.grid]
+    frames = rng.standard_normal((n_frames, nfft))
+    old = measure(lambda: old_frames(frames))
+    for w in worker_counts:
+        dsp.WORKERS = w
+        record("waterfall_batch", n_frames, old, measure(lambda: dsp.frames_db(frames)), w)
+
+    print(json.dumps({"cpus": os.cpu_count(), "grid": args.grid, "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Benchmark-Suite für die Hot Paths aller Module
+Mikro-Benchmarks der Rechenfunktionen über Größenraster, HTTP-Last über den
+Flask-Testclient und optional Socket.IO-Last gegen einen laufenden Server.
+Ergebnis als JSON; zwei Läufe vergleicht benchmarks/compare.py.
+
+    python benchmarks/run.py                      # Raster "default" (bis 4M Samples)
+    python benchmarks/run.py --grid full          # bis 64M Samples / 1M Pakete (~6 GB RAM)
+    python benchmarks/run.py --only compute_fft,decode_packet --no-http
+    python benchmarks/run.py --socketio-url http://127.0.0.1:5001 --out results.json
+"""
+import argparse, asyncio, datetime, io, json, os, platform, statistics, subprocess, sys, time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+FS = 1e6
+
+SAMPLE_GRID = {
+    "quick":   [1_000, 16_384, 262_144],
+    "default": [1_000, 16_384, 262_144, 4_194_304],
+    "full":    [1_000, 16_384, 262_144, 4_194_304, 16_777_216, 67_108_864],
+}
+PACKET_GRID = {
+    "quick":   [1, 100, 10_000],
+    "default": [1, 100, 10_000, 100_000],
+    "full":    [1, 100, 10_000, 100_000, 1_000_000],
+}
+BYTES_GRID = {
+    "quick":   [16, 1_024, 65_536],
+    "default": [16, 1_024, 65_536, 1_048_576],
+    "full":    [16, 1_024, 65_536, 1_048_576, 16_777_216],
+}
+TRACE_GRID = {
+    "quick":   [401, 10_001],
+    "default": [401, 10_001, 100_001],
+    "full":    [401, 10_001, 100_001],
+}
+
+
+def measure(fn, min_time=0.2, max_reps=30):
+    """Aufwärmen, dann wiederholen bis min_time erreicht ist (max. max_reps)"""
+    t0 = time.perf_counter()
+    fn()
+    first = time.perf_counter() - t0
+    times = []
+    while len(times) < max_reps and (sum(times) < min_time or len(times) < 3):
+        if first > 2.0 and times:
+            break                                 # große Fälle: ein gemessener Lauf reicht
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return {"median_s": statistics.median(times), "min_s": min(times), "reps": len(times)}
+
+
+def test_signal(n, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / FS
+    sig = np.cos(2 * np.pi * 200e3 * t) + 0.4 * np.cos(2 * np.pi * 350e3 * t)
+    sig += 0.15 * rng.standard_normal(n)
+    return sig
+
+
+# ── Mikro-Benchmarks ──────────────────────────────────────────────────────────
+# Jeder Eintrag: setup(size) → (Funktion ohne Argumente, Anzahl Elemente für Durchsatz)
+def bench_compute_fft(n):
+    from modules.spectrum_viewer.app import compute_fft
+    sig = test_signal(n)
+    return lambda: compute_fft(sig, FS, "hann", 2048), n
+
+def bench_compute_zoom(n):
+    from modules.spectrum_viewer.app import compute_zoom
+    sig = test_signal(n)
+    return lambda: compute_zoom(sig, FS, 187.5e3, 212.5e3, 2048), n     # 25-kHz-Kanal
+
+def bench_channelize(n):
+    from modules.channelizer import PolyphaseChannelizer, channelize
+    sig = test_signal(n).astype(np.float32)
+    chz = PolyphaseChannelizer(40, FS)                                 # 25-kHz-Raster
+    return lambda: (chz.reset(), list(channelize(sig, chz))), n
+
+def bench_ddc(n):
+    from modules.ddc import DDC, downconvert
+    sig = test_signal(n).astype(np.float32)
+    ddc = DDC(FS, 200e3, 25e3)                                         # 25-kHz-Kanal, 32×
+    return lambda: (ddc.reset(), list(downconvert(sig, ddc))), n
+
+def bench_compute_waterfall(n):
+    from modules.spectrum_viewer.app import compute_waterfall
+    sig = test_signal(n)
+    return lambda: compute_waterfall(sig, FS), n
+
+def bench_analyze_signal(n):
+    from modules.signal_analysis.app import analyze_signal
+    sig = test_signal(n)
+    return lambda: analyze_signal(sig, FS), n
+
+def spectrum_of(n):
+    power_db = 20 * np.log10(np.abs(np.fft.rfft(test_signal(2 * n)))[:n] / n + 1e-12)
+    return power_db, (np.arange(n) * FS / (2 * n) / 1e3).tolist()
+
+def bench_extract_features(n):
+    from modules.ai_anomaly.app import extract_features
+    power_db, _ = spectrum_of(n)
+    return lambda: extract_features(power_db), n
+
+def bench_detect_anomalies(n):
+    from modules.ai_anomaly.app import detect_anomalies
+    power_db, freqs_khz = spectrum_of(n)
+    return lambda: detect_anomalies(power_db, freqs_khz), n
+
+def bench_find_peaks(n):
+    from modules.peaks import find_peaks, marker_table
+    power_db, freqs_khz = spectrum_of(n)
+    freqs_khz = np.asarray(freqs_khz)
+    return lambda: marker_table(find_peaks(freqs_khz, power_db, 10, excursion_db=6.0)), n
+
+def bench_decode_packet(n):
+    from modules.protocol_decoder.app import decode_packet, DEMO_PACKETS
+    hexes = [p["hex"] for p in DEMO_PACKETS.values()]
+    packets = [hexes[i % len(hexes)] for i in range(n)]
+    return lambda: [decode_packet(h) for h in packets], n
+
+def bench_rsa_sign_verify(n):
+    from modules.security_checker.app import rsa_sign_verify
+    msg = "x" * n
+    return lambda: rsa_sign_verify(msg), n
+
+def bench_aes_demo(n):
+    from modules.security_checker.app import aes_demo
+    msg = "x" * n
+    return lambda: aes_demo(msg), n
+
+def scpi_mock(points, form):
+    from modules.hw_interface.app import RnS_VNA_Mock
+    dev = RnS_VNA_Mock(seed=0)
+    dev.query(f":SENS:SWE:POIN {points}")
+    dev.query(f":FORM {form}")
+    return dev
+
+def bench_scpi_ascii(n):
+    dev = scpi_mock(n, "ASC")
+    return lambda: json.dumps(dev.query(":CALC1:DATA? S11")), n
+
+def bench_scpi_real32(n):
+    from modules.hw_interface.session import DeviceSession
+    session = DeviceSession(scpi_mock(n, "REAL,32"))
+    return lambda: session.query_binary(":CALC1:DATA? S11"), n
+
+
+BENCHES = {
+    "compute_fft":       (bench_compute_fft,       SAMPLE_GRID, "samples"),
+    "compute_zoom":      (bench_compute_zoom,      SAMPLE_GRID, "samples"),
+    "channelize":        (bench_channelize,        SAMPLE_GRID, "samples"),
+    "ddc":               (bench_ddc,               SAMPLE_GRID, "samples"),
+    "compute_waterfall": (bench_compute_waterfall, SAMPLE_GRID, "samples"),
+    "analyze_signal":    (bench_analyze_signal,    SAMPLE_GRID, "samples"),
+    "extract_features":  (bench_extract_features,  SAMPLE_GRID, "bins"),
+    "detect_anomalies":  (bench_detect_anomalies,  SAMPLE_GRID, "bins"),
+    "find_peaks":        (bench_find_peaks,        SAMPLE_GRID, "bins"),
+    "decode_packet":     (bench_decode_packet,     PACKET_GRID, "packets"),
+    "rsa_sign_verify":   (bench_rsa_sign_verify,   BYTES_GRID,  "bytes"),
+    "aes_demo":          (bench_aes_demo,          BYTES_GRID,  "bytes"),
+    "scpi_trace_ascii":  (bench_scpi_ascii,        TRACE_GRID,  "points"),
+    "scpi_trace_real32": (bench_scpi_real32,       TRACE_GRID,  "points"),
+}
+
+def run_micro(grid, only=None, log=print):
+    results = []
+    for name, (setup, sizes, unit) in BENCHES.items():
+        if only and name not in only:
+            continue
+        for size in sizes[grid]:
+            fn, n = setup(size)
+            r = measure(fn)
+            r.update(bench=name, size=size, unit=unit,
+                     throughput_per_s=round(n / r["median_s"], 1))
+            results.append(r)
+            log(f"{name:18s} {size:>10d} {unit:8s} {1e3 * r['median_s']:10.3f} ms")
+            del fn
+    return results
+
+
+# ── HTTP-Last über den Flask-Testclient ──────────────────────────────────────
+def http_cases():
+    from modules.protocol_decoder.app import DEMO_PACKETS
+    csv = "\n".join(f"{v:.6f}" for v in test_signal(4096)).encode()
+    return {
+        "GET /spectrum/demo":   ("get",  "/spectrum/demo", {}),
+        "POST /spectrum/analyze": ("post", "/spectrum/analyze",
+                                   {"data": lambda: {"file": (io.BytesIO(csv), "sig.csv")}}),
+        "GET /signal/demo":     ("get",  "/signal/demo", {}),
+        "GET /ai/demo":         ("get",  "/ai/demo", {}),
+        "POST /proto/decode":   ("post", "/proto/decode", {"json": {"hex": DEMO_PACKETS["tcp_syn"]["hex"]}}),
+        "POST /security/aes_demo": ("post", "/security/aes_demo", {"json": {"plaintext": "Test"}}),
+        "POST /security/rsa_sign": ("post", "/security/rsa_sign", {"json": {"message": "Test"}}),
+        "POST /hw/scpi":        ("post", "/hw/scpi", {"json": {"device": "vna", "command": ":CALC1:DATA? S11"}}),
+        "GET /hw/trace":        ("get",  "/hw/trace?device=fsw", {}),
+        "GET /avionics/lookup": ("get",  "/avionics/lookup?freq=121.5", {}),
+        "GET /spectrum/":       ("get",  "/spectrum/", {}),
+    }
+
+def run_http(n_requests, threads, log=print):
+    from main import app
+    results = []
+    for name, (method, path, kwargs) in http_cases().items():
+        def one(client):
+            kw = {k: (v() if callable(v) else v) for k, v in kwargs.items()}
+            t0 = time.perf_counter()
+            resp = getattr(client, method)(path, **kw)
+            dt = time.perf_counter() - t0
+            return dt, resp.status_code, len(resp.get_data())
+
+        def worker(count):
+            client = app.test_client()
+            return [one(client) for _ in range(count)]
+
+        one(app.test_client())                                 # Aufwärmen
+        per_thread = max(1, n_requests // threads)
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(threads) as ex:
+            samples = [s for part in ex.map(worker, [per_thread] * threads) for s in part]
+        wall = time.perf_counter() - t0
+        lat = sorted(s[0] for s in samples)
+        pct = lambda q: round(1e3 * lat[min(int(q * len(lat)), len(lat) - 1)], 3)
+        results.append({
+            "endpoint": name, "requests": len(samples), "threads": threads,
+            "req_per_s": round(len(samples) / wall, 1),
+            "latency_p50_ms": pct(0.50), "latency_p95_ms": pct(0.95), "latency_max_ms": pct(1.0),
+            "errors": sum(1 for s in samples if s[1] >= 400),
+            "response_bytes": samples[-1][2],
+        })
+        r = results[-1]
+        log(f"{name:26s} {r['req_per_s']:9.1f} req/s  p50 {r['latency_p50_ms']:8.2f} ms"
+            f"  p95 {r['latency_p95_ms']:8.2f} ms")
+    return results
+
+
+# ── Meta ──────────────────────────────────────────────────────────────────────
+def meta(grid):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit":    commit,
+        "grid":      grid,
+        "python":    platform.python_version(),
+        "numpy":     np.__version__,
+        "platform":  platform.platform(),
+        "cpus":      os.cpu_count(),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark-Suite SDR Dashboard")
+    ap.add_argument("--grid", choices=list(SAMPLE_GRID), default="default")
+    ap.add_argument("--only", help="Kommagetrennte Benchmark-Namen: " + ",".join(BENCHES))
+    ap.add_argument("--no-micro", action="store_true")
+    ap.add_argument("--no-http", action="store_true")
+    ap.add_argument("--http-requests", type=int, default=200)
+    ap.add_argument("--http-threads", type=int, default=1)
+    ap.add_argument("--socketio-url", help="Laufender Server für den Socket.IO-Lasttest")
+    ap.add_argument("--socketio-clients", type=int, default=100)
+    ap.add_argument("--socketio-duration", type=float, default=10.0)
+    ap.add_argument("--out", help="JSON-Datei (sonst stdout)")
+    args = ap.parse_args()
+
+    log = lambda msg: print(msg, file=sys.stderr, flush=True)
+    only = set(args.only.split(",")) if args.only else None
+    report = {"meta": meta(args.grid)}
+    if not args.no_micro:
+        report["micro"] = run_micro(args.grid, only, log)
+    if not args.no_http:
+        report["http"] = run_http(args.http_requests, args.http_threads, log)
+    if args.socketio_url:
+        from socketio_load import run as socketio_run
+        report["socketio"] = asyncio.run(socketio_run(args.socketio_url, args.socketio_clients,
+                                                      args.socketio_duration, 200.0))
+        log(json.dumps(report["socketio"]))
+
+    out = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(out + "\n")
+    else:
+        print(out)
+
+
+if __name__ == "__main__":
+    main()
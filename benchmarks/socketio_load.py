@@ -0,0 +1,76 @@
+"""
+Socket.IO-Lastgenerator für den Echtzeit-Stream (/stream-Namespace)
+Verbindet N asynchrone Clients, startet den Stream und misst Zustellquote und
+Latenz (Empfangszeit − Frame-Zeitstempel) der spectrum_update-Events.
+
+    python benchmarks/socketio_load.py --url http://127.0.0.1:5001 --clients 500 --duration 10
+
+Benötigt: python-socketio[asyncio_client] (aiohttp)
+"""
+import argparse, asyncio, json, time
+import socketio
+
+
+async def run(url, n_clients, duration, connect_rate):
+    received = [0] * n_clients
+    latencies = []
+    clients = []
+
+    async def connect(i):
+        c = socketio.AsyncClient(reconnection=False)
+
+        @c.on("spectrum_update", namespace="/stream")
+        async def on_update(frame):
+            received[i] += 1
+            latencies.append(time.time() - frame["timestamp"])
+
+        try:
+            await c.connect(url, namespaces=["/stream"], transports=["websocket"], wait_timeout=30)
+            clients.append(c)
+        except Exception:
+            pass
+
+    t0 = time.perf_counter()
+    tasks = []
+    for i in range(n_clients):
+        tasks.append(asyncio.create_task(connect(i)))
+        await asyncio.sleep(1.0 / connect_rate)
+    await asyncio.gather(*tasks)
+    connect_s = time.perf_counter() - t0
+
+    if clients:
+        await clients[0].emit("start_stream", {}, namespace="/stream")
+    await asyncio.sleep(1.0)
+    received[:] = [0] * n_clients
+    latencies.clear()
+    await asyncio.sleep(duration)
+    lat = sorted(latencies)
+    if clients:
+        await clients[0].emit("stop_stream", namespace="/stream")
+    await asyncio.gather(*(c.disconnect() for c in clients), return_exceptions=True)
+
+    pct = lambda q: round(1e3 * lat[min(int(q * len(lat)), len(lat) - 1)], 1) if lat else None
+    return {
+        "clients":        n_clients,
+        "connected":      len(clients),
+        "connect_s":      round(connect_s, 2),
+        "receiving":      sum(1 for r in received if r),
+        "messages":       len(lat),
+        "msgs_per_client_per_s": round(len(lat) / max(len(clients), 1) / duration, 2),
+        "latency_p50_ms": pct(0.50),
+        "latency_p95_ms": pct(0.95),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Socket.IO-Lasttest für /stream")
+    ap.add_argument("--url", default="http://127.0.0.1:5001")
+    ap.add_argument("--clients", type=int, default=100)
+    ap.add_argument("--duration", type=float, default=10.0)
+    ap.add_argument("--connect-rate", type=float, default=200.0, help="Verbindungen pro Sekunde")
+    args = ap.parse_args()
+    print(json.dumps(asyncio.run(run(args.url, args.clients, args.duration, args.connect_rate))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""
+gunicorn-Konfiguration für wsgi:app
+Flask-SocketIO braucht Sticky Sessions, die gunicorn nicht bietet: daher genau
+ein Worker pro gunicorn-Instanz. Mehr Kapazität = mehrere Instanzen (serve.py)
+hinter nginx mit ip_hash plus SOCKETIO_MESSAGE_QUEUE.
+"""
+import os
+
+_mode = os.environ.setdefault("SOCKETIO_ASYNC_MODE", "eventlet")
+
+bind              = os.environ.get("BIND", "127.0.0.1:5001")
+workers           = 1
+worker_class      = _mode   # "eventlet" oder "gevent"
+worker_connections = int(os.environ.get("WORKER_CONNECTIONS", 2000))
+timeout           = 60
+graceful_timeout  = 20
+keepalive         = 5
+accesslog         = "-"
+# PRELOAD_HEAVY=1: App samt scipy/sklearn/cryptography einmal im Master laden
+preload_app       = os.environ.get("PRELOAD_HEAVY") == "1"
@@ -4,8 +4,11 @@ Hiring Project - Rohde & Schwarz | Besem Maazi
 main.py - Haupt-App, registriert alle Module als Blueprints
 """
 
-from flask import Flask, render_template_string, send_from_directory
+from flask import Flask, Response, send_from_directory
 from flask_socketio import SocketIO
+from modules.response_cache import immutable, warm_cache
+from modules.templating import precompile
+from modules import lazy, metrics, profiling
 import os
 
 app = Flask(__name__)
@@ -19,7 +22,23 @@ def serve_module_images(filename):
     return send_from_directory('modules', filename)
 
 # ── SocketIO initialisieren ──────────────────────────────────────────────────
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# Entwicklung: threading (Werkzeug). Produktion: eventlet/gevent über wsgi.py +
+# gunicorn; bei mehreren Instanzen verteilt die Message-Queue (Redis) die Events.
+ASYNC_MODE    = os.environ.get("SOCKETIO_ASYNC_MODE", "threading")
+MESSAGE_QUEUE = os.environ.get("SOCKETIO_MESSAGE_QUEUE") or None
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE,
+                    message_queue=MESSAGE_QUEUE)
+
+# ── Metriken (Latenz/Größen je Route und Event, Spans) → /metrics ────────────
+metrics.init_app(app)
+metrics.init_socketio(socketio)
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+# ── Profiling einzelner Requests (nur mit PROFILE_TOKEN, siehe modules/profiling.py)
+profiling.init_app(app)
 
 # ── Blueprints registrieren ──────────────────────────────────────────────────
 from modules.spectrum_viewer.app import spectrum_bp
@@ -40,6 +59,12 @@ app.register_blueprint(hw_bp,       url_prefix="/hw")
 app.register_blueprint(realtime_bp, url_prefix="/stream")
 app.register_blueprint(avionics_bp, url_prefix="/avionics")
 
+# scipy erst beim ersten Request eines Moduls laden, das es braucht;
+# PRELOAD_HEAVY=1 lädt alles sofort (gunicorn preload_app, Master vor dem Fork)
+lazy.init_app(app)
+if os.environ.get("PRELOAD_HEAVY") == "1":
+    lazy.preload()
+
 # SocketIO-Handler registrieren
 set_socketio(socketio)
 register_socketio_handlers(socketio)
@@ -615,9 +640,15 @@ LANDING = """<!doctype html>
 </html>
 """
 
+LANDING_PAGE = precompile(LANDING)
+
 @app.route("/")
+@immutable
 def index():
-    return render_template_string(LANDING)
+    return LANDING_PAGE.render()
+
+# Unveränderliche Seiten/JSON-Antworten einmal beim Start serialisieren
+warm_cache(app)
 
 if __name__ == "__main__":
     os.makedirs("modules/spectrum_viewer/static/uploads", exist_ok=True)
@@ -2,9 +2,15 @@
 Modul 3: KI-Anomalie-Detektor (VERBESSERT mit Debug-Output)
 Isolation Forest erkennt Interferenzen/Anomalien im Spektrum
 """
-import io
+import tempfile
 import numpy as np
-from flask import Blueprint, render_template_string, request, jsonify
+from flask import Blueprint, request, jsonify
+from modules.response_cache import immutable
+from modules.templating import precompile
+from modules import dsp, metrics
+from modules.capture import load_capture, parse_fs
+from modules.ddc import ddc_params, narrowband
+from modules.avionics_bands.annotate import annotate_anomalies, parse_center_mhz
 
 ai_bp = Blueprint("ai_anomaly", __name__)
 
@@ -37,6 +43,7 @@ def extract_features(power_db, n_slices=30):
         ])
     return np.array(feats)
 
+@metrics.timed("detect_anomalies")
 def detect_anomalies(power_db, freqs_khz):
     model = get_model()
     feats = extract_features(power_db, n_slices=30)
@@ -63,6 +70,15 @@ def detect_anomalies(power_db, freqs_khz):
         "verdict":        "Interferenzen erkannt!" if n_anom > 0 else "Spektrum unauffällig!"
     }
 
+def capture_spectrum(sig, fs, band=None):
+    """Spektrum (freqs Hz, dB) der ganzen Aufnahme oder nur des DDC-Ausschnitts
+    band=(f_center, bandwidth), Frequenzen absolut → (freqs, power_db, DDC-Info)"""
+    if band is None:
+        return (*dsp.power_spectrum_db(sig, fs), None)
+    nb, ddc = narrowband(sig, fs, *band)
+    freqs, power_db = dsp.power_spectrum_db(nb, ddc.fs_out)
+    return freqs + ddc.f_offset, power_db, ddc.info()
+
 def generate_demo_with_interference():
     fs = 1e6
     t  = np.linspace(0, 0.01, int(fs * 0.01))
@@ -678,22 +694,30 @@ INDEX_HTML = """<!doctype html>
 </html>
 """
 
+INDEX_PAGE = precompile(INDEX_HTML)
+
 @ai_bp.route("/")
+@immutable
 def index():
-    return render_template_string(INDEX_HTML)
+    return INDEX_PAGE.render()
 
 @ai_bp.route("/demo")
 def demo():
+    try:
+        center = parse_center_mhz(request.args.get("center_mhz"))
+    except ValueError:
+        return jsonify({"error": "center_mhz ungültig"}), 400
     try:
         sig, fs  = generate_demo_with_interference()
-        N        = len(sig)
-        freqs    = np.fft.rfftfreq(N, 1.0 / fs)
-        S        = np.fft.rfft(sig * np.hanning(N))
-        power_db = (20 * np.log10(np.abs(S) / N + 1e-12)).tolist()
+        freqs, power_db = dsp.power_spectrum_db(sig, fs)
+        power_db = power_db.tolist()
         freqs_khz= (freqs / 1000).tolist()
+        anomalies = detect_anomalies(power_db, freqs_khz)
+        if center is not None:
+            annotate_anomalies(anomalies, center)
         return jsonify({
             "spectrum":  {"freqs_khz": freqs_khz, "power_db": power_db},
-            "anomalies": detect_anomalies(power_db, freqs_khz)
+            "anomalies": anomalies
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -704,19 +728,29 @@ def analyze():
     if not f:
         return jsonify({"error": "Keine Datei"}), 400
     try:
-        import io as _io
-        data = np.loadtxt(_io.StringIO(f.read().decode("utf-8")), delimiter=",")
-        if data.ndim > 1:
-            data = data[:, 0]
-        fs       = 1e6
-        N        = len(data)
-        freqs    = np.fft.rfftfreq(N, 1.0 / fs)
-        S        = np.fft.rfft(data * np.hanning(N))
-        power_db = (20 * np.log10(np.abs(S) / N + 1e-12)).tolist()
+        center = parse_center_mhz(request.form.get("center_mhz"))
+    except ValueError:
+        return jsonify({"error": "center_mhz ungültig"}), 400
+    try:
+        fs   = parse_fs(request.form)
+        band = ddc_params(request.form, fs)
+        with tempfile.TemporaryDirectory(prefix="sdr-upload-") as workdir:
+            data = load_capture(f, workdir)
+            freqs, power_db, ddc_info = capture_spectrum(data, fs, band)
+            del data
+        power_db = power_db.tolist()
         freqs_khz= (freqs / 1000).tolist()
-        return jsonify({
+        anomalies = detect_anomalies(power_db, freqs_khz)
+        if center is not None:
+            annotate_anomalies(anomalies, center)
+        result = {
             "spectrum":  {"freqs_khz": freqs_khz, "power_db": power_db},
-            "anomalies": detect_anomalies(power_db, freqs_khz)
-        })
+            "anomalies": anomalies
+        }
+        if ddc_info is not None:
+            result["ddc"] = ddc_info
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
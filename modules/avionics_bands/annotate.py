@@ -0,0 +1,123 @@
+"""
+Modul 8: Band-Annotation erkannter Peaks/Anomaliebereiche
+Bildet Basisband-Frequenzen einer Aufnahme (Mittenfrequenz + Offset) in einem
+vektorisierten Durchlauf auf AVIONICS_BANDS ab, inkl. Kanal im Bandraster.
+"""
+import math
+import numpy as np
+from modules.avionics_bands.app import AVIONICS_BANDS, BAND_INDEX
+
+# 8.33-kHz-Raster ist exakt 25/3 kHz
+EXACT_RASTER = {8.33: 25 / 3}
+# Toleranz für das gröbere Raster, wenn die Frequenzauflösung unbekannt ist
+DEFAULT_TOLERANCE_KHZ = 1.0
+MAX_CENTER_MHZ = 6000.0
+
+
+def rf_freqs_mhz(freqs_khz, center_mhz):
+    """Basisband-Offsets (kHz, reelles Signal → 0..fs/2) in RF-Frequenzen (MHz)"""
+    return center_mhz + np.asarray(freqs_khz, dtype=float) / 1000
+
+
+def nearest_channels(f_mhz, band, tolerance_khz=DEFAULT_TOLERANCE_KHZ):
+    """Nächster Kanal je Frequenz. Jeder 25-kHz-Kanal liegt auch im 8.33-kHz-Raster,
+    daher gewinnt das gröbere Raster, solange die Frequenz höchstens tolerance_khz
+    (≈ halber FFT-Bin) neben einem seiner Kanäle liegt; sonst das nähere."""
+    best_ch = best_r = best_off = None
+    for r_khz in sorted(band["raster_khz"], reverse=True):
+        step = EXACT_RASTER.get(r_khz, r_khz) / 1000
+        ch   = band["freq_min"] + np.round((f_mhz - band["freq_min"]) / step) * step
+        off  = np.abs(f_mhz - ch)
+        if best_ch is None:
+            best_ch, best_off = ch, off
+            best_r = np.full(len(f_mhz), r_khz, dtype=float)
+        else:
+            closer = (best_off > tolerance_khz / 1000 + 1e-9) & (off < best_off - 1e-9)
+            best_ch  = np.where(closer, ch, best_ch)
+            best_off = np.where(closer, off, best_off)
+            best_r   = np.where(closer, r_khz, best_r)
+    return best_ch, best_r
+
+
+def annotate_freqs(freqs_mhz, tolerance_khz=DEFAULT_TOLERANCE_KHZ):
+    """Je Frequenz die Liste der passenden Bänder mit Kanal und Label"""
+    f    = np.atleast_1d(np.asarray(freqs_mhz, dtype=float))
+    hits = BAND_INDEX.classify(f)
+    out  = [[] for _ in range(len(f))]
+    for b_idx, band in enumerate(AVIONICS_BANDS):
+        rows = np.flatnonzero(hits[:, b_idx])
+        if not len(rows):
+            continue
+        if band["raster_khz"]:
+            ch, r = nearest_channels(f[rows], band, tolerance_khz)
+        for k, row in enumerate(rows.tolist()):
+            ann = {"band": band["name"], "category": band["category"]}
+            if band["raster_khz"]:
+                ann["channel_mhz"] = round(float(ch[k]), 4)
+                ann["raster_khz"]  = float(r[k])
+                ann["label"]       = f"{band['name']} ch. {ch[k]:.3f}"
+            else:
+                ann["label"] = band["name"]
+            out[row].append(ann)
+    return out
+
+
+def annotate_ranges(lo_mhz, hi_mhz):
+    """Je Frequenzbereich [lo, hi] alle überlappenden Bänder (vektorisiert
+    über kumulierte Segment-Überdeckung)"""
+    lo = np.atleast_1d(np.asarray(lo_mhz, dtype=float))
+    hi = np.atleast_1d(np.asarray(hi_mhz, dtype=float))
+    lo, hi = np.minimum(lo, hi), np.maximum(lo, hi)
+    cum  = np.vstack([np.zeros((1, len(AVIONICS_BANDS)), dtype=int),
+                      np.cumsum(BAND_INDEX.cover, axis=0)])
+    hits = (cum[BAND_INDEX.segment(hi) + 1] - cum[BAND_INDEX.segment(lo)]) > 0
+    return [[{"band": AVIONICS_BANDS[i]["name"], "category": AVIONICS_BANDS[i]["category"]}
+             for i in np.flatnonzero(row).tolist()] for row in hits]
+
+
+# ── Anbindung an Signalanalyse / KI-Anomalie-Detektor ────────────────────────
+def parse_center_mhz(value):
+    """Optionaler Request-Parameter center_mhz → float oder None;
+    ValueError, wenn nicht endlich oder außerhalb (0, MAX_CENTER_MHZ]"""
+    if value in (None, ""):
+        return None
+    center = float(value)
+    if not math.isfinite(center) or not 0 < center <= MAX_CENTER_MHZ:
+        raise ValueError(f"center_mhz muss in (0, {MAX_CENTER_MHZ:g}] MHz liegen")
+    return center
+
+
+def bin_tolerance_khz(freqs_khz):
+    """Halber FFT-Bin (kHz) aus der Frequenzachse eines Ergebnisses"""
+    if len(freqs_khz) < 2:
+        return DEFAULT_TOLERANCE_KHZ
+    return abs(freqs_khz[1] - freqs_khz[0]) / 2
+
+
+def annotate_peaks(result, center_mhz):
+    """analyze_signal()-Ergebnis um RF-Frequenz und Band des Peaks ergänzen"""
+    tol = bin_tolerance_khz(result.get("freqs_khz") or [])
+    rf  = rf_freqs_mhz([result["peak_freq_khz"]], center_mhz)
+    result["center_mhz"]  = center_mhz
+    result["peak_rf_mhz"] = round(float(rf[0]), 4)
+    result["peak_bands"]  = annotate_freqs(rf, tol)[0]
+    markers = result.get("markers") or []
+    if markers:
+        rf = rf_freqs_mhz([m["freq"] for m in markers], center_mhz)
+        for m, f, bands in zip(markers, rf.tolist(), annotate_freqs(rf, tol)):
+            m["rf_mhz"], m["bands"] = round(f, 4), bands
+    return result
+
+
+def annotate_anomalies(result, center_mhz):
+    """detect_anomalies()-Ergebnis: Anomaliebereiche den Bändern zuordnen"""
+    ranges = result["anomaly_ranges"]
+    if not ranges:
+        return result
+    lo  = rf_freqs_mhz([r["start"] for r in ranges], center_mhz)
+    hi  = rf_freqs_mhz([r["end"] for r in ranges], center_mhz)
+    ann = annotate_ranges(lo, hi)
+    for r, f0, f1, a in zip(ranges, lo.tolist(), hi.tolist(), ann):
+        r["rf_start_mhz"], r["rf_end_mhz"], r["bands"] = round(f0, 4), round(f1, 4), a
+    result["center_mhz"] = center_mhz
+    return result
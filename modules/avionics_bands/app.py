@@ -2,7 +2,13 @@
 Modul 8: Avionik-Frequenzplan
 Interaktive Visualisierung der VHF/UHF-Avionikbänder (NATO/ICAO)
 """
-from flask import Blueprint, render_template_string, jsonify
+import io, math, tempfile
+from functools import lru_cache
+import numpy as np
+from flask import Blueprint, request, jsonify
+from modules.response_cache import immutable
+from modules.templating import precompile
+from modules.avionics_bands.lookup import BandIndex
 
 avionics_bp = Blueprint("avionics", __name__)
 
@@ -16,7 +22,8 @@ AVIONICS_BANDS = [
         "color": "#58a6ff",
         "description": "VHF Omnidirectional Range (VOR) und Instrument Landing System (ILS). Kanaltrennung: 50 kHz.",
         "protocols": ["VOR", "ILS LOC", "ILS GS"],
-        "use_case": "Funknavigation für zivile und militärische Luftfahrt"
+        "use_case": "Funknavigation für zivile und militärische Luftfahrt",
+        "raster_khz": [50]
     },
     {
         "name": "VHF COM",
@@ -26,7 +33,8 @@ AVIONICS_BANDS = [
         "color": "#56d364",
         "description": "Luftfahrtkommunikation (ATC, Tower, Ground). Kanaltrennung: 25 kHz (8.33 kHz in Europa ab FL195).",
         "protocols": ["AM Voice", "VDL Mode 2/3/4"],
-        "use_case": "Sprechfunk zwischen Piloten und Flugsicherung"
+        "use_case": "Sprechfunk zwischen Piloten und Flugsicherung",
+        "raster_khz": [25, 8.33]
     },
     {
         "name": "VHF Maritime",
@@ -36,7 +44,8 @@ AVIONICS_BANDS = [
         "color": "#8b949e",
         "description": "Marine-Kommunikation und Notfunk (z.B. Kanal 16: 156.8 MHz).",
         "protocols": ["FM Voice", "DSC"],
-        "use_case": "Schiffs- und Küstenfunk (nicht Luftfahrt, zur Referenz)"
+        "use_case": "Schiffs- und Küstenfunk (nicht Luftfahrt, zur Referenz)",
+        "raster_khz": [25]
     },
     {
         "name": "UHF MIL",
@@ -46,7 +55,8 @@ AVIONICS_BANDS = [
         "color": "#f0883e",
         "description": "NATO-Militärfunk (Luftfahrt, taktische Kommunikation). Kanaltrennung: 25 kHz.",
         "protocols": ["AM Voice", "SATURN", "HAVE QUICK II"],
-        "use_case": "Militärische Luftfahrtkommunikation (verschlüsselt/frequenzspringend)"
+        "use_case": "Militärische Luftfahrtkommunikation (verschlüsselt/frequenzspringend)",
+        "raster_khz": [25]
     },
     {
         "name": "DME",
@@ -56,7 +66,8 @@ AVIONICS_BANDS = [
         "color": "#58a6ff",
         "description": "Distance Measuring Equipment – Entfernungsmessung zur Bodenstation.",
         "protocols": ["DME Pulse"],
-        "use_case": "Ergänzung zu VOR für präzise Positionsbestimmung"
+        "use_case": "Ergänzung zu VOR für präzise Positionsbestimmung",
+        "raster_khz": [1000]
     },
     {
         "name": "ATC Transponder (Mode A/C/S)",
@@ -66,7 +77,8 @@ AVIONICS_BANDS = [
         "color": "#da3633",
         "description": "Secondary Surveillance Radar (SSR) – Abfrage von Flugsicherung (1030 MHz Downlink, 1090 MHz Uplink).",
         "protocols": ["Mode A/C", "Mode S"],
-        "use_case": "Identifikation und Höhenüberwachung von Luftfahrzeugen"
+        "use_case": "Identifikation und Höhenüberwachung von Luftfahrzeugen",
+        "raster_khz": []
     },
     {
         "name": "ADS-B / Mode S",
@@ -76,7 +88,8 @@ AVIONICS_BANDS = [
         "color": "#da3633",
         "description": "Automatic Dependent Surveillance-Broadcast – Echtzeit-Positionsdaten.",
         "protocols": ["Mode S Extended Squitter", "ADS-B", "TIS-B", "FIS-B"],
-        "use_case": "Kollisionsvermeidung, Flugverkehrsmanagement, Flightradar24"
+        "use_case": "Kollisionsvermeidung, Flugverkehrsmanagement, Flightradar24",
+        "raster_khz": []
     },
     {
         "name": "TCAS",
@@ -86,7 +99,8 @@ AVIONICS_BANDS = [
         "color": "#bc8cff",
         "description": "Traffic Collision Avoidance System – Airborne Kollisionsvermeidung.",
         "protocols": ["Mode S", "ACAS"],
-        "use_case": "Automatische Warnungen bei Kollisionsgefahr"
+        "use_case": "Automatische Warnungen bei Kollisionsgefahr",
+        "raster_khz": []
     },
     {
         "name": "GPS L1",
@@ -96,10 +110,38 @@ AVIONICS_BANDS = [
         "color": "#58a6ff",
         "description": "GPS L1 C/A – Zivile GPS-Signale für Navigation.",
         "protocols": ["C/A Code", "P(Y) Code", "M-Code"],
-        "use_case": "Satellitengestützte Positionsbestimmung"
+        "use_case": "Satellitengestützte Positionsbestimmung",
+        "raster_khz": []
     }
 ]
 
+BAND_INDEX = BandIndex(AVIONICS_BANDS)
+MAX_CLASSIFY = 1_000_000
+OCC_BLOCK    = 256   # Frames pro reduceat-Block (begrenzt den Speicher)
+MAX_CHANNELS = 8192  # Channelizer: Kanäle pro Aufnahme
+
+# ── Demo-Aufnahme für den Channelizer ────────────────────────────────────────
+DEMO_FS, DEMO_CENTER_MHZ = 2.4e6, 118.0     # reell: 118.000–119.200 MHz
+
+@lru_cache(maxsize=2)
+def generate_airband_demo(fs=DEMO_FS, duration=1.0, block=1 << 20):
+    """VHF-COM-Ausschnitt (float32): AM-Träger auf 118.100, 118.725 und 119.100 MHz
+    (schwach), dazu 118.300 MHz nur jede zweite Sekundenhälfte, plus Rauschen"""
+    n = int(fs * duration)
+    rng = np.random.default_rng(0)
+    sig = np.empty(n, dtype=np.float32)
+    carriers = [(100e3, 1.0, None), (725e3, 0.5, None), (1100e3, 0.05, None), (300e3, 0.8, 0.5)]
+    for i0 in range(0, n, block):
+        t = np.arange(i0, min(n, i0 + block)) / fs
+        chunk = 0.05 * rng.standard_normal(len(t))
+        for f, a, on in carriers:
+            am = 1 + 0.5 * np.sin(2 * np.pi * 700 * t)
+            gate = 1.0 if on is None else ((t % 1.0) < on)
+            chunk += a * gate * am * np.cos(2 * np.pi * f * t)
+        sig[i0:i0 + len(t)] = chunk
+    sig.flags.writeable = False
+    return sig, fs
+
 # ── Templates ────────────────────────────────────────────────────────────────
 INDEX_HTML = """<!doctype html>
 <html lang="de">
@@ -728,10 +770,157 @@ INDEX_HTML = """<!doctype html>
 """
 
 # ── Routes ────────────────────────────────────────────────────────────────────
+INDEX_PAGE = precompile(INDEX_HTML)
+
 @avionics_bp.route("/")
+@immutable
 def index():
-    return render_template_string(INDEX_HTML)
+    return INDEX_PAGE.render()
 
 @avionics_bp.route("/bands")
+@immutable
 def get_bands():
     return jsonify(AVIONICS_BANDS)
+
+def finite_mhz(value):
+    """Frequenz (MHz) aus dem Request; ValueError bei nan/inf (kein gültiges JSON)"""
+    f = float(value)
+    if not math.isfinite(f):
+        raise ValueError(value)
+    return f
+
+@avionics_bp.route("/lookup")
+def lookup():
+    try:
+        freq = finite_mhz(request.args["freq"])
+    except (KeyError, ValueError):
+        return jsonify({"error": "Parameter freq (MHz) fehlt oder ungültig"}), 400
+    return jsonify({"freq_mhz": freq,
+                    "bands": [AVIONICS_BANDS[i] for i in BAND_INDEX.lookup(freq)]})
+
+@avionics_bp.route("/overlap")
+def overlap():
+    try:
+        f_lo = finite_mhz(request.args["min"])
+        f_hi = finite_mhz(request.args["max"])
+    except (KeyError, ValueError):
+        return jsonify({"error": "Parameter min/max (MHz) fehlen oder ungültig"}), 400
+    return jsonify({"min_mhz": f_lo, "max_mhz": f_hi,
+                    "bands": [AVIONICS_BANDS[i] for i in BAND_INDEX.overlap(f_lo, f_hi)]})
+
+@avionics_bp.route("/classify", methods=["POST"])
+def classify():
+    """Bulk: {"freqs": [MHz, ...]} → Bandindizes je Frequenz (Index in "bands")"""
+    data  = request.get_json()
+    freqs = data.get("freqs") if data else None
+    if not isinstance(freqs, list):
+        return jsonify({"error": "freqs muss eine Liste von Frequenzen (MHz) sein"}), 400
+    if len(freqs) > MAX_CLASSIFY:
+        return jsonify({"error": f"Maximal {MAX_CLASSIFY} Frequenzen pro Anfrage"}), 400
+    try:
+        f_mhz = np.asarray(freqs, dtype=float)
+        if not np.isfinite(f_mhz).all():
+            raise ValueError("nan/inf")
+        seg = BAND_INDEX.segment(f_mhz)
+    except (TypeError, ValueError):
+        return jsonify({"error": "freqs enthält ungültige Werte"}), 400
+    return jsonify({
+        "bands":    [b["name"] for b in AVIONICS_BANDS],
+        "matches":  [BAND_INDEX.seg_bands[s] for s in seg.tolist()],
+        "counts":   BAND_INDEX.cover[seg].sum(axis=0).tolist(),
+    })
+
+@avionics_bp.route("/occupancy", methods=["POST"])
+def occupancy():
+    """Kanalbelegung eines Breitbandspektrums.
+    CSV-Upload: Spalte 0 = Frequenz (MHz), weitere Spalten = Frames (dB)
+    JSON: {"f_start_mhz", "bin_khz", "frames": [[dB, ...], ...]}"""
+    from modules.avionics_bands.occupancy import channel_plan, OccupancyScanner
+    f = request.files.get("file")
+    opts = request.form if f else (request.get_json(silent=True) or {})
+    try:
+        if f:
+            data = np.loadtxt(io.StringIO(f.read().decode("utf-8")), delimiter=",", ndmin=2)
+            freqs, frames = data[:, 0], data[:, 1:].T
+            if frames.shape[0] == 0 or len(freqs) < 2:
+                return jsonify({"error": "CSV braucht Frequenz- und mind. eine Leistungsspalte"}), 400
+            f_start, bin_khz = float(freqs[0]), float(freqs[1] - freqs[0]) * 1000
+            if not np.allclose(np.diff(freqs), bin_khz / 1000, rtol=1e-3):
+                return jsonify({"error": "Frequenzachse muss äquidistant sein"}), 400
+        else:
+            frames  = np.atleast_2d(np.asarray(opts["frames"], dtype=float))
+            f_start = float(opts["f_start_mhz"])
+            bin_khz = float(opts["bin_khz"])
+        threshold = opts.get("threshold_db")
+        threshold = float(threshold) if threshold not in (None, "") else None
+        margin    = float(opts.get("margin_db", 10.0))
+        fine      = str(opts.get("fine", "")).lower() in ("1", "true", "yes")
+        show_all  = str(opts.get("all", "")).lower() in ("1", "true", "yes")
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Ungültige Eingabe: {e}"}), 400
+    if bin_khz <= 0:
+        return jsonify({"error": "bin_khz muss positiv sein"}), 400
+    try:
+        plan    = channel_plan(round(f_start, 9), round(bin_khz, 9), frames.shape[1], fine)
+        scanner = OccupancyScanner(plan, threshold, margin)
+        for i in range(0, len(frames), OCC_BLOCK):
+            scanner.update(frames[i:i + OCC_BLOCK])
+        return jsonify({"n_frames":   scanner.n_frames,
+                        "n_channels": len(plan),
+                        "bands":      scanner.summary(),
+                        "channels":   scanner.table(only_occupied=not show_all)})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@avionics_bp.route("/channelize", methods=["POST"])
+def channelize():
+    """Kanalbelegung direkt aus einer reellen Breitbandaufnahme (Zeitbereich):
+    Polyphasen-Channelizer → Leistung je Kanal und Frame → OccupancyScanner.
+    Upload (CSV oder float32 .f32/.bin) oder ohne Datei die Airband-Demo (fs = DEMO_FS).
+    Formular: fs (Hz), center_mhz (RF bei 0 Hz), channels (Default: 25-kHz-Raster),
+    oversample, frame_ms sowie threshold_db/margin_db/fine/all wie /occupancy"""
+    from modules.capture import load_capture
+    from modules.channelizer import PolyphaseChannelizer, channelize as run_channelizer, power_frames
+    from modules.avionics_bands.occupancy import channel_plan, OccupancyScanner
+    f = request.files.get("file")
+    opts = request.form
+    try:
+        fs         = float(opts.get("fs", DEMO_FS))
+        center     = float(opts.get("center_mhz", DEMO_CENTER_MHZ))
+        n_channels = int(opts.get("channels", round(fs / 25e3)))
+        oversample = int(opts.get("oversample", 1))
+        frame_ms   = float(opts.get("frame_ms", 10.0))
+        threshold  = opts.get("threshold_db")
+        threshold  = float(threshold) if threshold not in (None, "") else None
+        margin     = float(opts.get("margin_db", 10.0))
+        fine       = str(opts.get("fine", "")).lower() in ("1", "true", "yes")
+        show_all   = str(opts.get("all", "")).lower() in ("1", "true", "yes")
+        if not (fs > 0 and frame_ms > 0 and 2 <= n_channels <= MAX_CHANNELS and oversample >= 1):
+            raise ValueError(f"fs/frame_ms > 0, channels 2–{MAX_CHANNELS}, oversample ≥ 1")
+        if not f and fs != DEMO_FS:
+            # Demo nur mit fester Rate: fs bestimmt sonst die Länge der erzeugten Aufnahme
+            raise ValueError(f"ohne Datei nur fs = {DEMO_FS:g} Hz (Demo-Aufnahme)")
+        chz = PolyphaseChannelizer(n_channels, fs, oversample)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Ungültige Eingabe: {e}"}), 400
+    frame   = max(1, round(frame_ms / 1e3 * chz.fs_out))
+    plan    = channel_plan(round(center, 9), round(chz.spacing / 1e3, 9), chz.n_out_channels, fine)
+    scanner = OccupancyScanner(plan, threshold, margin)
+    try:
+        with tempfile.TemporaryDirectory(prefix="sdr-upload-") as workdir:
+            sig = load_capture(f, workdir) if f else generate_airband_demo(DEMO_FS)[0]
+            for frames in power_frames(run_channelizer(sig, chz), frame):
+                scanner.update(frames)
+            n_samples = len(sig)
+            del sig                    # memmap vor dem Aufräumen schließen
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"n_samples":     n_samples,
+                    "n_channels":    chz.n_out_channels,
+                    "spacing_khz":   chz.spacing / 1e3,
+                    "fs_out":        chz.fs_out,
+                    "frame_samples": frame,
+                    "n_frames":      scanner.n_frames,
+                    "n_raster_channels": len(plan),
+                    "bands":         scanner.summary(),
+                    "channels":      scanner.table(only_occupied=not show_all)})
@@ -0,0 +1,52 @@
+"""
+Modul 8: Frequenz-Lookup für AVIONICS_BANDS
+Sortierter Intervall-Index (Elementarsegmente), einmal beim Import aufgebaut:
+Punkt- und Bereichsabfragen per Binärsuche, Bulk-Klassifikation vektorisiert.
+"""
+import numpy as np
+
+
+class BandIndex:
+    """Zerlegt die (teils überlappenden) Bänder an allen Bandgrenzen in
+    Elementarsegmente und merkt sich je Segment die überdeckenden Bänder.
+
+    Segment-IDs bei sortierten Grenzen b[0..m-1]:
+        2*i   → offenes Intervall (b[i-1], b[i])   (i=0: unter b[0], i=m: über b[m-1])
+        2*i+1 → exakt auf der Grenze b[i]
+    Damit sind auch Punktbänder (freq_min == freq_max, z.B. 1090 MHz) exakt abbildbar.
+    """
+    def __init__(self, bands):
+        self.bands = bands
+        self.fmin  = np.array([b["freq_min"] for b in bands], dtype=float)
+        self.fmax  = np.array([b["freq_max"] for b in bands], dtype=float)
+        self.edges = np.unique(np.concatenate([self.fmin, self.fmax]))
+        m = len(self.edges)
+        # Repräsentativer Punkt je Segment → Überdeckung einmalig berechnen
+        mids = np.empty(2 * m + 1)
+        mids[1::2] = self.edges
+        mids[2:-1:2] = (self.edges[:-1] + self.edges[1:]) / 2
+        mids[0], mids[-1] = self.edges[0] - 1, self.edges[-1] + 1
+        self.cover = (self.fmin[None, :] <= mids[:, None]) & (mids[:, None] <= self.fmax[None, :])
+        self.seg_bands = [tuple(int(i) for i in np.flatnonzero(row)) for row in self.cover]
+
+    def segment(self, freqs):
+        """Segment-ID(s) für Frequenz(en) in MHz – O(log n) je Wert"""
+        f = np.asarray(freqs, dtype=float)
+        i = np.searchsorted(self.edges, f, side="left")
+        on_edge = (i < len(self.edges)) & (self.edges[np.minimum(i, len(self.edges) - 1)] == f)
+        return 2 * i + on_edge
+
+    def lookup(self, freq):
+        """Indizes aller Bänder, die freq (MHz) enthalten"""
+        return list(self.seg_bands[int(self.segment(freq))])
+
+    def overlap(self, f_lo, f_hi):
+        """Indizes aller Bänder, die sich mit [f_lo, f_hi] (MHz) überschneiden"""
+        if f_lo > f_hi:
+            f_lo, f_hi = f_hi, f_lo
+        s_lo, s_hi = self.segment([f_lo, f_hi])
+        return [int(i) for i in np.flatnonzero(self.cover[s_lo:s_hi + 1].any(axis=0))]
+
+    def classify(self, freqs):
+        """Bulk-Variante: bool-Matrix (len(freqs) × n_bands) in einem Schritt"""
+        return self.cover[self.segment(freqs)]
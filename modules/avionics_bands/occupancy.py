@@ -0,0 +1,122 @@
+"""
+Modul 8: Kanalraster-Belegungsscanner
+Integriert die Leistung eines Breitbandspektrums über jeden Kanal im Raster der
+AVIONICS_BANDS (50 kHz NAV, 25/8.33 kHz COM, ...) per np.add.reduceat und
+liefert Belegung und Duty-Cycle über beliebig viele Frames.
+"""
+from functools import lru_cache
+import numpy as np
+from modules.avionics_bands.app import AVIONICS_BANDS
+from modules.avionics_bands.annotate import EXACT_RASTER
+
+
+class ChannelPlan:
+    """Bin→Kanal-Zuordnung für eine feste Frequenzachse (einmal berechnet)"""
+    def __init__(self, f_start_mhz, bin_khz, n_bins, fine=False):
+        bin_mhz = bin_khz / 1000
+        f_stop  = f_start_mhz + (n_bins - 1) * bin_mhz
+        band_idx, centers, steps = [], [], []
+        for b_idx, band in enumerate(AVIONICS_BANDS):
+            if not band["raster_khz"]:
+                continue
+            r_khz = band["raster_khz"][-1 if fine else 0]
+            step  = EXACT_RASTER.get(r_khz, r_khz) / 1000
+            lo, hi = max(band["freq_min"], f_start_mhz), min(band["freq_max"], f_stop)
+            if lo > hi:
+                continue
+            k0 = int(np.ceil((lo - band["freq_min"]) / step - 1e-9))
+            k1 = int(np.floor((hi - band["freq_min"]) / step + 1e-9))
+            ch = band["freq_min"] + np.arange(k0, k1 + 1) * step
+            band_idx.append(np.full(len(ch), b_idx))
+            centers.append(ch)
+            steps.append(np.full(len(ch), r_khz, dtype=float))
+        self.band_idx   = np.concatenate(band_idx) if band_idx else np.zeros(0, int)
+        self.centers    = np.concatenate(centers) if centers else np.zeros(0)
+        self.raster_khz = np.concatenate(steps) if steps else np.zeros(0)
+        half = np.array([EXACT_RASTER.get(r, r) for r in self.raster_khz]) / 2000
+        # Kanal k belegt Bins [starts[k], ends[k])
+        self.starts = np.clip(np.ceil((self.centers - half - f_start_mhz) / bin_mhz - 1e-9),
+                              0, n_bins).astype(np.intp)
+        self.ends   = np.clip(np.ceil((self.centers + half - f_start_mhz) / bin_mhz - 1e-9),
+                              0, n_bins).astype(np.intp)
+        # Kanäle schmaler als ein Bin: Bin der Kanalmitte verwenden
+        self.narrow = self.ends <= self.starts
+        self.center_bin = np.clip(np.round((self.centers - f_start_mhz) / bin_mhz),
+                                  0, n_bins - 1).astype(np.intp)
+        # Segmentgrenzen für reduceat: Kanäle überlappen nicht (auch nicht bandübergreifend),
+        # daher entspricht jeder nicht-schmale Kanal genau einem Segment
+        bounds = np.unique(np.concatenate([self.starts, self.ends]))
+        self.bounds  = bounds[bounds < n_bins]
+        self.seg_idx = np.searchsorted(self.bounds, self.starts)
+        self.n_bins  = n_bins
+
+    def __len__(self):
+        return len(self.centers)
+
+    def channel_power(self, power_db):
+        """Kanalleistung (dB) für ein Frame (n_bins) oder Frames (n_frames × n_bins)"""
+        lin = np.power(10.0, np.asarray(power_db, dtype=float) / 10)
+        if len(self) == 0:
+            return np.zeros(lin.shape[:-1] + (0,))
+        sums = np.add.reduceat(lin, self.bounds, axis=-1)[..., np.minimum(self.seg_idx, len(self.bounds) - 1)]
+        sums[..., self.narrow] = lin[..., self.center_bin[self.narrow]]
+        return 10 * np.log10(sums + 1e-30)
+
+
+@lru_cache(maxsize=16)
+def channel_plan(f_start_mhz, bin_khz, n_bins, fine=False):
+    return ChannelPlan(f_start_mhz, bin_khz, n_bins, fine)
+
+
+class OccupancyScanner:
+    """Belegung inkrementell über Frames: pro Kanal Zähler und Max-Leistung,
+    Speicherbedarf O(Kanäle) unabhängig von der Anzahl Frames"""
+    def __init__(self, plan, threshold_db=None, margin_db=10.0):
+        self.plan = plan
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.n_frames = 0
+        self.hits     = np.zeros(len(plan), dtype=np.int64)
+        self.max_db   = np.full(len(plan), -np.inf)
+        self.last_db  = np.full(len(plan), -np.inf)
+
+    def update(self, power_db):
+        """Ein Frame oder ein Block von Frames (n_frames × n_bins)"""
+        ch = np.atleast_2d(self.plan.channel_power(power_db))
+        if self.threshold_db is None:
+            # Rauschbezug pro Frame: Median aller Kanalleistungen + Marge
+            thresh = np.median(ch, axis=-1, keepdims=True) + self.margin_db
+        else:
+            thresh = self.threshold_db
+        occupied = ch > thresh
+        self.hits += occupied.sum(axis=0)
+        np.maximum(self.max_db, ch.max(axis=0), out=self.max_db)
+        self.last_db[:] = ch[-1]
+        self.n_frames += len(ch)
+        return occupied[-1]
+
+    def duty_cycle(self):
+        return self.hits / max(self.n_frames, 1)
+
+    def table(self, only_occupied=True):
+        duty = self.duty_cycle()
+        rows = np.flatnonzero(duty > 0) if only_occupied else np.arange(len(duty))
+        return [{
+            "band":        AVIONICS_BANDS[self.plan.band_idx[i]]["name"],
+            "channel_mhz": round(float(self.plan.centers[i]), 4),
+            "raster_khz":  float(self.plan.raster_khz[i]),
+            "duty_cycle":  round(float(duty[i]), 4),
+            "max_db":      round(float(self.max_db[i]), 2),
+            "last_db":     round(float(self.last_db[i]), 2),
+        } for i in rows.tolist()]
+
+    def summary(self):
+        duty = self.duty_cycle()
+        out = []
+        for b_idx in np.unique(self.plan.band_idx).tolist():
+            sel = self.plan.band_idx == b_idx
+            out.append({"band": AVIONICS_BANDS[b_idx]["name"],
+                        "n_channels": int(sel.sum()),
+                        "n_occupied": int((duty[sel] > 0).sum()),
+                        "mean_duty_cycle": round(float(duty[sel].mean()), 4)})
+        return out
@@ -0,0 +1,27 @@
+"""
+Aufnahmen hochladen: CSV (Spalte 0) wird geparst, Rohdaten (float32 little
+endian, eine Spalte) werden auf Platte gespült und per memmap gelesen – auch
+lange Aufnahmen landen nicht komplett im Speicher.
+"""
+import io, math, os
+import numpy as np
+
+RAW_SUFFIXES = (".f32", ".bin", ".raw")
+
+
+def parse_fs(args, default=1e6):
+    """Abtastrate fs (Hz) aus dem Formular; ValueError wenn nicht endlich und > 0"""
+    fs = float(args.get("fs") or default)
+    if not (math.isfinite(fs) and fs > 0):
+        raise ValueError("fs muss endlich und > 0 sein")
+    return fs
+
+
+def load_capture(f, workdir):
+    """Upload → Array; Rohdaten werden nach workdir geschrieben und gemappt statt geladen"""
+    if f.filename.lower().endswith(RAW_SUFFIXES):
+        path = os.path.join(workdir, "upload.f32")
+        f.save(path)
+        return np.memmap(path, dtype="<f4", mode="r")
+    data = np.loadtxt(io.StringIO(f.read().decode("utf-8")), delimiter=",")
+    return data[:, 0] if data.ndim > 1 else data
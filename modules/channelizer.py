@@ -0,0 +1,105 @@
+"""
+Polyphasen-Channelizer (Analyse-Filterbank)
+Zerlegt eine Breitbandaufnahme in n_channels gleich breite Kanäle im Abstand
+fs/n_channels und liefert je Kanal einen komplexen Basisbandstrom mit
+fs/n_channels (kritisch abgetastet) bzw. oversample·fs/n_channels.
+
+Ein gemeinsamer Prototyp-Tiefpass (modules.dsp.lowpass) wird in n_channels
+Phasen zerlegt; je Ausgangssample: Fenster × Filter, Phasen aufsummieren, eine
+FFT über n_channels – statt Mischen + Filtern pro Kanal. Die Eingabe läuft in
+Blöcken (auch memmap), der Filterzustand bleibt zwischen process()-Aufrufen
+erhalten.
+
+Reelle Eingabe: Kanäle 0..n_channels/2 (0 Hz bis fs/2, rfft);
+IQ-Eingabe (iq=True): alle Kanäle, Reihenfolge wie np.fft.fftfreq.
+"""
+import numpy as np
+from modules import dsp, metrics
+
+TAPS_PER_CHANNEL = dsp.TAPS_PER_PHASE
+BLOCK = 1 << 18                   # Eingangssamples pro Verarbeitungsblock
+
+
+class PolyphaseChannelizer:
+    def __init__(self, n_channels, fs, oversample=1, taps_per_channel=TAPS_PER_CHANNEL, iq=False):
+        if n_channels < 2 or n_channels % oversample:
+            raise ValueError("n_channels muss ≥ 2 und durch oversample teilbar sein")
+        self.n_channels = n_channels
+        self.decim      = n_channels // oversample
+        self.fs         = fs
+        self.fs_out     = fs / self.decim
+        self.spacing    = fs / n_channels
+        self.iq         = iq
+        self.dtype      = np.result_type(dsp.REAL, np.complex64) if iq else dsp.REAL
+        h = dsp.lowpass(n_channels, taps_per_channel)
+        # Zeitumgekehrt in (Phase, Kanal): Fenster vorwärts lesen, FFT statt IFFT
+        self._h = np.ascontiguousarray(h[::-1].reshape(taps_per_channel, n_channels)).astype(dsp.REAL)
+        k = np.arange(n_channels if iq else n_channels // 2 + 1)
+        self._k = k
+        # Oversampling: Fensterstart s = i·decim ist kein Vielfaches von n_channels →
+        # Phase e^{-j2πks/n_channels}, periodisch in i mit Periode oversample
+        i = np.arange(oversample)[:, None]
+        self._rot = np.exp(-2j * np.pi * (i * self.decim * k % n_channels) / n_channels).astype(np.complex64)
+        self.reset()
+
+    @property
+    def n_out_channels(self):
+        return len(self._k)
+
+    @property
+    def channel_freqs(self):
+        """Kanalmitten relativ zur Aufnahme (Hz)"""
+        if self.iq:
+            return np.fft.fftfreq(self.n_channels, 1.0 / self.fs)
+        return self._k * self.spacing
+
+    def reset(self):
+        self._carry = np.zeros(0, dtype=self.dtype)
+        self._start = 0                 # globaler Index von _carry[0]
+
+    @metrics.timed("channelize")
+    def process(self, block):
+        """Nächster Eingangsblock → (n_out, n_out_channels) complex64; Rest bleibt gepuffert"""
+        buf = np.concatenate([self._carry, np.asarray(block, dtype=self.dtype)])
+        P, M, D = self._h.shape[0], self.n_channels, self.decim
+        L = P * M
+        n = (len(buf) - L) // D + 1 if len(buf) >= L else 0
+        if n == 0:
+            self._carry = buf
+            return np.zeros((0, self.n_out_channels), dtype=np.complex64)
+        win = np.lib.stride_tricks.sliding_window_view(buf, L)[::D][:n]
+        v = win[:, :M] * self._h[0]
+        for q in range(1, P):
+            v += win[:, q * M:(q + 1) * M] * self._h[q]
+        if self.iq:
+            Y = dsp.sfft.fft(v, axis=-1, workers=dsp.WORKERS)
+        else:
+            Y = dsp.rfft(v, axis=-1)
+        if D != M:
+            Y *= self._rot[(self._start // D + np.arange(n)) % len(self._rot)]
+        self._carry = buf[n * D:].copy()
+        self._start += n * D
+        return Y.astype(np.complex64, copy=False)
+
+
+def channelize(signal, channelizer, block=BLOCK):
+    """Ganze Aufnahme (Array oder memmap) blockweise → Ausgangsblöcke je Kanal"""
+    for i0 in range(0, len(signal), block):
+        out = channelizer.process(signal[i0:i0 + block])
+        if len(out):
+            yield out
+
+
+def power_frames(blocks, frame):
+    """Kanal-Ausgänge → mittlere Leistung (dB) je frame Ausgangssamples,
+    als Blöcke (n_frames × Kanäle); ein unvollständiger Rest am Ende entfällt"""
+    rest = None
+    for y in blocks:
+        p = y.real ** 2 + y.imag ** 2
+        if rest is not None:
+            p = np.vstack([rest, p])
+        n = len(p) // frame
+        rest = p[n * frame:]
+        if n:
+            mean = p[:n * frame].reshape(n, frame, -1).mean(axis=1)
+            yield 10 * np.log10(mean + 1e-20)
@@ -0,0 +1,212 @@
+"""
+Digital Down Conversion für lange Aufnahmen
+NCO-Mischer (f_center → 0 Hz) + mehrstufige Dezimierung mit polyphasigen
+FIR-Stufen (Faktoren 2/3/5/7, absteigend; Faktor-2-Stufen als Halbband).
+Blockweise über Arrays oder memmaps: Mischerphase und Filterzustand bleiben
+zwischen process()-Aufrufen erhalten, das Ergebnis ist unabhängig von der
+Blockgröße.
+
+Filterentwurf je Stufe (Kaiser, ATTEN_DB): Durchlass bandwidth/2, Sperrbereich
+ab der ersten Frequenz, die in den Durchlass faltet. Entwürfe und Stufenpläne
+werden gecached. Ausgabe komplex mit ≥ 1.25·bandwidth oder – für die reellen
+Analysen (analyze_signal, Anomalie-Spektrum) – reell auf fs_out/4 ("ZF").
+
+Einmalige Zoom-Spektren nutzen weiter modules.dsp.ddc (eine Stufe, kein Zustand).
+"""
+import math
+from functools import lru_cache
+import numpy as np
+from modules import dsp, metrics
+
+ATTEN_DB   = 80.0
+OVERSAMPLE = {False: 1.25, True: 2.5}   # fs_out / bandwidth: komplex bzw. reell (ZF)
+BLOCK      = 1 << 18                     # Eingangssamples pro Verarbeitungsblock
+FACTORS    = (7, 5, 3, 2)
+
+
+def smooth_decimation(d_max):
+    """Größter Faktor ≤ d_max, der nur aus FACTORS besteht → Stufenfaktoren absteigend"""
+    for d in range(max(1, int(d_max)), 0, -1):
+        rest, factors = d, []
+        for p in FACTORS:
+            while rest % p == 0:
+                factors.append(p)
+                rest //= p
+        if rest == 1:
+            return factors
+    return []
+
+
+@lru_cache(maxsize=64)
+def design_stage(decim, f_pass, f_stop):
+    """Tiefpass einer Stufe; f_pass/f_stop relativ zur Eingangsrate der Stufe.
+    Halbband (jeder zweite Koeffizient 0), wenn die Kanten symmetrisch um 1/4 liegen."""
+    halfband = decim == 2 and abs(f_pass + f_stop - 0.5) < 1e-9
+    numtaps, beta = dsp.ssig.kaiserord(ATTEN_DB, 2 * (f_stop - f_pass))
+    if halfband:
+        numtaps = 4 * max(0, -(-(numtaps - 3) // 4)) + 3
+        h = dsp.ssig.firwin(numtaps, 0.5, window=("kaiser", beta))
+        h[np.abs(h) < 1e-9 * h.max()] = 0.0
+    else:
+        numtaps |= 1
+        h = dsp.ssig.firwin(numtaps, f_pass + f_stop, window=("kaiser", beta))
+    h = h.astype(dsp.REAL)
+    h.flags.writeable = False
+    return h
+
+
+@lru_cache(maxsize=32)
+def plan_stages(fs, bandwidth, real_output=False):
+    """[(Faktor, Taps), ...] für fs → ≥ OVERSAMPLE·bandwidth"""
+    factors = smooth_decimation(fs / (bandwidth * OVERSAMPLE[real_output]))
+    fs_out  = fs / int(np.prod(factors, dtype=np.int64))
+    f_pass  = bandwidth / 2
+    stages, rate = [], fs
+    for i, d in enumerate(factors):
+        last   = i == len(factors) - 1
+        # Sperrbereich: alles, was nach der Dezimierung in den Durchlass faltet;
+        # bei ZF-Ausgabe zusätzlich die Spiegellage um fs_out/2
+        f_stop = (fs_out / 2 if real_output else fs_out) - f_pass if last else rate / d - f_pass
+        stages.append((d, design_stage(d, round(f_pass / rate, 12), round(f_stop / rate, 12))))
+        rate /= d
+    return stages
+
+
+class NCO:
+    """Mischer e^{-j2π·f·n/fs} mit fortlaufender Phase; LO-Tabelle für eine Blocklänge"""
+    def __init__(self, f, fs, table_len=BLOCK):
+        self.cyc   = (f / fs) % 1.0
+        self.table = np.exp(-2j * np.pi * self.cyc * np.arange(table_len)).astype(np.complex64)
+        self.reset()
+
+    def reset(self):
+        self.phase = 0.0                 # Zyklen, mod 1
+
+    def mix(self, x):
+        n = len(x)
+        lo = self.table[:n] if n <= len(self.table) else \
+            np.exp(-2j * np.pi * self.cyc * np.arange(n)).astype(np.complex64)
+        out = x * lo
+        out *= np.complex64(np.exp(-2j * np.pi * self.phase))
+        self.phase = (self.phase + self.cyc * n) % 1.0
+        return out
+
+
+class FirDecimator:
+    """Polyphasige FIR-Dezimierung um decim mit Zustand; berechnet nur behaltene Ausgänge.
+    Eingangsphasen liegen als zusammenhängende Zeilen vor; Halbband: je Koeffizient ≠ 0
+    eine Vektoroperation, sonst je Tap-Block ein Matrix-Vektor-Produkt."""
+    def __init__(self, taps, decim):
+        self.decim = decim
+        self.n_taps = len(taps)
+        Q = -(-len(taps) // decim)
+        g = np.zeros(Q * decim, dtype=np.complex64)
+        g[:len(taps)] = taps[::-1]               # Faltung → Korrelation über das Fenster
+        self._g = g.reshape(Q, decim)
+        self._sparse = [(q, j, g[q * decim + j]) for q in range(Q) for j in range(decim)
+                        if g[q * decim + j] != 0]
+        self.halfband = len(self._sparse) < 0.6 * len(g)
+        self.reset()
+
+    def reset(self):
+        self._carry = np.zeros(0, dtype=np.complex64)
+
+    def process(self, x):
+        buf = np.concatenate([self._carry, x])
+        D, L = self.decim, self.n_taps
+        n = (len(buf) - L) // D + 1 if len(buf) >= L else 0
+        if n == 0:
+            self._carry = buf
+            return np.zeros(0, dtype=np.complex64)
+        Q = len(self._g)
+        m = n + Q - 1
+        seg = buf[:m * D]
+        if len(seg) < m * D:                     # letzte Zeile: Rest × Null-Taps
+            seg = np.concatenate([seg, np.zeros(m * D - len(seg), dtype=np.complex64)])
+        R = seg.reshape(m, D).T.copy()           # Phase j: R[j, i] = buf[i·D + j]
+        if self.halfband:
+            y = np.zeros(n, dtype=np.complex64)
+            for q, j, c in self._sparse:
+                y += c * R[j, q:q + n]
+        else:
+            y = self._g[0] @ R[:, :n]
+            for q in range(1, Q):
+                y += self._g[q] @ R[:, q:q + n]
+        self._carry = buf[n * D:].copy()
+        return y
+
+
+class DDC:
+    def __init__(self, fs, f_center, bandwidth, real_output=False, iq=False):
+        if not 0 < bandwidth <= fs / 2:
+            raise ValueError(f"Bandbreite muss in (0, {fs / 2:g}] Hz liegen")
+        self.fs, self.f_center, self.bandwidth = fs, f_center, bandwidth
+        self.real_output, self.iq = real_output, iq
+        plan = plan_stages(float(fs), float(bandwidth), real_output)
+        self.factors = [d for d, _ in plan]
+        self.decim   = int(np.prod(self.factors, dtype=np.int64))
+        self.fs_out  = fs / self.decim
+        self.nco     = NCO(f_center, fs)
+        self.stages  = [FirDecimator(h, d) for d, h in plan]
+        self.reset()
+
+    @property
+    def f_offset(self):
+        """Frequenz in der Aufnahme, die im Ausgang bei 0 Hz liegt"""
+        return self.f_center - (self.fs_out / 4 if self.real_output else 0.0)
+
+    def reset(self):
+        self.nco.reset()
+        for st in self.stages:
+            st.reset()
+        self._n_out = 0
+
+    @metrics.timed("ddc")
+    def process(self, block):
+        x = np.asarray(block, dtype=np.complex64 if self.iq else dsp.REAL)
+        y = self.nco.mix(x)
+        for st in self.stages:
+            y = st.process(y)
+        if self.real_output:
+            # Basisband → fs_out/4: Re(y·j^n)
+            n = (self._n_out + np.arange(len(y))) % 4
+            y = np.where(n == 0, y.real, np.where(n == 1, -y.imag, np.where(n == 2, -y.real, y.imag)))
+            y = y.astype(dsp.REAL, copy=False)
+        self._n_out += len(y)
+        return y
+
+    def info(self):
+        return {"center_hz": self.f_center, "bandwidth_hz": self.bandwidth,
+                "decimation": self.decim, "stages": self.factors,
+                "taps": [st.n_taps for st in self.stages], "fs_out": self.fs_out}
+
+
+def downconvert(signal, ddc, block=BLOCK):
+    """Ganze Aufnahme (Array oder memmap) blockweise → Ausgangsblöcke"""
+    for i0 in range(0, len(signal), block):
+        y = ddc.process(signal[i0:i0 + block])
+        if len(y):
+            yield y
+
+
+def narrowband(signal, fs, f_center, bandwidth, real_output=True):
+    """Ausschnitt f_center ± bandwidth/2 einer Aufnahme → (Signal, DDC)"""
+    ddc = DDC(fs, f_center, bandwidth, real_output)
+    out = list(downconvert(signal, ddc))
+    if not out:
+        raise ValueError("Aufnahme zu kurz für die Dezimierung")
+    return np.concatenate(out), ddc
+
+
+def ddc_params(args, fs):
+    """(f_center, bandwidth) aus ddc_center/ddc_bw (Hz) oder None ohne DDC;
+    ValueError außerhalb 0 ≤ ddc_center ≤ fs/2 bzw. 0 < ddc_bw ≤ fs/2 (sonst
+    faltet der NCO unbemerkt)"""
+    if not args.get("ddc_center"):
+        return None
+    f_center, bandwidth = float(args["ddc_center"]), float(args.get("ddc_bw") or 25e3)
+    if not (math.isfinite(f_center) and 0 <= f_center <= fs / 2):
+        raise ValueError(f"ddc_center muss zwischen 0 und fs/2 ({fs / 2:g} Hz) liegen")
+    if not (math.isfinite(bandwidth) and 0 < bandwidth <= fs / 2):
+        raise ValueError(f"ddc_bw muss zwischen 0 und fs/2 ({fs / 2:g} Hz) liegen")
+    return f_center, bandwidth
@@ -0,0 +1,135 @@
+"""
+DSP-Backend: FFTs über scipy.fft
+- workers= aus einem Thread-Budget (DSP_FFT_WORKERS, Default: alle Kerne);
+  pocketfft verteilt damit Batches (Wasserfall, Stream) auf mehrere Threads,
+  eine einzelne 1-D-FFT bleibt einthreadig
+- float32/complex64 durchgehend (DSP_PRECISION=float64 schaltet zurück)
+- FFT-Längen über next_fast_len statt beliebiger (z.B. prim) Upload-Längen
+- Pläne cached pocketfft intern; Fenster werden hier je (Typ, Länge) gecached
+- Zoom-FFT: DDC (Mischen im komplexen Polyphasen-Filter) + Dezimierung, dann
+  Chirp-Z nur über den gewünschten Ausschnitt
+scipy.fft/scipy.signal werden erst beim ersten Aufruf importiert (modules/lazy.py).
+"""
+import os
+from functools import lru_cache
+import numpy as np
+from modules.lazy import lazy_import
+
+sfft = lazy_import("scipy.fft")
+ssig = lazy_import("scipy.signal")
+
+WORKERS   = int(os.environ.get("DSP_FFT_WORKERS") or os.cpu_count() or 1)
+REAL      = np.dtype(os.environ.get("DSP_PRECISION", "float32"))
+WINDOW_CACHE_MAX = 1 << 20      # längere Fenster nicht cachen (Speicher)
+TAPS_PER_PHASE   = 16           # Tiefpasslänge = TAPS_PER_PHASE · Dezimierung
+ZOOM_OVERSAMPLE  = 1.25         # Ausgaberate / Zoom-Spanne (Übergangsband des Filters)
+ZOOM_MAX_POINTS  = 1 << 20      # Obergrenze der intern ausgewerteten Chirp-Z-Punkte
+
+WINDOWS = {"hann": np.hanning, "hamming": np.hamming, "blackman": np.blackman, "rect": np.ones}
+
+
+def as_real(x):
+    """Samples in Arbeitspräzision (keine Kopie, wenn schon passend)"""
+    return np.asarray(x, dtype=REAL)
+
+def fast_len(n):
+    """Nächste schnelle FFT-Länge ≥ n (Produkte kleiner Primzahlen)"""
+    return sfft.next_fast_len(int(n), real=True)
+
+
+@lru_cache(maxsize=32)
+def _cached_window(name, n):
+    w = WINDOWS.get(name, np.hanning)(n).astype(REAL)
+    w.flags.writeable = False
+    return w
+
+def window(name, n):
+    if n <= WINDOW_CACHE_MAX:
+        return _cached_window(name, n)
+    return WINDOWS.get(name, np.hanning)(n).astype(REAL)
+
+
+def rfft(x, n=None, axis=-1):
+    return sfft.rfft(as_real(x), n=n, axis=axis, workers=WORKERS)
+
+def rfftfreq(n, fs):
+    return np.fft.rfftfreq(n, 1.0 / fs)
+
+
+def power_spectrum_db(sig, fs, window_name="hann", n=None):
+    """Gefensterte rfft über das ganze Signal → (freqs, 20·log10(|S|/N)).
+    Ohne n wird auf die nächste schnelle Länge aufgefüllt."""
+    N = len(sig)
+    n = n or fast_len(N)
+    S = rfft(as_real(sig) * window(window_name, N), n=n)
+    return rfftfreq(n, fs), 20 * np.log10(np.abs(S) / N + 1e-12)
+
+
+def frames_power(frames, window_name="hann"):
+    """Batch-FFT über Zeilen → |S|², ein Aufruf für alle"""
+    frames = as_real(frames)
+    S = rfft(frames * window(window_name, frames.shape[-1]), axis=-1)
+    return S.real ** 2 + S.imag ** 2
+
+
+def frames_db(frames, window_name="hann"):
+    """Batch-FFT über Zeilen (Wasserfall/Stream) → 20·log10(|S|)"""
+    return 10 * np.log10(frames_power(frames, window_name) + 1e-24)
+
+
+# ── DDC + Zoom-FFT ────────────────────────────────────────────────────────────
+@lru_cache(maxsize=16)
+def lowpass(decim, taps_per_phase=TAPS_PER_PHASE):
+    """Kaiser-Tiefpass für Dezimierung um decim (−6 dB bei fs/(2·decim)), DC-Verstärkung 1"""
+    h = ssig.firwin(taps_per_phase * decim, 1.0 / decim, window=("kaiser", 8.0))
+    h.flags.writeable = False
+    return h
+
+
+def ddc(x, f_center, fs, decim, taps_per_phase=TAPS_PER_PHASE):
+    """Digital Down Conversion eines reellen Signals: f_center → 0 Hz, Tiefpass,
+    Dezimierung um decim. Polyphasig als eine Matrixmultiplikation; das Mischen
+    steckt im komplexen Filter (h·e^{-jωl}) plus einer Phasenkorrektur je
+    Ausgangssample – keine LO-Folge über die volle Länge."""
+    x = as_real(x)
+    K = taps_per_phase
+    M = len(x) // decim
+    if M < 2 * K:
+        raise ValueError(f"Signal zu kurz für Dezimierung um {decim}")
+    h = lowpass(decim, K)
+    cyc = f_center / fs                                     # Zyklen pro Sample
+    g = h * np.exp(-2j * np.pi * cyc * np.arange(len(h)))
+    G = g.reshape(K, decim).T                               # Phase j, Tap i → (decim, K)
+    Y = x[:M * decim].reshape(M, decim) @ np.hstack([G.real, G.imag]).astype(REAL)
+    n_out = M - K + 1
+    y = np.zeros(n_out, dtype=np.result_type(REAL, np.complex64))
+    for i in range(K):
+        y += Y[i:i + n_out, i] + 1j * Y[i:i + n_out, K + i]
+    y *= np.exp(-2j * np.pi * ((cyc * decim * np.arange(n_out)) % 1.0))
+    return y
+
+
+@lru_cache(maxsize=8)
+def zoom_plan(n, f1, f2, m, fs):
+    """Chirp-Z-Plan (scipy.signal.ZoomFFT) für n Samples → m Punkte in [f1, f2)"""
+    return ssig.ZoomFFT(n, [f1, f2], m=m, fs=fs)
+
+
+def zoom_spectrum_db(sig, fs, f1, f2, m, window_name="hann"):
+    """Spektrum nur im Ausschnitt [f1, f2) mit m Punkten über die gesamte Aufnahme.
+    Schmale Spannen: erst DDC + Dezimierung, dann Chirp-Z über das kurze Signal.
+    Ist das Raster gröber als die Auflösung der Aufnahme, wird feiner ausgewertet
+    und per Maximum auf m Punkte reduziert – schmale Träger fallen nicht zwischen
+    die Punkte. → (freqs, 20·log10(|X|/N), Dezimierungsfaktor)"""
+    fc = (f1 + f2) / 2
+    decim = int(fs / ((f2 - f1) * ZOOM_OVERSAMPLE))
+    if decim >= 4 and len(sig) // decim >= 4 * TAPS_PER_PHASE:
+        y, fs_y, lo, hi = ddc(sig, fc, fs, decim), fs / decim, f1 - fc, f2 - fc
+    else:
+        decim, y, fs_y, lo, hi = 1, as_real(sig), fs, f1, f2
+    N = len(y)
+    over = max(1, min(int(np.ceil(2 * (f2 - f1) * N / fs_y / m)), ZOOM_MAX_POINTS // m))
+    X = zoom_plan(N, lo, hi, m * over, fs_y)(y * window(window_name, N))
+    mag = np.abs(X).reshape(m, over).max(axis=1)
+    freqs = f1 + (f2 - f1) * np.arange(m) / m
+    return freqs, 20 * np.log10(mag / N + 1e-12), decim
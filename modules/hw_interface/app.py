@@ -3,40 +3,135 @@ Modul 6: Hardware-Interface Stub
 R&S SCPI Mock: VNA (ZVA-Klasse) + Spektrumanalysator (FSW-Klasse)
 Erweiterbar auf echte PyVISA-Anbindung durch Austausch der Mock-Klassen
 """
-import json, random, time
-from flask import Blueprint, render_template_string, request, jsonify
+import json, math, os, random, re, time
+from functools import lru_cache
+import numpy as np
+from flask import Blueprint, request, jsonify, Response
+from modules.response_cache import immutable
+from modules.templating import precompile
+from modules.hw_interface.session import (
+    SessionPool, SessionTimeout, BlockError, RawSocketInstrument, VisaInstrument, execute,
+    encode_block)
 
 hw_bp = Blueprint("hw", __name__)
 
 # ── SCPI Mock Devices ─────────────────────────────────────────────────────────
-class RnS_VNA_Mock:
+MAX_POINTS = 100001   # ZNB/FSW: max. Sweep-Punkte
+
+def is_form_cmd(cmd):
+    """FORM REAL,32 / :FORM:DATA ASC / FORM? (Datenformat für Trace-Transfer)"""
+    return cmd.lstrip(":").startswith("FORM")
+
+def sets_form(cmd):
+    """Stellt cmd (ggf. ';'-verkettet) das Datenformat um? FORM? bleibt erlaubt"""
+    parts = (p.strip().upper() for p in cmd.split(";"))
+    return any(is_form_cmd(p) and not p.endswith("?") for p in parts)
+
+def fmt_number(v):
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+def freeze(arr):
+    arr.flags.writeable = False
+    return arr
+
+# Deterministische Grundkurven pro (start, stop, points) – werden nur einmal
+# berechnet, pro Sweep kommt lediglich frisches Rauschen dazu.
+@lru_cache(maxsize=32)
+def vna_base(start, stop, points):
+    f     = np.linspace(start, stop, points)
+    # Simuliertes Bandpassfilter um 2.4 GHz
+    shape = np.exp(-((f - 2.4e9) / 200e6)**2)
+    s11   = freeze((-30 + 25 * shape).astype(np.float32))
+    s21   = freeze((-3  - 20 * shape).astype(np.float32))
+    return (f / 1e9).tolist(), {"S11": s11, "S21": s21}
+
+@lru_cache(maxsize=32)
+def fsw_base(cent, span, points):
+    f_mhz = np.linspace(cent - span / 2, cent + span / 2, points) / 1e6
+    # Simuliertes Spektrum: LTE-Band-Signale bei 2.1 und 2.6 GHz
+    spec  = np.full(points, -80.0)
+    spec += 30 * np.exp(-((f_mhz - 2100) / 20)**2)  # 2.1 GHz
+    spec += 25 * np.exp(-((f_mhz - 2600) / 15)**2)  # 2.6 GHz
+    return f_mhz.tolist(), freeze(spec.astype(np.float32))
+
+class MockDevice:
+    """Gemeinsame Mock-Logik: Datenformat, Einstellungen, Rausch-Generator"""
+    SETTINGS = {}   # SCPI-Header (inkl. Kurzform) → Attributname
+
+    def __init__(self, seed=None):
+        self.form = "ASC"
+        self.rng  = np.random.default_rng(seed)
+
+    def noisy(self, base, sigma):
+        noise  = self.rng.standard_normal(len(base), dtype=np.float32)
+        noise *= sigma
+        noise += base
+        return noise
+
+    def set_form(self, cmd):
+        """Datenformat wie beim echten Gerät: ASCii (Default) oder REAL,32-Binärblock"""
+        if cmd.endswith("?"):
+            return "REAL,32" if self.form == "REAL,32" else "ASC,0"
+        arg = cmd.split(None, 1)[1].replace(" ", "") if " " in cmd else ""
+        if arg in ("REAL,32", "REAL"):
+            self.form = "REAL,32"
+        elif arg in ("ASC", "ASCII", "ASC,0"):
+            self.form = "ASC"
+        else:
+            return f"Unknown format: {arg}"
+        return ""
+
+    def setting(self, cmd):
+        """':SENS:FREQ:START?' lesen bzw. ':SENS:FREQ:START 1e9' setzen;
+        None, wenn cmd keine Einstellung ist"""
+        header, _, arg = cmd.partition(" ")
+        attr = self.SETTINGS.get(header.rstrip("?"))
+        if attr is None:
+            return None
+        if header.endswith("?"):
+            return fmt_number(getattr(self, attr))
+        try:
+            value = float(arg)
+        except ValueError:
+            return f"Invalid value: {arg}"
+        if not math.isfinite(value):
+            return f"Invalid value: {arg}"
+        if attr == "points":
+            value = int(min(max(value, 2), MAX_POINTS))
+        setattr(self, attr, value)
+        return ""
+
+class RnS_VNA_Mock(MockDevice):
     """Simuliert R&S ZVA / ZNB Vektornetzwerkanalysator"""
     model = "R&S ZNB20 (Mock)"
+    SETTINGS = {":SENS:FREQ:START": "start", ":SENS:FREQ:STAR": "start",
+                ":SENS:FREQ:STOP":  "stop",  ":SENS:SWE:POIN":  "points",
+                ":SENS:SWE:POINTS": "points"}
+    def __init__(self, seed=None):
+        super().__init__(seed)
+        self.start, self.stop, self.points = 1e8, 6e9, 401   # 100 MHz – 6 GHz
+        vna_base(self.start, self.stop, self.points)
     def idn(self):
         return "Rohde&Schwarz,ZNB20,1234567890,3.30"
     def query(self, cmd):
         cmd = cmd.strip().upper()
         if cmd == "*IDN?":
             return self.idn()
-        if cmd == ":SENS:FREQ:START?":
-            return "100000"      # 100 kHz
-        if cmd == ":SENS:FREQ:STOP?":
-            return "20000000000" # 20 GHz
-        if cmd == ":SENS:SWE:POIN?":
-            return "401"
+        if is_form_cmd(cmd):
+            return self.set_form(cmd)
+        resp = self.setting(cmd)
+        if resp is not None:
+            return resp
         if "S11" in cmd or "S21" in cmd:
-            # Simulierter S-Parameter-Sweep (401 Punkte)
-            import numpy as np
-            pts = 401
-            f   = np.linspace(1e8, 6e9, pts)
-            # S11: simuliertes Bandpassfilter um 2.4 GHz
-            s11 = -30 + 25 * np.exp(-((f - 2.4e9) / 200e6)**2) + np.random.randn(pts) * 0.3
-            s21 = -3  - 20 * np.exp(-((f - 2.4e9) / 200e6)**2) + np.random.randn(pts) * 0.2
+            # Simulierter S-Parameter-Sweep
             param = "S21" if "S21" in cmd else "S11"
-            vals  = s21 if param == "S21" else s11
+            freqs_ghz, base = vna_base(self.start, self.stop, self.points)
+            vals = self.noisy(base[param], 0.2 if param == "S21" else 0.3)
+            if self.form == "REAL,32":
+                return encode_block(vals)
             return {
                 "param": param,
-                "freqs_ghz": (f / 1e9).tolist(),
+                "freqs_ghz": freqs_ghz,
                 "values_db": vals.tolist(),
                 "unit": "dB",
             }
@@ -44,31 +139,36 @@ class RnS_VNA_Mock:
             return "0,No error"
         return f"Unknown command: {cmd}"
 
-class RnS_FSW_Mock:
+class RnS_FSW_Mock(MockDevice):
     """Simuliert R&S FSW Spektrumanalysator"""
     model = "R&S FSW26 (Mock)"
+    SETTINGS = {":SENS:FREQ:CENT": "cent", ":SENS:FREQ:CENTER": "cent",
+                ":SENS:FREQ:SPAN": "span", ":SENS:SWE:POIN":    "points",
+                ":SENS:SWE:POINTS": "points"}
+    def __init__(self, seed=None):
+        super().__init__(seed)
+        self.cent, self.span, self.points = 2.4e9, 1e9, 501   # 2.4 GHz, 1 GHz Span
+        fsw_base(self.cent, self.span, self.points)
     def idn(self):
         return "Rohde&Schwarz,FSW26,9876543210,4.20"
     def query(self, cmd):
         cmd = cmd.strip().upper()
         if cmd == "*IDN?":
             return self.idn()
-        if cmd == ":SENS:FREQ:CENT?":
-            return "2400000000"   # 2.4 GHz
-        if cmd == ":SENS:FREQ:SPAN?":
-            return "1000000000"   # 1 GHz Span
+        if is_form_cmd(cmd):
+            return self.set_form(cmd)
+        resp = self.setting(cmd)
+        if resp is not None:
+            return resp
         if cmd == ":SENS:BAND:RES?":
             return "1000000"      # RBW 1 MHz
         if "TRAC" in cmd or "SWEEP" in cmd:
-            import numpy as np
-            pts   = 501
-            f_mhz = np.linspace(1900, 2900, pts)
-            # Simuliertes Spektrum: LTE-Band-Signale bei 2.1 und 2.6 GHz
-            spec  = -80 + np.random.randn(pts) * 2
-            spec += 30 * np.exp(-((f_mhz - 2100) / 20)**2)  # 2.1 GHz
-            spec += 25 * np.exp(-((f_mhz - 2600) / 15)**2)  # 2.6 GHz
+            f_mhz, base = fsw_base(self.cent, self.span, self.points)
+            spec = self.noisy(base, 2.0)
+            if self.form == "REAL,32":
+                return encode_block(spec)
             return {
-                "freqs_mhz":   f_mhz.tolist(),
+                "freqs_mhz":   f_mhz,
                 "power_dbm":   spec.tolist(),
                 "ref_level":   -10,
                 "rbw_mhz":     1,
@@ -78,11 +178,50 @@ class RnS_FSW_Mock:
             return "0,No error"
         return f"Unknown command: {cmd}"
 
-# Device Registry
+# ── Device Registry ──────────────────────────────────────────────────────────
+# Ohne Konfiguration wird der Mock verwendet. Echte Geräte per Umgebungsvariable:
+#   HW_VNA_ADDR=socket://192.168.0.10:5025   (Raw-Socket)
+#   HW_FSW_ADDR=TCPIP::192.168.0.11::INSTR    (PyVISA-Ressource)
+SCPI_TIMEOUT = float(os.environ.get("HW_SCPI_TIMEOUT", 5.0))
+MIN_TIMEOUT, MAX_TIMEOUT = 0.1, 30.0   # Grenzen für den timeout-Parameter (s)
+POOL_SIZE    = int(os.environ.get("HW_POOL_SIZE", 4))
+MAX_BATCH    = 200
+
+def parse_timeout(value):
+    """timeout aus dem Request (s), auf MIN_TIMEOUT…MAX_TIMEOUT begrenzt; ValueError sonst"""
+    if value in (None, ""):
+        return SCPI_TIMEOUT
+    timeout = float(value)
+    if math.isnan(timeout):
+        raise ValueError(f"Ungültiger timeout: {value}")
+    return min(max(timeout, MIN_TIMEOUT), MAX_TIMEOUT)
+
+def make_factory(dev_key, mock_cls):
+    addr = os.environ.get(f"HW_{dev_key.upper()}_ADDR")
+    if not addr:
+        return mock_cls
+    if addr.startswith("socket://"):
+        host, _, port = addr[len("socket://"):].partition(":")
+        return lambda: RawSocketInstrument(host, int(port or 5025), SCPI_TIMEOUT)
+    return lambda: VisaInstrument(addr, SCPI_TIMEOUT)
+
 DEVICES = {
-    "vna":  {"instance": RnS_VNA_Mock(),  "label": "VNA – R&S ZNB20 (Mock)"},
-    "fsw":  {"instance": RnS_FSW_Mock(),  "label": "Spektrumanalysator – R&S FSW26 (Mock)"},
+    "vna":  {"factory": make_factory("vna", RnS_VNA_Mock),  "label": "VNA – R&S ZNB20 (Mock)",
+             "trace_cmd": ":CALC1:DATA? S11",
+             "trace_re":  re.compile(r":?CALC(ULATE)?1?:DATA\? S(11|21)"),
+             "axis_cmds": [":SENS:FREQ:START?", ":SENS:FREQ:STOP?"],
+             "axis": lambda start, stop: (start, stop)},
+    "fsw":  {"factory": make_factory("fsw", RnS_FSW_Mock),  "label": "Spektrumanalysator – R&S FSW26 (Mock)",
+             "trace_cmd": ":TRAC:DATA? TRACE1",
+             "trace_re":  re.compile(r":?TRAC(E)?(:DATA)?\? TRACE[1-6]"),
+             "axis_cmds": [":SENS:FREQ:CENT?", ":SENS:FREQ:SPAN?"],
+             "axis": lambda cent, span: (cent - span / 2, cent + span / 2)},
 }
+for _dev in DEVICES.values():
+    # Mock: genau eine Instanz wie ein echtes Gerät – Einstellungen (FREQ, SWE:POIN)
+    # aus einem Request müssen im nächsten sichtbar sein
+    _mock = isinstance(_dev["factory"], type) and issubclass(_dev["factory"], MockDevice)
+    _dev["pool"] = SessionPool(_dev["factory"], size=1 if _mock else POOL_SIZE)
 
 INDEX_HTML = """<!doctype html>
 <html lang="de">
@@ -515,6 +654,7 @@ INDEX_HTML = """<!doctype html>
           ":SENS:FREQ:START?",
           ":SENS:FREQ:STOP?",
           ":SENS:SWE:POIN?",
+          ":FORM?",
           ":CALC1:DATA? S11",
           ":CALC1:DATA? S21",
           ":SYST:ERR?",
@@ -598,9 +738,38 @@ INDEX_HTML = """<!doctype html>
       async function runWorkflow() {
         const sweepCmd =
           currentDevice === "vna" ? ":CALC1:DATA? S11" : ":TRAC:DATA? TRACE1";
-        log("// Starte Sweep-Messung...", "cmd");
-        document.getElementById("scpiCmd").value = sweepCmd;
-        await sendSCPI();
+        log("// Starte Sweep-Messung (FORM REAL,32)...", "cmd");
+        log(">> " + sweepCmd, "cmd");
+        const res = await fetch(
+          "/hw/trace?device=" + currentDevice +
+            "&command=" + encodeURIComponent(sweepCmd),
+        );
+        if (!res.ok) {
+          const err = await res.json();
+          log("ERR: " + err.error, "err");
+          return;
+        }
+        const values = new Float32Array(await res.arrayBuffer());
+        const n = values.length;
+        const f0 = parseFloat(res.headers.get("X-Freq-Start"));
+        const f1 = parseFloat(res.headers.get("X-Freq-Stop"));
+        const freqs = Array.from(
+          { length: n },
+          (_, i) => f0 + ((f1 - f0) * i) / Math.max(n - 1, 1),
+        );
+        log("<< [Binärblock: " + n + " Punkte, " + n * 4 + " Bytes]", "resp");
+        if (currentDevice === "vna") {
+          plotSParams({
+            param: "S11",
+            freqs_ghz: freqs.map((f) => f / 1e9),
+            values_db: Array.from(values),
+          });
+        } else {
+          plotSpectrum({
+            freqs_mhz: freqs.map((f) => f / 1e6),
+            power_dbm: Array.from(values),
+          });
+        }
       }
 
       function plotSParams(d) {
@@ -783,9 +952,16 @@ INDEX_HTML = """<!doctype html>
 </html>
 """
 
+INDEX_PAGE = precompile(INDEX_HTML)
+
 @hw_bp.route("/")
+@immutable
 def index():
-    return render_template_string(INDEX_HTML)
+    return INDEX_PAGE.render()
+
+# Text-Endpunkte liefern JSON: ein umgestelltes Datenformat (REAL,32) bliebe auf der
+# gepoolten Session stehen und machte jede weitere Trace-Abfrage binär
+FORM_ERROR = "FORM nur lesend (FORM?); Binärtransfer über /hw/trace"
 
 @hw_bp.route("/scpi", methods=["POST"])
 def scpi():
@@ -796,12 +972,101 @@ def scpi():
     command = data.get("command", "*IDN?")
     if dev_key not in DEVICES:
         return jsonify({"error": f"Unbekanntes Gerät: {dev_key}"}), 400
+    if not isinstance(command, str) or sets_form(command):
+        return jsonify({"error": FORM_ERROR}), 400
+    try:
+        timeout = parse_timeout(data.get("timeout"))
+    except (TypeError, ValueError):
+        return jsonify({"error": f"timeout muss eine Zahl sein ({MIN_TIMEOUT:g}–{MAX_TIMEOUT:g} s)"}), 400
     try:
-        result = DEVICES[dev_key]["instance"].query(command)
+        pool   = DEVICES[dev_key]["pool"]
+        result = execute(pool, lambda s: s.query(command), timeout)
         return jsonify({"device": dev_key, "command": command, "response": result})
+    except SessionTimeout as e:
+        return jsonify({"error": str(e)}), 504
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@hw_bp.route("/scpi_batch", methods=["POST"])
+def scpi_batch():
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "Kein Request-Body"}), 400
+    dev_key  = data.get("device", "vna")
+    commands = data.get("commands")
+    if dev_key not in DEVICES:
+        return jsonify({"error": f"Unbekanntes Gerät: {dev_key}"}), 400
+    if not isinstance(commands, list) or not commands \
+            or not all(isinstance(c, str) and c.strip() for c in commands):
+        return jsonify({"error": "commands muss eine Liste von SCPI-Befehlen sein"}), 400
+    if len(commands) > MAX_BATCH:
+        return jsonify({"error": f"Maximal {MAX_BATCH} Befehle pro Batch"}), 400
+    if any(sets_form(c) for c in commands):
+        return jsonify({"error": FORM_ERROR}), 400
+    try:
+        timeout = parse_timeout(data.get("timeout"))
+    except (TypeError, ValueError):
+        return jsonify({"error": f"timeout muss eine Zahl sein ({MIN_TIMEOUT:g}–{MAX_TIMEOUT:g} s)"}), 400
+    try:
+        pool    = DEVICES[dev_key]["pool"]
+        results = execute(pool, lambda s: s.batch(commands), timeout)
+        return jsonify({"device": dev_key, "n_commands": len(commands),
+                        "results": [{"command": c, "response": r}
+                                    for c, r in zip(commands, results)]})
+    except SessionTimeout as e:
+        return jsonify({"error": str(e)}), 504
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def read_trace(session, dev, trace_cmd):
+    """Achse + Trace in einer Session lesen; Trace als REAL,32-Binärblock"""
+    axis = session.batch(dev["axis_cmds"])
+    f_start, f_stop = dev["axis"](*(float(v) for v in axis))
+    session.query("FORM REAL,32")
+    try:
+        values = session.query_binary(trace_cmd)
+    finally:
+        session.query("FORM ASC")
+    return f_start, f_stop, values
+
+@hw_bp.route("/trace")
+def trace():
+    """Trace als rohe float32-Daten (little endian) – Frequenzachse in den Headern"""
+    dev_key = request.args.get("device", "vna")
+    if dev_key not in DEVICES:
+        return jsonify({"error": f"Unbekanntes Gerät: {dev_key}"}), 400
+    dev       = DEVICES[dev_key]
+    # Nur Trace-Queries des Geräts: ein GET darf keine Einstellungen ändern
+    trace_cmd = " ".join(request.args.get("command", dev["trace_cmd"]).upper().split())
+    if not dev["trace_re"].fullmatch(trace_cmd):
+        return jsonify({"error": f"Kein Trace-Befehl für {dev_key}: {trace_cmd} "
+                                 f"(z.B. {dev['trace_cmd']})"}), 400
+    try:
+        timeout = parse_timeout(request.args.get("timeout"))
+    except (TypeError, ValueError):
+        return jsonify({"error": f"timeout muss eine Zahl sein ({MIN_TIMEOUT:g}–{MAX_TIMEOUT:g} s)"}), 400
+    try:
+        f_start, f_stop, values = execute(
+            dev["pool"], lambda s: read_trace(s, dev, trace_cmd), timeout)
+    except SessionTimeout as e:
+        return jsonify({"error": str(e)}), 504
+    except BlockError as e:
+        return jsonify({"error": f"Antwort auf {trace_cmd}: {e}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    return Response(values.tobytes(), mimetype="application/octet-stream", headers={
+        "X-Trace-Points": str(len(values)),
+        "X-Trace-Format": "REAL,32",
+        "X-Freq-Start":   repr(f_start),
+        "X-Freq-Stop":    repr(f_stop),
+        "X-Command":      trace_cmd,
+    })
+
 @hw_bp.route("/devices")
+@immutable
 def devices():
     return jsonify([{"key": k, "label": v["label"]} for k, v in DEVICES.items()])
+
+@hw_bp.route("/sessions")
+def sessions():
+    return jsonify({k: v["pool"].stats() for k, v in DEVICES.items()})
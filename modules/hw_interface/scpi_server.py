@@ -0,0 +1,116 @@
+"""
+Modul 6: SCPI-TCP-Server-Emulator
+Stellt RnS_VNA_Mock und RnS_FSW_Mock über Raw-Socket bereit (wie R&S-Geräte
+auf Port 5025), damit Testautomatisierung und der Dashboard-SCPI-Client gegen
+einen echten Socket laufen können.
+
+Start:
+    python -m modules.hw_interface.scpi_server --host 127.0.0.1
+    HW_VNA_ADDR=socket://127.0.0.1:5025 HW_FSW_ADDR=socket://127.0.0.1:5026 python main.py
+"""
+import argparse, asyncio, threading
+from modules.hw_interface.app import RnS_VNA_Mock, RnS_FSW_Mock
+
+MOCKS = {"vna": RnS_VNA_Mock, "fsw": RnS_FSW_Mock}
+DEFAULT_PORTS = {"vna": 5025, "fsw": 5026}
+
+# Listenwerte der ASCII-Traces (Mocks liefern dicts für das Web-UI)
+TRACE_KEYS = ("values_db", "power_dbm")
+
+
+def split_program(msg):
+    """Programmnachricht an ';' außerhalb von Anführungszeichen trennen"""
+    parts, current, quote = [], [], None
+    for ch in msg:
+        if quote:
+            quote = None if ch == quote else quote
+        elif ch in "'\"":
+            quote = ch
+        elif ch == ";":
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(ch)
+    parts.append("".join(current).strip())
+    return [p for p in parts if p]
+
+
+def format_response(resp):
+    """Mock-Antwort in SCPI-Wire-Format (bytes) umwandeln"""
+    if isinstance(resp, (bytes, bytearray)):
+        return bytes(resp)
+    if isinstance(resp, dict):
+        values = next(resp[k] for k in TRACE_KEYS if k in resp)
+        return ",".join(f"{v:.6g}" for v in values).encode("ascii")
+    return str(resp).encode("ascii", errors="replace")
+
+
+class ScpiServer:
+    """Ein Gerät pro Port; alle Verbindungen teilen sich den Gerätezustand.
+    Befehle laufen in einem Worker-Thread (große ASCII-Traces blockieren sonst
+    die Event-Loop für alle Verbindungen), eine Programmnachricht nach der
+    anderen unter self.lock – wie am echten Gerät."""
+    def __init__(self, dev_key):
+        self.dev_key = dev_key
+        self.device = MOCKS[dev_key]()
+        self.lock = threading.Lock()
+        self.n_clients = 0
+        self.n_commands = 0
+
+    def execute(self, msg):
+        replies = []
+        with self.lock:
+            for cmd in split_program(msg):
+                if not cmd.startswith((":", "*")):
+                    cmd = ":" + cmd
+                self.n_commands += 1
+                resp = self.device.query(cmd)
+                # Nur Queries antworten – wie am echten Gerät
+                if "?" in cmd:
+                    replies.append(format_response(resp))
+        return b";".join(replies) + b"\n" if replies else b""
+
+    async def handle(self, reader, writer):
+        self.n_clients += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                msg = line.decode("ascii", errors="replace").strip()
+                if not msg:
+                    continue
+                reply = await asyncio.to_thread(self.execute, msg)
+                if reply:
+                    writer.write(reply)
+                    await writer.drain()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            self.n_clients -= 1
+            writer.close()
+
+
+async def serve(host, ports):
+    servers = []
+    for dev_key, port in ports.items():
+        srv = await asyncio.start_server(ScpiServer(dev_key).handle, host, port)
+        servers.append(srv)
+        print(f"📡 {MOCKS[dev_key].model} auf {host}:{port}")
+    await asyncio.gather(*(s.serve_forever() for s in servers))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="SCPI-Raw-Socket-Emulator für die R&S-Mocks")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--vna-port", type=int, default=DEFAULT_PORTS["vna"])
+    ap.add_argument("--fsw-port", type=int, default=DEFAULT_PORTS["fsw"])
+    args = ap.parse_args()
+    try:
+        asyncio.run(serve(args.host, {"vna": args.vna_port, "fsw": args.fsw_port}))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
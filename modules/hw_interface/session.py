@@ -0,0 +1,295 @@
+"""
+Modul 6: Geräte-Session-Layer
+Pool persistenter Instrument-Sessions pro Gerät (Mock, PyVISA oder Raw-Socket),
+Befehle werden pro Session serialisiert und mit Timeout ausgeführt.
+"""
+import queue, socket, threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import numpy as np
+
+
+class SessionTimeout(Exception):
+    """Gerät/Session hat nicht innerhalb des Timeouts geantwortet"""
+
+
+class BlockError(ValueError):
+    """Antwort ist kein (vollständiger) Definite-Length-Block"""
+
+
+# ── SCPI-Programmnachrichten ──────────────────────────────────────────────────
+MAX_PROGRAM_LEN = 1024   # Zeichen pro Programmnachricht (Eingangspuffer der Geräte)
+
+def build_programs(cmds, max_len=MAX_PROGRAM_LEN):
+    """Befehle zu ';'-verketteten Programmnachrichten zusammenfassen.
+    Jeder Befehl wird mit ':' bzw. '*' absolut adressiert, damit der
+    Header-Pfad des Vorgängers keine Rolle spielt."""
+    programs, current = [], []
+    for cmd in cmds:
+        cmd = cmd.strip()
+        if not cmd.startswith((":", "*")):
+            cmd = ":" + cmd
+        if current and len(";".join(current + [cmd])) > max_len:
+            programs.append(current)
+            current = []
+        current.append(cmd)
+    if current:
+        programs.append(current)
+    return programs
+
+def split_responses(reply, cmds):
+    """Antwort einer Programmnachricht den Einzelbefehlen zuordnen
+    (nur Queries liefern einen ';'-getrennten Antwortteil)"""
+    n_queries = sum(1 for c in cmds if "?" in c)
+    parts = reply.split(";") if n_queries else []
+    if len(parts) != n_queries:
+        raise ValueError(f"{n_queries} Antworten erwartet, {len(parts)} erhalten")
+    it = iter(parts)
+    return [next(it) if "?" in c else "" for c in cmds]
+
+
+# ── IEEE 488.2 Binärblöcke (FORM REAL,32) ─────────────────────────────────────
+TRACE_DTYPE = np.dtype("<f4")   # R&S-Default: FORM REAL,32 mit FORM:BORD SWAP
+
+def encode_block(values, dtype=TRACE_DTYPE):
+    """Array als Definite-Length-Block '#<n><len><data>' kodieren"""
+    payload = np.ascontiguousarray(values, dtype=dtype).tobytes()
+    length  = str(len(payload))
+    return b"#" + str(len(length)).encode() + length.encode() + payload
+
+def block_header_len(buf):
+    """Länge des Headers '#<n><len>' und der Nutzdaten eines Blocks"""
+    if buf[:1] != b"#" or not buf[1:2].isdigit():
+        raise BlockError("Kein IEEE-488.2-Block (fehlendes '#')")
+    n = int(buf[1:2])
+    if n == 0:
+        raise BlockError("Indefinite-Length-Blöcke (#0) werden nicht unterstützt")
+    if not buf[2:2 + n].isdigit() or len(buf) < 2 + n:
+        raise BlockError("Ungültiger Block-Header")
+    return 2 + n, int(buf[2:2 + n])
+
+def decode_block(buf, dtype=TRACE_DTYPE):
+    """Block ohne Kopie als NumPy-Array interpretieren (np.frombuffer)"""
+    if not isinstance(buf, (bytes, bytearray, memoryview)):
+        raise BlockError("Antwort ist kein Binärblock (Text-Antwort)")
+    offset, length = block_header_len(bytes(buf[:12]))
+    if len(buf) < offset + length:
+        raise BlockError(f"Block unvollständig: {len(buf) - offset} von {length} Bytes")
+    return np.frombuffer(buf, dtype=dtype, count=length // dtype.itemsize, offset=offset)
+
+
+# ── Transport-Backends ────────────────────────────────────────────────────────
+class RawSocketInstrument:
+    """SCPI über Raw-Socket (R&S-Geräte: TCP-Port 5025, Zeilenende \\n)"""
+    supports_program = True
+
+    def __init__(self, host, port=5025, timeout=5.0):
+        self.host, self.port, self.timeout = host, port, timeout
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.rfile = self.sock.makefile("rb")
+
+    def write(self, cmd):
+        self.sock.sendall(cmd.strip().encode("ascii") + b"\n")
+
+    def read(self):
+        line = self.rfile.readline()
+        if not line:
+            raise ConnectionError(f"Verbindung zu {self.host}:{self.port} geschlossen")
+        return line.decode("ascii", errors="replace").rstrip("\r\n")
+
+    def query(self, cmd):
+        self.write(cmd)
+        if "?" not in cmd:
+            return ""
+        return self.read()
+
+    def query_binary(self, cmd):
+        """Binärblock lesen: Header, dann exakt <len> Bytes direkt in den Puffer"""
+        self.write(cmd)
+        head = self.rfile.read(2)
+        n    = int(head[1:2]) if head[:1] == b"#" else 0
+        if not n:
+            raise ValueError(f"Keine Binärantwort auf {cmd!r}: {head!r}")
+        digits = self.rfile.read(n)
+        buf    = bytearray(2 + n + int(digits))
+        buf[:2 + n] = head + digits
+        view = memoryview(buf)[2 + n:]
+        while view:
+            got = self.rfile.readinto(view)
+            if not got:
+                raise ConnectionError(f"Verbindung zu {self.host}:{self.port} geschlossen")
+            view = view[got:]
+        self.rfile.readline()   # abschließendes \n
+        return buf
+
+    def close(self):
+        try:
+            self.rfile.close()
+        finally:
+            self.sock.close()
+
+
+class VisaInstrument:
+    """SCPI über PyVISA (optional installiert – Import erst beim Öffnen)"""
+    supports_program = True
+
+    def __init__(self, resource, timeout=5.0):
+        import pyvisa
+        self.resource = resource
+        self.inst = pyvisa.ResourceManager().open_resource(resource)
+        self.inst.timeout = int(timeout * 1000)
+        self.inst.read_termination = "\n"
+        self.inst.write_termination = "\n"
+
+    def query(self, cmd):
+        if "?" not in cmd:
+            self.inst.write(cmd)
+            return ""
+        return self.inst.query(cmd).rstrip("\r\n")
+
+    def query_binary(self, cmd):
+        # read_bytes liest exakt n Bytes – ein \n in den Nutzdaten bricht nicht ab
+        self.inst.write(cmd)
+        head   = self.inst.read_bytes(2)
+        digits = self.inst.read_bytes(int(head[1:2]))
+        data   = self.inst.read_bytes(int(digits))
+        self.inst.read_bytes(1)
+        return head + digits + data
+
+    def close(self):
+        self.inst.close()
+
+
+# ── Session + Pool ────────────────────────────────────────────────────────────
+class DeviceSession:
+    """Eine persistente Verbindung zu einem Gerät, Befehle strikt seriell"""
+    def __init__(self, instrument):
+        self.instrument = instrument
+        self.lock = threading.Lock()
+        self.n_queries = 0
+
+    def query(self, cmd):
+        with self.lock:
+            self.n_queries += 1
+            return self.instrument.query(cmd)
+
+    def batch(self, cmds):
+        """Mehrere Befehle ohne Unterbrechung durch andere Clients ausführen.
+        Text-Transporte erhalten ';'-verkettete Programmnachrichten (ein
+        Roundtrip pro Nachricht), Mock-Objekte werden gepipelined."""
+        with self.lock:
+            self.n_queries += len(cmds)
+            if not getattr(self.instrument, "supports_program", False):
+                return [self.instrument.query(c) for c in cmds]
+            results = []
+            for prog in build_programs(cmds):
+                reply = self.instrument.query(";".join(prog))
+                results.extend(split_responses(reply, prog))
+            return results
+
+    def query_binary(self, cmd, dtype=TRACE_DTYPE):
+        """Binärblock-Query (vorher FORM REAL,32 setzen), Ergebnis als Array"""
+        with self.lock:
+            self.n_queries += 1
+            read = getattr(self.instrument, "query_binary", self.instrument.query)
+            return decode_block(read(cmd), dtype)
+
+    def close(self):
+        close = getattr(self.instrument, "close", None)
+        if close:
+            close()
+
+
+class SessionPool:
+    """Hält bis zu `size` Sessions pro Gerät, öffnet sie erst bei Bedarf"""
+    def __init__(self, factory, size=2):
+        self.factory = factory
+        self.size = size
+        self.idle = queue.LifoQueue()
+        self.n_open = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout=5.0):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if self.n_open < self.size:
+                self.n_open += 1
+                try:
+                    return DeviceSession(self.factory())
+                except Exception:
+                    self.n_open -= 1
+                    raise
+        try:
+            return self.idle.get(timeout=timeout)
+        except queue.Empty:
+            raise SessionTimeout(f"Keine freie Session nach {timeout:.1f} s")
+
+    def release(self, session, broken=False):
+        if broken:
+            # Kaputte Verbindung verwerfen, Slot wieder freigeben
+            with self.lock:
+                self.n_open -= 1
+            try:
+                session.close()
+            except Exception:
+                pass
+            return
+        self.idle.put(session)
+
+    def run(self, fn, timeout=5.0, abandoned=None):
+        """Führt fn(session) mit exklusiv geliehener Session aus. Hat der Aufrufer
+        nach einem Timeout aufgegeben (abandoned gesetzt), wird die Session danach
+        verworfen – ihr Zustand (halb gelesene Antwort, Gerätestatus) ist unklar."""
+        session = self.acquire(timeout)
+        broken = False
+        try:
+            return fn(session)
+        except (OSError, ConnectionError):
+            broken = True
+            raise
+        finally:
+            self.release(session, broken=broken or (abandoned is not None and abandoned.is_set()))
+
+    def query(self, cmd, timeout=5.0):
+        return self.run(lambda s: s.query(cmd), timeout)
+
+    def batch(self, cmds, timeout=5.0):
+        return self.run(lambda s: s.batch(cmds), timeout)
+
+    def stats(self):
+        return {"size": self.size, "open": self.n_open, "idle": self.idle.qsize()}
+
+    def close(self):
+        while True:
+            try:
+                s = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            s.close()
+            with self.lock:
+                self.n_open -= 1
+
+
+# ── Asynchroner Executor ──────────────────────────────────────────────────────
+# Gerätezugriffe laufen in einem eigenen Thread-Pool; der Request-Thread wartet
+# höchstens `timeout` Sekunden und ist danach wieder frei.
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="scpi")
+
+def submit(pool, fn, timeout=5.0, abandoned=None):
+    """fn(session) im Executor ausführen; Future zurückgeben"""
+    return _executor.submit(pool.run, fn, timeout, abandoned)
+
+def execute(pool, fn, timeout=5.0):
+    """fn(session) im Executor ausführen und auf das Ergebnis warten.
+    Nach dem Timeout läuft ein bereits gestarteter Aufruf weiter (cancel() hält
+    ihn nicht an); seine Session kommt dann nicht zurück in den Pool."""
+    abandoned = threading.Event()
+    future = submit(pool, fn, timeout, abandoned)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        abandoned.set()
+        future.cancel()
+        raise SessionTimeout(f"Gerät hat nicht innerhalb von {timeout:.1f} s geantwortet")
@@ -0,0 +1,109 @@
+"""
+Lazy-Loading schwerer Abhängigkeiten (scipy)
+Blueprints werden sofort registriert; scipy wird erst beim ersten Request auf ein
+Modul importiert, das es braucht. sklearn und cryptography importieren die Module
+ohnehin erst in ihren Funktionen. Für fork-basierte Server kann preload() alles
+einmal im Master laden (Copy-on-Write für alle Worker).
+
+Import-Zeit-Report (jedes Modul in frischem Interpreter):
+    python -m modules.lazy
+"""
+import importlib, json, subprocess, sys, threading
+from flask import request
+
+# Blueprint-Name → schwere Module, die seine Routen brauchen
+HEAVY_DEPS = {
+    "spectrum":   ["scipy.fft"],
+    "signal":     ["scipy.fft"],
+    "ai_anomaly": ["scipy.fft"],
+}
+# Nur für preload(): importieren sich sonst selbst in den Funktionen
+PRELOAD_EXTRA = ["sklearn.ensemble", "cryptography.hazmat.primitives.asymmetric.rsa"]
+
+_pending = set(HEAVY_DEPS)
+_lock = threading.Lock()
+_import_lock = threading.Lock()
+
+
+class _LazyModule:
+    """Modul-Proxy; der Import läuft beim ersten Attributzugriff unter einem Lock
+    (importlib.util.LazyLoader ist unter dem Threading-Server nicht threadsicher)"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            with _import_lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+            module = self._module
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r}{'' if self._module else ' (nicht geladen)'}>"
+
+
+def lazy_import(name):
+    """Modul-Proxy: der eigentliche Import passiert beim ersten Attributzugriff"""
+    return sys.modules.get(name) or _LazyModule(name)
+
+
+def load_deps(bp_name):
+    """Schwere Abhängigkeiten eines Blueprints einmalig importieren"""
+    if bp_name not in _pending:
+        return
+    with _lock:
+        if bp_name in _pending:
+            for mod in HEAVY_DEPS[bp_name]:
+                importlib.import_module(mod)
+            _pending.discard(bp_name)
+
+
+def preload():
+    """Alles sofort laden (z.B. im gunicorn-Master vor dem Fork)"""
+    for bp_name in list(_pending):
+        load_deps(bp_name)
+    for mod in PRELOAD_EXTRA:
+        importlib.import_module(mod)
+
+
+def init_app(app):
+    @app.before_request
+    def _load_blueprint_deps():
+        if request.blueprint not in _pending:
+            return
+        # Statische Seiten (@immutable, auch warm_cache beim Start) brauchen nichts davon
+        view = app.view_functions.get(request.endpoint)
+        if not getattr(view, "immutable", False):
+            load_deps(request.blueprint)
+
+
+# ── Import-Zeit-Report ────────────────────────────────────────────────────────
+APP_MODULES = [
+    "modules.spectrum_viewer.app", "modules.signal_analysis.app", "modules.ai_anomaly.app",
+    "modules.protocol_decoder.app", "modules.security_checker.app", "modules.hw_interface.app",
+    "modules.realtime_stream.app", "modules.avionics_bands.app",
+]
+
+def measure_import(name):
+    """Importzeit (ms) von name in einem frischen Interpreter"""
+    code = ("import time; t = time.perf_counter(); import " + name +
+            "; print((time.perf_counter() - t) * 1000)")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return round(float(out.stdout.strip().splitlines()[-1]), 1)
+
+def import_report():
+    deps = sorted({m for mods in HEAVY_DEPS.values() for m in mods} | set(PRELOAD_EXTRA))
+    return {
+        "baseline": {m: measure_import(m) for m in ("numpy", "flask", "flask_socketio")},
+        "modules":  {m: measure_import(m) for m in APP_MODULES},
+        "deferred": {m: measure_import(m) for m in deps},
+        "main":     measure_import("main"),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(import_report(), indent=2))
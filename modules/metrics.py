@@ -0,0 +1,178 @@
+"""
+Metriken: Latenz, Durchsatz, Payload- und FFT-Größen, Fehler
+Flask before/after-Hooks und Socket.IO-Wrapper messen jede Route bzw. jedes
+Event; timed() misst Spans in den Rechenfunktionen. Ausgabe unter /metrics
+im Prometheus-Textformat (pro Prozess, jede Instanz wird einzeln gescrapt).
+"""
+import bisect, functools, json, threading, time
+from flask import g, request
+from modules.response_cache import WARMUP_KEY
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS   = tuple(2 ** k for k in range(6, 25, 2))   # 64 B … 16 MiB
+FFT_BUCKETS     = tuple(2 ** k for k in range(6, 21))      # 64 … 1M Punkte
+
+
+class Family:
+    """Eine Metrik mit beliebig vielen Label-Kombinationen"""
+    def __init__(self, name, kind, help_text, labels, buckets=None):
+        self.name, self.kind, self.help = name, kind, help_text
+        self.labels, self.buckets = labels, buckets
+        self.series = {}          # Label-Werte → [bucket counts…, sum, count] bzw. [value]
+
+    def observe(self, value, key):
+        s = self.series.get(key)
+        if s is None:
+            s = self.series[key] = [0] * (len(self.buckets) + 2)
+        i = bisect.bisect_left(self.buckets, value)   # le ist inklusiv
+        if i < len(self.buckets):
+            s[i] += 1
+        s[-2] += value
+        s[-1] += 1
+
+    def inc(self, value, key):
+        s = self.series.setdefault(key, [0])
+        s[0] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, s in sorted(self.series.items()):
+            lbl = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, key))
+            if self.kind == "counter":
+                lines.append(f"{self.name}{{{lbl}}} {s[0]}")
+                continue
+            sep = "," if lbl else ""
+            cum = 0
+            for le, n in zip(self.buckets, s):
+                cum += n
+                lines.append(f'{self.name}_bucket{{{lbl}{sep}le="{le}"}} {cum}')
+            lines.append(f'{self.name}_bucket{{{lbl}{sep}le="+Inf"}} {s[-1]}')
+            lines.append(f"{self.name}_sum{{{lbl}}} {s[-2]:.6g}")
+            lines.append(f"{self.name}_count{{{lbl}}} {s[-1]}")
+        return lines
+
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_lock = threading.Lock()
+FAMILIES = {f.name: f for f in (
+    Family("sdr_http_request_duration_seconds", "histogram", "Latenz je Route",
+           ("route", "method"), LATENCY_BUCKETS),
+    Family("sdr_http_requests_total", "counter", "Requests je Route und Status",
+           ("route", "method", "status")),
+    Family("sdr_http_request_bytes", "histogram", "Request-Body-Größe je Route",
+           ("route",), BYTES_BUCKETS),
+    Family("sdr_http_response_bytes", "histogram", "Antwortgröße je Route",
+           ("route",), BYTES_BUCKETS),
+    Family("sdr_http_errors_total", "counter", "Antworten mit Status >= 400",
+           ("route", "status")),
+    Family("sdr_socketio_event_duration_seconds", "histogram", "Latenz je Socket.IO-Event",
+           ("namespace", "event"), LATENCY_BUCKETS),
+    Family("sdr_socketio_event_bytes", "histogram", "Payload-Größe je Socket.IO-Event",
+           ("namespace", "event"), BYTES_BUCKETS),
+    Family("sdr_socketio_errors_total", "counter", "Exceptions in Socket.IO-Handlern",
+           ("namespace", "event")),
+    Family("sdr_span_duration_seconds", "histogram", "Laufzeit der Rechenfunktionen",
+           ("span",), LATENCY_BUCKETS),
+    Family("sdr_span_errors_total", "counter", "Exceptions in Rechenfunktionen",
+           ("span",)),
+    Family("sdr_fft_size", "histogram", "FFT-Länge je Aufruf",
+           ("span",), FFT_BUCKETS),
+)}
+
+
+def observe(name, value, *labels):
+    with _lock:
+        FAMILIES[name].observe(value, labels)
+
+def inc(name, *labels, value=1):
+    with _lock:
+        FAMILIES[name].inc(value, labels)
+
+
+def timed(span):
+    """Decorator: Laufzeit (und Exceptions) einer Funktion als Span erfassen"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                inc("sdr_span_errors_total", span)
+                raise
+            finally:
+                observe("sdr_span_duration_seconds", time.perf_counter() - t0, span)
+        return wrapper
+    return decorator
+
+
+def render():
+    with _lock:
+        lines = [line for f in FAMILIES.values() for line in f.render()]
+    return "\n".join(lines) + "\n"
+
+
+# ── Flask ─────────────────────────────────────────────────────────────────────
+def _route():
+    # Regel statt Pfad, damit Labels nicht pro URL explodieren
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+def init_app(app):
+    @app.before_request
+    def _start_timer():
+        if not request.environ.get(WARMUP_KEY):
+            g.metrics_t0 = time.perf_counter()
+
+    @app.after_request
+    def _record(response):
+        t0 = g.pop("metrics_t0", None)
+        if t0 is None:
+            return response
+        route, status = _route(), response.status_code
+        observe("sdr_http_request_duration_seconds", time.perf_counter() - t0, route, request.method)
+        inc("sdr_http_requests_total", route, request.method, str(status))
+        if request.content_length:
+            observe("sdr_http_request_bytes", request.content_length, route)
+        if response.content_length is not None:
+            observe("sdr_http_response_bytes", response.content_length, route)
+        if status >= 400:
+            inc("sdr_http_errors_total", route, str(status))
+        return response
+
+
+# ── Socket.IO ─────────────────────────────────────────────────────────────────
+def _payload_bytes(args):
+    try:
+        return len(json.dumps(args, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+def init_socketio(sio):
+    """sio.on so umhüllen, dass alle danach registrierten Handler gemessen werden"""
+    register = sio.on
+
+    def on(event, namespace=None):
+        ns = namespace or "/"
+        def decorator(handler):
+            @functools.wraps(handler)
+            def timed_handler(*args):
+                t0 = time.perf_counter()
+                observe("sdr_socketio_event_bytes", _payload_bytes(args), ns, event)
+                try:
+                    return handler(*args)
+                except Exception:
+                    inc("sdr_socketio_errors_total", ns, event)
+                    raise
+                finally:
+                    observe("sdr_socketio_event_duration_seconds",
+                            time.perf_counter() - t0, ns, event)
+            register(event, namespace)(timed_handler)
+            return handler
+        return decorator
+
+    sio.on = on
@@ -0,0 +1,114 @@
+"""
+Peak-Suche und Marker-Tabelle (wie FSW: Peak Search, Next Peak, Marker Table)
+Kandidaten per scipy.signal.find_peaks (lokale Maxima mit Mindestpegel und
+Mindestabstand), daraus die höchsten per np.argpartition – O(Bins) statt
+Sortieren des ganzen Spektrums. Die Prominenz (Peak-Excursion) wird nur für
+diese Kandidaten bestimmt, bei Bedarf in weiteren Runden für die nächsthöheren;
+im Rauschen liegen sonst Hunderttausende lokale Maxima. Die Prominenz ist lokal
+(±PROMINENCE_WINDOW/2 Bins), sonst liefe die Suche für die höchsten Peaks über
+das ganze Spektrum. Schnell genug für jeden Frame im Echtzeit-Stream.
+
+Frequenz und Pegel jedes Peaks werden über eine Parabel durch den Bin und
+seine Nachbarn (in dB) interpoliert – für alle Peaks in einem Vektorschritt.
+Frequenzen bleiben in der Einheit der Eingabe (Hz im Spektrum-Viewer, kHz im
+Stream und in der Signalanalyse).
+"""
+import numpy as np
+from modules import dsp
+
+N_MARKERS, MAX_MARKERS = 5, 64
+PROMINENCE_WINDOW = 1 << 16     # Bins, in denen die Prominenz eines Peaks bestimmt wird
+
+
+def interpolate(power_db, idx):
+    """Parabolische Interpolation an den Bins idx → (Bin-Versatz −0.5…0.5, Pegel dB).
+    Randbins und Bins, deren Scheitel bei oder außerhalb ±0.5 läge (Plateau, flache
+    Parabel), behalten den Bin-Pegel."""
+    y   = np.asarray(power_db, dtype=np.float64)
+    idx = np.asarray(idx, dtype=np.intp)
+    off = np.zeros(len(idx))
+    lvl = y[idx].copy()
+    inner = (idx > 0) & (idx < len(y) - 1)
+    i = idx[inner]
+    a, b, c = y[i - 1], y[i], y[i + 1]
+    den = a - 2 * b + c
+    p = np.where(den < 0, 0.5 * (a - c) / np.where(den < 0, den, 1.0), 0.0)
+    clipped = np.abs(p) >= 0.5
+    off[inner] = np.clip(p, -0.5, 0.5)
+    lvl[inner] = np.where(clipped, b, b - 0.25 * (a - c) * p)
+    return off, lvl
+
+
+def _highest(y, cand, n, excursion_db):
+    """Die n höchsten Kandidaten mit Prominenz ≥ excursion_db; Prominenzen
+    rundenweise absteigend nach Pegel, Rundengröße 4·n und dann verdoppelt"""
+    found, proms = [], []
+    rest, k = cand, 2 * n
+    while len(rest) and sum(map(len, found)) < n:
+        k = min(len(rest), 2 * k)
+        top = np.argpartition(y[rest], -k)[-k:] if k < len(rest) else np.arange(len(rest))
+        batch = rest[top]
+        p = dsp.ssig.peak_prominences(y, batch, wlen=min(len(y), PROMINENCE_WINDOW) | 1)[0]
+        keep = p >= excursion_db
+        found.append(batch[keep])
+        proms.append(p[keep])
+        rest = np.delete(rest, top)
+    idx, prom = np.concatenate(found or [cand[:0]]), np.concatenate(proms or [np.zeros(0)])
+    if len(idx) > n:
+        top = np.argpartition(y[idx], -n)[-n:]
+        idx, prom = idx[top], prom[top]
+    return idx, prom
+
+
+def find_peaks(freqs, power_db, n=N_MARKERS, threshold_db=None, excursion_db=None,
+               min_separation=None):
+    """Die n höchsten Peaks, absteigend nach Pegel → dict mit Arrays
+    bin, freq, level_db (interpoliert) und prominence_db.
+    threshold_db: Mindestpegel, excursion_db: Mindestprominenz,
+    min_separation: Mindestabstand in der Einheit von freqs."""
+    freqs = np.asarray(freqs, dtype=np.float64)
+    y = np.asarray(power_db, dtype=np.float64)
+    df = freqs[1] - freqs[0] if len(freqs) > 1 else 1.0
+    distance = None
+    if min_separation:
+        distance = max(1, int(np.ceil(min_separation / abs(df))))
+    y_clean = np.nan_to_num(y, nan=-np.inf)
+    cand, _ = dsp.ssig.find_peaks(y_clean, height=threshold_db, distance=distance)
+    idx, prom = _highest(y_clean, cand, n, excursion_db or 0.0)
+    off, lvl = interpolate(y, idx)
+    order = np.argsort(lvl, kind="stable")[::-1]      # nach interpoliertem Pegel, wie angezeigt
+    idx, prom, off, lvl = idx[order], prom[order], off[order], lvl[order]
+    return {"bin": idx, "freq": freqs[idx] + off * df, "level_db": lvl, "prominence_db": prom}
+
+
+def marker_table(peaks, digits=3):
+    """Marker-Tabelle: M1 absolut, alle weiteren zusätzlich als Delta zu M1"""
+    freqs, levels = peaks["freq"].tolist(), peaks["level_db"].tolist()
+    rows = []
+    for k, (b, f, l, p) in enumerate(zip(peaks["bin"].tolist(), freqs, levels,
+                                         peaks["prominence_db"].tolist())):
+        row = {"marker": k + 1, "bin": b, "freq": round(f, digits),
+               "level_db": round(l, 2), "prominence_db": round(p, 2)}
+        if k:
+            row["delta_freq"] = round(f - freqs[0], digits)
+            row["delta_db"]   = round(l - levels[0], 2)
+        rows.append(row)
+    return rows
+
+
+def _optional(args, key):
+    value = args.get(key)
+    return float(value) if value not in (None, "") else None
+
+
+def peak_params(args):
+    """kwargs für find_peaks aus markers/marker_threshold/marker_excursion/
+    marker_separation; None ohne markers"""
+    if not args.get("markers"):
+        return None
+    n = int(args["markers"])
+    if not 1 <= n <= MAX_MARKERS:
+        raise ValueError(f"markers 1–{MAX_MARKERS}")
+    return {"n": n, "threshold_db": _optional(args, "marker_threshold"),
+            "excursion_db": _optional(args, "marker_excursion"),
+            "min_separation": _optional(args, "marker_separation")}
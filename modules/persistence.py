@@ -0,0 +1,96 @@
+"""
+Persistenz-Spektrum (Dichte): wie oft lag welcher Bin auf welchem Pegel?
+Ein vorab angelegtes Histogramm Pegel × Frequenz wird je Frame (oder Block
+von Frames) per np.bincount über den flachen Zellindex fortgeschrieben –
+Millionen Frames ohne sie zu speichern, Speicher O(Pegel × Bins).
+
+Ohne decay zählt ein uint32-Array Treffer; mit decay (0 < decay < 1) klingt
+jede Zelle je Frame um den Faktor (1 − decay) ab (float32, wie die
+Nachleuchtdauer am Analysator), seltene Störer verblassen dann wieder.
+
+Ausgabe als Dichte (Trefferanteil je Zelle) oder kompakt als uint8 mit
+logarithmischer Skala (0 = nie, 255 = in jedem Frame), base64-kodiert.
+"""
+import base64
+import numpy as np
+
+DB_MIN, DB_MAX, LEVELS = -120.0, 0.0, 120
+LOG_RANGE = 1e3        # uint8-Skala: Dichten 1/LOG_RANGE … 1 logarithmisch
+
+
+class PersistenceSpectrum:
+    def __init__(self, n_bins, db_min=DB_MIN, db_max=DB_MAX, levels=LEVELS, decay=None):
+        if not (np.isfinite(db_min) and np.isfinite(db_max) and db_min < db_max) or levels < 2:
+            raise ValueError("Persistenz: endliche db_min < db_max und mindestens 2 Pegelstufen")
+        if decay is not None and not 0 < decay < 1:
+            raise ValueError("decay muss zwischen 0 und 1 liegen")
+        self.n_bins, self.levels = n_bins, levels
+        self.db_min, self.db_max = float(db_min), float(db_max)
+        self.decay = decay
+        self.hist  = np.zeros((levels, n_bins), dtype=np.float32 if decay else np.uint32)
+        self._bin_idx = np.arange(n_bins)
+        self.reset()
+
+    def reset(self):
+        self.hist.fill(0)
+        self.n_frames = 0
+        self.weight   = 0.0          # Summe der Frame-Gewichte (= n_frames ohne decay)
+
+    @property
+    def levels_db(self):
+        """Untere Kante jeder Pegelstufe (dB)"""
+        step = (self.db_max - self.db_min) / self.levels
+        return self.db_min + step * np.arange(self.levels)
+
+    def update(self, frames_db):
+        """Ein Frame (n_bins) oder Block (n_frames × n_bins) in dB; Pegel außerhalb
+        des Bereichs landen in der untersten bzw. obersten Stufe"""
+        block = np.atleast_2d(frames_db)
+        m = len(block)
+        if m == 0:
+            return self
+        if block.shape[1] != self.n_bins:
+            raise ValueError(f"Frame hat {block.shape[1]} statt {self.n_bins} Bins")
+        # NaN/±inf (z.B. log10(0)) in die unterste bzw. oberste Stufe, vor dem Cast
+        block = np.nan_to_num(block, nan=self.db_min, neginf=self.db_min, posinf=self.db_max)
+        scale = self.levels / (self.db_max - self.db_min)
+        lvl = ((block - self.db_min) * scale).astype(np.intp)
+        np.clip(lvl, 0, self.levels - 1, out=lvl)
+        cell = (lvl * self.n_bins + self._bin_idx).ravel()
+        size = self.levels * self.n_bins
+        if self.decay:
+            # Frame i von m wird noch (m − 1 − i)-mal gedämpft
+            keep = 1.0 - self.decay
+            w = keep ** np.arange(m - 1, -1, -1)
+            self.hist *= keep ** m
+            self.hist += np.bincount(cell, np.repeat(w, self.n_bins), size).reshape(self.hist.shape)
+            self.weight = self.weight * keep ** m + w.sum()
+        else:
+            if m == 1:
+                self.hist[lvl[0], self._bin_idx] += 1        # je Bin genau ein Treffer
+            else:
+                np.add(self.hist.ravel(), np.bincount(cell, minlength=size),
+                       out=self.hist.ravel(), casting="unsafe")
+            self.weight += m
+        self.n_frames += m
+        return self
+
+    def density(self):
+        """Trefferanteil je Zelle (Pegel × Bins), Spaltensumme 1"""
+        return self.hist / max(self.weight, 1e-30)
+
+    def density_u8(self, density=None):
+        """Dichte logarithmisch auf 0..255 (0 nur für Zellen ohne Treffer)"""
+        d = self.density() if density is None else density
+        q = np.log10(np.maximum(d, 1.0 / LOG_RANGE) * LOG_RANGE) / np.log10(LOG_RANGE)
+        out = np.rint(1 + 254 * q).astype(np.uint8)
+        out[d <= 0] = 0
+        return out
+
+    def payload(self, density=None):
+        """Kompakte Heatmap: uint8-Zeilen (Pegel aufsteigend) base64 + Achsen"""
+        u8 = self.density_u8(density)
+        return {"levels_db": self.levels_db.tolist(),
+                "rows": u8.shape[0], "cols": u8.shape[1],
+                "density_u8": base64.b64encode(np.ascontiguousarray(u8).tobytes()).decode("ascii"),
+                "n_frames": self.n_frames, "decay": self.decay}
@@ -0,0 +1,100 @@
+"""
+Profiling einzelner Requests auf Anfrage (cProfile)
+Aktiv nur mit gesetztem PROFILE_TOKEN. Ein Request mit Header
+"X-Profile: 1" (oder ?_profile=1) und "X-Profile-Token: <token>" wird
+komplett profiliert; das Ergebnis liegt unter der Request-ID (Header
+X-Profile-Id der Antwort) und ist abrufbar unter
+    GET /_profile/<id>              – Textauswertung (nach cumulative time)
+    GET /_profile/<id>?format=prof  – pstats-Datei (snakeviz, pstats.Stats)
+(ebenfalls nur mit X-Profile-Token). Gemessen wird der Request-Thread; Arbeit
+im SCPI-Threadpool erscheint nur als Wartezeit.
+"""
+import cProfile, hmac, io, os, pstats, re, tempfile, uuid
+from flask import Response, abort, g, request, send_file
+
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN") or None
+PROFILE_DIR   = os.environ.get("PROFILE_DIR") or os.path.join(tempfile.gettempdir(), "sdr-profiles")
+PROFILE_KEEP  = int(os.environ.get("PROFILE_KEEP", 50))   # ältere Profile werden gelöscht
+TOP_N         = 40
+
+_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def _authorized():
+    token = request.headers.get("X-Profile-Token", "")
+    return PROFILE_TOKEN is not None and hmac.compare_digest(token, PROFILE_TOKEN)
+
+def _requested():
+    return request.headers.get("X-Profile") == "1" or request.args.get("_profile") == "1"
+
+def _request_id():
+    rid = request.headers.get("X-Request-ID", "")
+    return rid if _ID_RE.match(rid) else uuid.uuid4().hex
+
+def _path(profile_id):
+    return os.path.join(PROFILE_DIR, profile_id + ".prof")
+
+
+def report(stats_path, top=TOP_N):
+    out = io.StringIO()
+    pstats.Stats(stats_path, stream=out).sort_stats("cumulative").print_stats(top)
+    return out.getvalue()
+
+
+def _prune():
+    files = sorted((e for e in os.scandir(PROFILE_DIR) if e.name.endswith(".prof")),
+                   key=lambda e: e.stat().st_mtime)
+    for e in files[:-PROFILE_KEEP]:
+        try:
+            os.remove(e.path)
+        except OSError:
+            pass
+
+
+def init_app(app):
+    if PROFILE_TOKEN is None:
+        return
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+
+    @app.before_request
+    def _start_profile():
+        if not _requested() or request.endpoint == "profile_result":
+            return
+        if not _authorized():
+            abort(403)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:          # anderer Profiler im Prozess aktiv
+            return
+        g.profiler, g.profile_id = profiler, _request_id()
+
+    @app.after_request
+    def _stop_profile(response):
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        profile_id = g.pop("profile_id")
+        profiler.dump_stats(_path(profile_id))
+        _prune()
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+
+    @app.teardown_request
+    def _abort_profile(exc):
+        # Falls after_request nicht lief: Profiler nicht aktiv im Thread zurücklassen
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
+
+    @app.route("/_profile/<profile_id>", endpoint="profile_result")
+    def profile_result(profile_id):
+        if not _authorized():
+            abort(403)
+        if not _ID_RE.match(profile_id) or not os.path.exists(_path(profile_id)):
+            abort(404)
+        if request.args.get("format") == "prof":
+            return send_file(_path(profile_id), mimetype="application/octet-stream",
+                             as_attachment=True, download_name=profile_id + ".prof")
+        return Response(report(_path(profile_id)), mimetype="text/plain")
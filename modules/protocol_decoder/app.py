@@ -4,7 +4,10 @@ OSI Layer 2 (Ethernet), Layer 3 (IPv4), Layer 4 (TCP/UDP)
 Kein Scapy – reines Python struct-Parsing
 """
 import struct, binascii
-from flask import Blueprint, render_template_string, request, jsonify
+from flask import Blueprint, request, jsonify
+from modules.response_cache import immutable
+from modules.templating import precompile
+from modules import metrics
 
 proto_bp = Blueprint("proto", __name__)
 
@@ -93,6 +96,7 @@ def parse_udp(raw: bytes):
         "payload_bytes": max(0, length - 8),
     }
 
+@metrics.timed("decode_packet")
 def decode_packet(hex_str: str):
     hex_clean = hex_str.replace(" ", "").replace("\n", "").replace(":", "")
     try:
@@ -664,10 +668,12 @@ INDEX_HTML = """<!doctype html>
 </html>
 """
 
+INDEX_PAGE = precompile(INDEX_HTML)
+
 @proto_bp.route("/")
+@immutable
 def index():
-    from flask import render_template_string as rts
-    return rts(INDEX_HTML, demos=DEMO_PACKETS)
+    return INDEX_PAGE.render(demos=DEMO_PACKETS)
 
 @proto_bp.route("/decode", methods=["POST"])
 def decode():
@@ -3,10 +3,18 @@ Modul 7: Echtzeit-Signalstream
 Live-SDR-Spektrum via WebSocket – Aktualisierung alle 500ms
 """
 import numpy as np
-from flask import Blueprint, render_template_string
+from flask import Blueprint
+from modules.response_cache import immutable
+from modules.templating import precompile
+from modules import dsp
 from flask_socketio import SocketIO, emit
 import time
 import threading
+from modules.avionics_bands.occupancy import channel_plan, OccupancyScanner
+from modules.avionics_bands.annotate import parse_center_mhz
+from modules.traces import MODES as TRACE_MODES, TraceAccumulator
+from modules.persistence import PersistenceSpectrum
+from modules.peaks import MAX_MARKERS, find_peaks, marker_table
 
 realtime_bp = Blueprint("realtime", __name__)
 
@@ -27,6 +35,15 @@ class SignalGenerator:
         self.carrier_freq = 200e3  # 200 kHz
         self.noise_level = 0.2
         self.duration_per_frame = 0.01  # 10ms pro Frame
+        self.center_mhz = None  # Mittenfrequenz für Kanalbelegung (optional)
+        self.occupancy = None
+        self.trace_mode = "clear_write"  # Trace-Modus über alle Frames (modules/traces.py)
+        self.avg_count = None
+        self.trace = None
+        self.persist = False  # Persistenz-Spektrum über alle Frames, optional mit Abklingen
+        self.persist_decay = None
+        self.persistence = None
+        self.markers = 0  # Peak-Suche je Frame (Anzahl Marker, 0 = aus)
         
     def generate_frame(self):
         """Generiert ein Frame mit synthetischem Signal + FFT"""
@@ -41,25 +58,87 @@ class SignalGenerator:
         
         # FFT berechnen
         nfft = 512
-        window = np.hanning(min(nfft, len(sig)))
-        sig_windowed = sig[:nfft] * window
-        S = np.fft.rfft(sig_windowed)
-        freqs = np.fft.rfftfreq(nfft, 1.0 / self.fs)
-        power_db = 20 * np.log10(np.abs(S) / nfft + 1e-12)
+        freqs, power_db = dsp.power_spectrum_db(sig[:nfft], self.fs, "hann", n=nfft)
         
-        return {
+        frame = {
             'freqs': (freqs / 1000).tolist(),  # kHz
             'power_db': power_db.tolist(),
             'timestamp': time.time()
         }
+        if self.center_mhz is not None:
+            frame['occupancy'] = self.update_occupancy(power_db, nfft)
+        if self.trace_mode != "clear_write":
+            frame['trace'] = self.update_trace(power_db)
+        if self.persist:
+            frame['persistence'] = self.update_persistence(power_db)
+        if self.markers:
+            peaks = find_peaks(freqs / 1000, power_db, self.markers, excursion_db=6.0)
+            frame['markers'] = marker_table(peaks)
+        return frame
+
+    def update_persistence(self, power_db):
+        ps = self.persistence
+        if ps is None or (ps.decay, ps.n_bins) != (self.persist_decay, len(power_db)):
+            ps = self.persistence = PersistenceSpectrum(len(power_db), decay=self.persist_decay)
+        ps.update(power_db)
+        return ps.payload()
+
+    def set_center(self, value):
+        """Mittenfrequenz für die Kanalbelegung; ungültige Werte → None (aus)"""
+        try:
+            self.center_mhz = parse_center_mhz(value)
+        except (TypeError, ValueError):
+            self.center_mhz = None
+
+    def set_markers(self, n):
+        try:
+            self.markers = min(max(int(n or 0), 0), MAX_MARKERS)
+        except (TypeError, ValueError):
+            self.markers = 0
+
+    def set_persistence(self, enabled, decay):
+        self.persist = bool(enabled)
+        try:
+            self.persist_decay = float(decay) if decay and 0 < float(decay) < 1 else None
+        except (TypeError, ValueError):
+            self.persist_decay = None
+
+    def update_trace(self, power_db):
+        """Max/Min Hold bzw. Mittelung über alle bisherigen Frames, O(Bins) Speicher"""
+        acc = self.trace
+        if acc is None or (acc.mode, acc.count, len(acc.acc)) != (self.trace_mode, self.avg_count, len(power_db)):
+            acc = self.trace = TraceAccumulator(len(power_db), self.trace_mode, self.avg_count)
+        acc.update(power_db)
+        return {**acc.info(), 'power_db': acc.trace_db().tolist()}
+
+    def set_trace(self, mode, count):
+        """Ungültige Werte vom Client ignorieren (der Stream-Loop darf nicht abbrechen)"""
+        if mode in TRACE_MODES:
+            self.trace_mode = mode
+        try:
+            self.avg_count = int(count) if count and int(count) >= 1 else None
+        except (TypeError, ValueError):
+            self.avg_count = None
+
+    def update_occupancy(self, power_db, nfft):
+        """Kanalbelegung im Avionik-Raster über alle bisherigen Frames"""
+        plan = channel_plan(self.center_mhz, self.fs / nfft / 1000, len(power_db))
+        if self.occupancy is None or self.occupancy.plan is not plan:
+            self.occupancy = OccupancyScanner(plan)
+        self.occupancy.update(power_db)
+        return {'n_frames': self.occupancy.n_frames,
+                'channels': self.occupancy.table()}
     
     def stream_loop(self):
         """Streaming-Loop: Sendet alle 500ms neue Daten"""
-        while self.running:
-            if socketio:
-                frame = self.generate_frame()
-                socketio.emit('spectrum_update', frame, namespace='/stream')
-            socketio.sleep(0.5)  # 500ms
+        try:
+            while self.running:
+                if socketio:
+                    frame = self.generate_frame()
+                    socketio.emit('spectrum_update', frame, namespace='/stream')
+                socketio.sleep(0.5)  # 500ms
+        finally:
+            self.running = False  # nach einem Fehler wieder startbar
     
     def start(self):
         if not self.running:
@@ -121,7 +200,9 @@ INDEX_HTML = """<!doctype html>
         color: #8b949e;
         margin-bottom: 0.3rem;
       }
-      input[type="range"] {
+      input[type="range"],
+      input[type="number"],
+      select {
         background: #bbbbbb;
         color: #000000;
         border: 1px solid #30363d;
@@ -471,6 +552,55 @@ INDEX_HTML = """<!doctype html>
             />
           </div>
         </div>
+        <div class="param-row">
+          <div>
+            <label>Trace-Modus</label>
+            <select id="traceMode" onchange="updateParams()">
+              <option value="clear_write">Clear/Write (nur Live)</option>
+              <option value="max_hold">Max Hold</option>
+              <option value="min_hold">Min Hold</option>
+              <option value="average">Average (linear)</option>
+              <option value="log_average">Average (log)</option>
+              <option value="rms">RMS</option>
+            </select>
+          </div>
+          <div>
+            <label>Mittelungsanzahl (leer = alle Frames)</label>
+            <input type="number" id="avgCount" min="1" placeholder="alle" onchange="updateParams()" />
+          </div>
+        </div>
+        <div class="param-row">
+          <div>
+            <label>
+              <input type="checkbox" id="persistence" onchange="updateParams()" />
+              Persistenz-Spektrum
+            </label>
+          </div>
+          <div>
+            <label>Abklingen je Frame (0–1, leer = unbegrenzt)</label>
+            <input type="number" id="persistDecay" min="0" max="0.99" step="0.01" placeholder="aus" onchange="updateParams()" />
+          </div>
+        </div>
+        <div class="param-row">
+          <div>
+            <label>Marker (Peak-Suche je Frame, 0 = aus)</label>
+            <input type="number" id="markers" min="0" max="64" value="0" onchange="updateParams()" />
+          </div>
+          <div>
+            <label>Marker-Tabelle</label>
+            <div id="markerTable" class="info-text">–</div>
+          </div>
+        </div>
+        <div class="param-row">
+          <div>
+            <label>Mittenfrequenz (MHz, Kanalbelegung; leer = aus)</label>
+            <input type="number" id="centerMhz" min="0" max="6000" step="0.001" placeholder="aus" onchange="updateParams()" />
+          </div>
+          <div>
+            <label>Belegte Kanäle (Avionik-Raster)</label>
+            <div id="occupancyTable" class="info-text">–</div>
+          </div>
+        </div>
         <p class="info-text">
           Parameter werden in Echtzeit angewendet (nur bei aktivem Stream).
         </p>
@@ -480,6 +610,9 @@ INDEX_HTML = """<!doctype html>
         <div class="card">
           <div id="spectrumPlot" style="width: 100%; height: 400px"></div>
         </div>
+        <div class="card" id="persistenceCard" style="display: none">
+          <div id="persistencePlot" style="width: 100%; height: 320px"></div>
+        </div>
       </div>
     </div>
     <footer>
@@ -493,6 +626,68 @@ INDEX_HTML = """<!doctype html>
       let isStreaming = false;
       let plotInitialized = false;
 
+      function traceSettings() {
+        const count = document.getElementById("avgCount").value;
+        const decay = document.getElementById("persistDecay").value;
+        const center = document.getElementById("centerMhz").value;
+        return {
+          trace_mode: document.getElementById("traceMode").value,
+          avg_count: count === "" ? null : parseInt(count, 10),
+          persistence: document.getElementById("persistence").checked,
+          persist_decay: decay === "" ? null : parseFloat(decay),
+          markers: parseInt(document.getElementById("markers").value, 10) || 0,
+          center_mhz: center === "" ? null : parseFloat(center),
+        };
+      }
+
+      // Persistenz: uint8-Zeilen (base64, Pegel aufsteigend), 0 = nie getroffen
+      function updatePersistence(p, freqs) {
+        const card = document.getElementById("persistenceCard");
+        if (!p) {
+          card.style.display = "none";
+          return;
+        }
+        card.style.display = "";
+        const bytes = Uint8Array.from(atob(p.density_u8), (c) => c.charCodeAt(0));
+        const z = [];
+        for (let r = 0; r < p.rows; r++) {
+          z.push(Array.from(bytes.subarray(r * p.cols, (r + 1) * p.cols), (v) => (v ? v : null)));
+        }
+        Plotly.react(
+          "persistencePlot",
+          [{ z: z, x: freqs, y: p.levels_db, type: "heatmap", colorscale: "Hot",
+             zmin: 1, zmax: 255, showscale: false }],
+          {
+            paper_bgcolor: "#999999",
+            plot_bgcolor: "#000000",
+            font: { color: "#000000" },
+            xaxis: { title: "Frequenz [kHz]", color: "#111111", range: [0, 500] },
+            yaxis: { title: "Pegel [dB]", color: "#111111" },
+            title: {
+              text: "Persistenz (" + p.n_frames + " Frames)",
+              font: { color: "#000000", size: 14 },
+            },
+            margin: { t: 40, r: 20, b: 50, l: 60 },
+          },
+          { responsive: true, displayModeBar: false },
+        );
+      }
+
+      // Kanalbelegung: die 8 Kanäle mit dem höchsten Duty-Cycle
+      function updateOccupancy(occ) {
+        const el = document.getElementById("occupancyTable");
+        if (!occ) {
+          el.textContent = "–";
+          return;
+        }
+        const rows = occ.channels.slice().sort((a, b) => b.duty_cycle - a.duty_cycle).slice(0, 8);
+        el.textContent = rows.length
+          ? rows.map((c) => c.channel_mhz.toFixed(3) + " MHz " + c.band + " " +
+              Math.round(c.duty_cycle * 100) + " %").join(" · ") +
+            " (" + occ.n_frames + " Frames)"
+          : "keine (" + occ.n_frames + " Frames)";
+      }
+
       function startStream() {
         if (isStreaming) return;
         socket = io("/stream");
@@ -505,6 +700,7 @@ INDEX_HTML = """<!doctype html>
             noise_level: parseFloat(
               document.getElementById("sliderNoise").value,
             ),
+            ...traceSettings(),
           });
           isStreaming = true;
           frameCount = 0;
@@ -522,6 +718,8 @@ INDEX_HTML = """<!doctype html>
           document.getElementById("latency").textContent = Math.round(latency);
 
           updatePlot(data);
+          updatePersistence(data.persistence, data.freqs);
+          updateOccupancy(data.occupancy);
         });
 
         socket.on("disconnect", () => {
@@ -554,6 +752,7 @@ INDEX_HTML = """<!doctype html>
             noise_level: parseFloat(
               document.getElementById("sliderNoise").value,
             ),
+            ...traceSettings(),
           });
         }
       }
@@ -567,6 +766,34 @@ INDEX_HTML = """<!doctype html>
           line: { color: "#000000", width: 2 },
           name: "Live-Spektrum",
         };
+        const traces = [trace];
+        const markers = data.markers || [];
+        document.getElementById("markerTable").textContent = markers.length
+          ? markers.map((m) => "M" + m.marker + " " + m.freq.toFixed(2) + " kHz " +
+              m.level_db.toFixed(1) + " dB").join(" · ")
+          : "–";
+        if (markers.length) {
+          traces.push({
+            x: markers.map((m) => m.freq),
+            y: markers.map((m) => m.level_db),
+            text: markers.map((m) => "M" + m.marker),
+            type: "scatter",
+            mode: "markers+text",
+            textposition: "top center",
+            marker: { color: "#c00000", symbol: "triangle-down", size: 9 },
+            name: "Marker",
+          });
+        }
+        if (data.trace) {
+          traces.push({
+            x: data.freqs,
+            y: data.trace.power_db,
+            type: "scatter",
+            mode: "lines",
+            line: { color: "#1f4fd1", width: 2 },
+            name: data.trace.mode + " (" + data.trace.n_frames + " Frames)",
+          });
+        }
 
         const layout = {
           paper_bgcolor: "#999999",
@@ -593,10 +820,10 @@ INDEX_HTML = """<!doctype html>
         const config = { responsive: true, displayModeBar: false };
 
         if (!plotInitialized) {
-          Plotly.newPlot("spectrumPlot", [trace], layout, config);
+          Plotly.newPlot("spectrumPlot", traces, layout, config);
           plotInitialized = true;
         } else {
-          Plotly.react("spectrumPlot", [trace], layout, config);
+          Plotly.react("spectrumPlot", traces, layout, config);
         }
       }
 
@@ -706,9 +933,12 @@ INDEX_HTML = """<!doctype html>
 """
 
 # ── Routes ────────────────────────────────────────────────────────────────────
+INDEX_PAGE = precompile(INDEX_HTML)
+
 @realtime_bp.route("/")
+@immutable
 def index():
-    return render_template_string(INDEX_HTML)
+    return INDEX_PAGE.render()
 
 # ── SocketIO Handlers ────────────────────────────────────────────────────────
 def register_socketio_handlers(sio):
@@ -719,6 +949,13 @@ def register_socketio_handlers(sio):
         if data:
             signal_gen.carrier_freq = data.get('carrier_freq', 200e3)
             signal_gen.noise_level = data.get('noise_level', 0.2)
+            signal_gen.set_center(data.get('center_mhz'))
+            signal_gen.set_trace(data.get('trace_mode', 'clear_write'), data.get('avg_count'))
+            signal_gen.set_persistence(data.get('persistence'), data.get('persist_decay'))
+            signal_gen.set_markers(data.get('markers'))
+        signal_gen.occupancy = None
+        signal_gen.trace = None
+        signal_gen.persistence = None
         signal_gen.start()
         emit('status', {'message': 'Stream gestartet'})
     
@@ -732,3 +969,9 @@ def register_socketio_handlers(sio):
         if data:
             signal_gen.carrier_freq = data.get('carrier_freq', signal_gen.carrier_freq)
             signal_gen.noise_level = data.get('noise_level', signal_gen.noise_level)
+            signal_gen.set_center(data.get('center_mhz', signal_gen.center_mhz))
+            signal_gen.set_trace(data.get('trace_mode', signal_gen.trace_mode),
+                                 data.get('avg_count', signal_gen.avg_count))
+            signal_gen.set_persistence(data.get('persistence', signal_gen.persist),
+                                       data.get('persist_decay', signal_gen.persist_decay))
+            signal_gen.set_markers(data.get('markers', signal_gen.markers))
@@ -0,0 +1,81 @@
+"""
+Response-Cache für unveränderliche Antworten (Landing Page, Modulseiten,
+statische JSON-Endpunkte): einmal serialisiert, gzip/brotli vorkomprimiert,
+ausgeliefert mit starkem ETag, Cache-Control und 304 bei If-None-Match.
+"""
+import functools, gzip, hashlib
+from flask import request, make_response, Response
+
+CACHE_CONTROL = "public, max-age=300"
+
+_payloads = {}   # Endpoint → CachedPayload
+
+
+def _brotli():
+    """brotli ist optional – ohne Paket wird nur gzip angeboten"""
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+class CachedPayload:
+    """Body einmal serialisiert + vorkomprimierte Varianten je Content-Encoding"""
+    def __init__(self, body, mimetype):
+        self.mimetype = mimetype
+        self.variants = {"identity": body, "gzip": gzip.compress(body, 9)}
+        br = _brotli()
+        if br:
+            self.variants["br"] = br.compress(body, quality=11)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        # Starker ETag pro Repräsentation (komprimiert ≠ unkomprimiert)
+        self.etags = {enc: digest if enc == "identity" else f"{digest}-{enc}"
+                      for enc in self.variants}
+
+    def pick_encoding(self):
+        for enc in ("br", "gzip"):
+            if enc in self.variants and request.accept_encodings[enc]:
+                return enc
+        return "identity"
+
+    def respond(self):
+        enc = self.pick_encoding()
+        if any(request.if_none_match.contains(e) for e in self.etags.values()):
+            resp = Response(status=304)
+        else:
+            resp = Response(self.variants[enc], mimetype=self.mimetype)
+            if enc != "identity":
+                resp.headers["Content-Encoding"] = enc
+        resp.set_etag(self.etags[enc])
+        resp.headers["Cache-Control"] = CACHE_CONTROL
+        resp.vary.add("Accept-Encoding")
+        return resp
+
+
+def immutable(view):
+    """Decorator: Antwort der View beim ersten Aufruf einfrieren und danach
+    nur noch aus dem Cache ausliefern (View hängt nicht vom Request ab)"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        payload = _payloads.get(request.endpoint)
+        if payload is None:
+            resp = make_response(view(*args, **kwargs))
+            if resp.status_code != 200:
+                return resp
+            payload = _payloads[request.endpoint] = CachedPayload(resp.get_data(), resp.mimetype)
+        return payload.respond()
+    wrapper.immutable = True
+    return wrapper
+
+
+WARMUP_KEY = "sdr.warm_cache"   # WSGI-environ-Marker für Warm-up-Requests
+
+def warm_cache(app):
+    """Alle @immutable-Endpunkte beim Start einmal rendern"""
+    client = app.test_client()
+    for rule in app.url_map.iter_rules():
+        view = app.view_functions.get(rule.endpoint)
+        if getattr(view, "immutable", False) and not rule.arguments and "GET" in rule.methods:
+            client.get(rule.rule, environ_base={WARMUP_KEY: True})
+    return len(_payloads)
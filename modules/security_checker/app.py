@@ -4,7 +4,9 @@ X.509 Zertifikat-Visualisierung, RSA-Signatur, AES-Verschlüsselung
 Verwendet: pyca/cryptography
 """
 import base64, os, json, datetime
-from flask import Blueprint, render_template_string, request, jsonify
+from flask import Blueprint, request, jsonify
+from modules.response_cache import immutable
+from modules.templating import precompile
 
 sec_bp = Blueprint("security", __name__)
 
@@ -707,11 +709,15 @@ INDEX_HTML = """<!doctype html>
 </html>
 """
 
+INDEX_PAGE = precompile(INDEX_HTML)
+
 @sec_bp.route("/")
+@immutable
 def index():
-    return render_template_string(INDEX_HTML)
+    return INDEX_PAGE.render()
 
 @sec_bp.route("/pki_chain")
+@immutable
 def pki_chain():
     return jsonify(build_pki_chain())
 
@@ -2,26 +2,39 @@
 Modul 2: Signalanalyse
 SNR, Bandbreite, Modulationserkennung (AM/FM/CW)
 """
-import io
+import tempfile
 import numpy as np
-from scipy.signal import welch
-from flask import Blueprint, render_template_string, request, jsonify
+from flask import Blueprint, request, jsonify
+from modules.response_cache import immutable
+from modules.templating import precompile
+from modules import dsp, metrics
+from modules.capture import load_capture, parse_fs
+from modules.ddc import ddc_params, narrowband
+from modules.peaks import find_peaks, interpolate, marker_table
+from modules.avionics_bands.annotate import annotate_peaks, parse_center_mhz
 
 signal_bp = Blueprint("signal", __name__)
 
+N_MARKERS = 5
+
+@metrics.timed("analyze_signal")
 def analyze_signal(sig, fs=1e6):
     """Vollständige Signalanalyse - gibt dict mit allen Kennwerten zurück"""
     N = len(sig)
+    metrics.observe("sdr_fft_size", N, "analyze_signal")
 
-    # FFT
-    freqs = np.fft.rfftfreq(N, 1.0 / fs)
-    S     = np.fft.rfft(sig * np.hanning(N))
+    # FFT (float32, auf schnelle Länge aufgefüllt)
+    n     = dsp.fast_len(N)
+    freqs = dsp.rfftfreq(n, fs)
+    S     = dsp.rfft(dsp.as_real(sig) * dsp.window("hann", N), n=n)
     power = (np.abs(S) / N) ** 2
+    power_db = 10 * np.log10(power + 1e-20)
 
-    # Peak-Frequenz
+    # Peak-Frequenz (parabolisch zwischen den Bins interpoliert)
     peak_idx  = np.argmax(power)
-    peak_freq = freqs[peak_idx]
-    peak_db   = 10 * np.log10(power[peak_idx] + 1e-20)
+    off, _    = interpolate(power_db, [peak_idx])
+    peak_freq = freqs[peak_idx] + off[0] * (freqs[1] - freqs[0])
+    peak_db   = power_db[peak_idx]
 
     # Rauschboden: Median der unteren 70% der Leistungswerte
     sorted_p   = np.sort(power)
@@ -49,8 +62,6 @@ def analyze_signal(sig, fs=1e6):
 
     # Einfache Heuristik: AM hat hohe Einhüllkurven-Variation
     am_index = env_std / env_mean
-    inst_freq_var = np.std(np.diff(np.unwrap(np.angle(
-        np.fft.rfft(sig))))) if N > 10 else 0
 
     if am_index > 0.3:
         modulation = "AM (Amplitudenmodulation)"
@@ -59,8 +70,8 @@ def analyze_signal(sig, fs=1e6):
     else:
         modulation = "FM / Phase-Shift (Träger)"
 
-    # Spektrum für Plot
-    power_db = (10 * np.log10(power + 1e-20)).tolist()
+    # Marker: die höchsten Peaks mindestens 6 dB über ihrer Umgebung
+    markers = marker_table(find_peaks(freqs / 1000, power_db, N_MARKERS, excursion_db=6.0))
 
     return {
         "peak_freq_khz": round(peak_freq / 1000, 2),
@@ -70,12 +81,28 @@ def analyze_signal(sig, fs=1e6):
         "bw3_khz":       round(bw3 / 1000, 2),
         "bw10_khz":      round(bw10 / 1000, 2),
         "modulation":    modulation,
+        "markers":       markers,
         "freqs_khz":     (freqs / 1000).tolist(),
-        "power_db":      power_db,
+        "power_db":      power_db.tolist(),
         "n_samples":     N,
         "fs_mhz":        round(fs / 1e6, 2),
     }
 
+def analyze_capture(sig, fs, band=None):
+    """analyze_signal über die ganze Aufnahme oder – mit band=(f_center, bandwidth) –
+    nur über den per DDC herausgeschnittenen Ausschnitt (Frequenzen wieder absolut)"""
+    if band is None:
+        return analyze_signal(sig, fs)
+    nb, ddc = narrowband(sig, fs, *band)
+    result  = analyze_signal(nb, ddc.fs_out)
+    offset  = ddc.f_offset / 1000
+    result["peak_freq_khz"] = round(result["peak_freq_khz"] + offset, 2)
+    result["freqs_khz"]     = (np.asarray(result["freqs_khz"]) + offset).tolist()
+    for m in result["markers"]:
+        m["freq"] = round(m["freq"] + offset, 3)
+    result["ddc"]           = ddc.info()
+    return result
+
 def generate_demo():
     fs = 1e6
     t  = np.linspace(0, 0.01, int(fs * 0.01))
@@ -469,6 +496,16 @@ INDEX_HTML = """<!doctype html>
               line: { color: "#000000", width: 1.5 },
               name: "Leistung",
             },
+            {
+              x: d.markers.map((m) => m.freq),
+              y: d.markers.map((m) => m.level_db),
+              text: d.markers.map((m) => "M" + m.marker),
+              type: "scatter",
+              mode: "markers+text",
+              textposition: "top center",
+              marker: { color: "#c00000", symbol: "triangle-down", size: 9 },
+              name: "Marker",
+            },
           ],
           {
             paper_bgcolor: "#999999",
@@ -617,14 +654,24 @@ INDEX_HTML = """<!doctype html>
 </html>
 """
 
+INDEX_PAGE = precompile(INDEX_HTML)
+
 @signal_bp.route("/")
+@immutable
 def index():
-    return render_template_string(INDEX_HTML)
+    return INDEX_PAGE.render()
 
 @signal_bp.route("/demo")
 def demo():
     sig, fs = generate_demo()
-    return jsonify(analyze_signal(sig, fs))
+    result  = analyze_signal(sig, fs)
+    try:
+        center = parse_center_mhz(request.args.get("center_mhz"))
+    except ValueError:
+        return jsonify({"error": "center_mhz ungültig"}), 400
+    if center is not None:
+        annotate_peaks(result, center)
+    return jsonify(result)
 
 @signal_bp.route("/analyze", methods=["POST"])
 def analyze():
@@ -632,9 +679,20 @@ def analyze():
     if not f:
         return jsonify({"error": "Keine Datei"}), 400
     try:
-        data = np.loadtxt(io.StringIO(f.read().decode("utf-8")), delimiter=",")
-        if data.ndim > 1:
-            data = data[:, 0]
-        return jsonify(analyze_signal(data))
+        center = parse_center_mhz(request.form.get("center_mhz"))
+    except ValueError:
+        return jsonify({"error": "center_mhz ungültig"}), 400
+    try:
+        fs   = parse_fs(request.form)
+        band = ddc_params(request.form, fs)
+        with tempfile.TemporaryDirectory(prefix="sdr-upload-") as workdir:
+            data   = load_capture(f, workdir)
+            result = analyze_capture(data, fs, band)
+            del data                   # memmap vor dem Aufräumen schließen
+        if center is not None:
+            annotate_peaks(result, center)
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
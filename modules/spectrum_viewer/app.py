@@ -2,9 +2,20 @@
 Modul 1: Spektrum-Viewer
 FFT-Berechnung + Wasserfall-Diagramm aus IQ/CSV-Daten
 """
-import io, os, json
+import io, math, os, json, re, tempfile
+from functools import lru_cache
 import numpy as np
-from flask import Blueprint, render_template_string, request, jsonify
+from flask import Blueprint, Response, request, jsonify
+from modules.response_cache import immutable
+from modules.templating import precompile
+from modules import dsp, metrics
+from modules.capture import load_capture, parse_fs
+from modules.traces import TraceAccumulator, trace_params
+from modules.persistence import DB_MIN, DB_MAX, LEVELS, PersistenceSpectrum
+from modules.peaks import find_peaks, marker_table, peak_params
+from modules.spectrum_viewer.decimate import METHODS, decimate_trace, decimate_waterfall
+from modules.spectrum_viewer.tiles import (MAX_OVERLAP_FACTOR, TILE_DIR, TilePyramid,
+                                           check_size, open_pyramid)
 
 spectrum_bp = Blueprint("spectrum", __name__)
 
@@ -17,28 +28,171 @@ def generate_demo_signal(fs=1e6, duration=0.01):
     sig += 0.15 * np.random.randn(len(t))
     return t, sig, fs
 
-def compute_fft(signal, fs, window="hann", nfft=2048):
-    win_funcs = {"hann": np.hanning, "hamming": np.hamming, "blackman": np.blackman, "rect": np.ones}
-    w   = win_funcs.get(window, np.hanning)(len(signal))
-    sig = signal * w
-    N   = min(nfft, len(sig))
-    S   = np.fft.rfft(sig[:N], n=N)
-    freqs = np.fft.rfftfreq(N, 1.0 / fs)
-    power_db = 20 * np.log10(np.abs(S) / N + 1e-12)
-    return freqs.tolist(), power_db.tolist()
+DEMO_CAPTURE_FS, DEMO_CAPTURE_S = 1e6, 20.0
+
+def generate_capture_demo(fs=DEMO_CAPTURE_FS, duration=DEMO_CAPTURE_S, block=1 << 20):
+    """Lange Demo-Aufnahme (float32): Sweep 50–450 kHz, Bursts bei 300 kHz, Rauschen"""
+    n = int(fs * duration)
+    rng = np.random.default_rng(0)
+    sig = np.empty(n, dtype=np.float32)
+    for i0 in range(0, n, block):
+        t = np.arange(i0, min(n, i0 + block)) / fs
+        phase = 2 * np.pi * (50e3 * t + 40e3 * (t % 5.0) ** 2)      # alle 5 s von vorn
+        chunk = np.cos(phase) + 0.15 * rng.standard_normal(len(t))
+        chunk += np.where((t % 1.0) < 0.1, 0.8 * np.cos(2 * np.pi * 300e3 * t), 0.0)
+        sig[i0:i0 + len(t)] = chunk
+    return sig, fs
+
+OVERLAP, MAX_OVERLAP = 0.5, 0.9   # Anteil, um den sich aufeinanderfolgende Segmente überlappen
+
+@metrics.timed("compute_fft")
+def compute_fft(signal, fs, window="hann", nfft=2048, overlap=OVERLAP):
+    """Gemitteltes Spektrum über die ganze Aufnahme (Welch): Segmente à nfft mit
+    Überlappung, Leistung über alle Segmente gemittelt (RMS), blockweise per
+    Batch-FFT – Aufwand linear in der Länge, Speicher begrenzt. Kürzere Signale:
+    ein Segment, auf die nächste schnelle Länge aufgefüllt."""
+    if len(signal) < nfft:
+        n = dsp.fast_len(len(signal))
+        metrics.observe("sdr_fft_size", n, "compute_fft")
+        return dsp.power_spectrum_db(signal, fs, window, n)
+    metrics.observe("sdr_fft_size", nfft, "compute_fft")
+    hop = max(1, int(round(nfft * (1 - overlap))))
+    acc = np.zeros(nfft // 2 + 1)
+    n_frames = 0
+    for frames in frame_chunks(signal, nfft, hop):
+        acc += dsp.frames_power(frames, window).sum(axis=0, dtype=np.float64)
+        n_frames += len(frames)
+    power_db = 10 * np.log10(acc / (n_frames * nfft ** 2) + 1e-24)
+    return dsp.rfftfreq(nfft, fs), power_db
+
+@metrics.timed("compute_zoom")
+def compute_zoom(signal, fs, f_start, f_stop, points=2048, window="hann"):
+    """Nur der Ausschnitt [f_start, f_stop) mit points Punkten über die ganze Aufnahme
+    (DDC + Chirp-Z, siehe modules/dsp.py) → (freqs, power_db, info)"""
+    freqs, power_db, decim = dsp.zoom_spectrum_db(signal, fs, f_start, f_stop, points, window)
+    info = {"start": f_start, "stop": f_stop, "points": points, "decimation": decim,
+            "rbw_hz": fs / len(signal)}
+    return freqs, power_db, info
+
+FRAME_BLOCK_SAMPLES = 1 << 20     # Samples je Batch-FFT beim Framing (begrenzt den Speicher)
+
+def frame_chunks(signal, nfft, hop):
+    """Frames à nfft im Abstand hop über die ganze Aufnahme (auch memmap), in
+    Blöcken von höchstens FRAME_BLOCK_SAMPLES Samples als Views; der Rest nach
+    dem letzten vollständigen Frame entfällt"""
+    n_frames = (len(signal) - nfft) // hop + 1
+    rows = max(1, FRAME_BLOCK_SAMPLES // nfft)
+    for r0 in range(0, n_frames, rows):
+        r1 = min(n_frames, r0 + rows)
+        seg = dsp.as_real(signal[r0 * hop:(r1 - 1) * hop + nfft])
+        yield np.lib.stride_tricks.sliding_window_view(seg, nfft)[::hop]
+
+def frame_blocks(signal, nfft, hop, window="hann"):
+    """Frames à nfft im Abstand hop als dB-Blöcke (20·log10(|S|/nfft) wie
+    compute_fft), je Block eine Batch-FFT"""
+    for frames in frame_chunks(signal, nfft, hop):
+        yield dsp.frames_db(frames, window) - 20 * np.log10(nfft)
+
+@metrics.timed("compute_trace")
+def compute_trace(signal, fs, mode, count=None, window="hann", nfft=2048):
+    """Trace-Modus (Max/Min Hold, Mittelung) über alle Frames der Aufnahme,
+    Speicher O(nfft) für den Trace → (freqs, trace_db, info)"""
+    nfft = min(nfft, len(signal))
+    acc  = TraceAccumulator(nfft // 2 + 1, mode, count)
+    for block in frame_blocks(signal, nfft, nfft, window):
+        acc.update(block)
+    return dsp.rfftfreq(nfft, fs), acc.trace_db(), acc.info()
+
+@metrics.timed("compute_persistence")
+def compute_persistence(signal, fs, window="hann", nfft=2048,
+                        db_min=DB_MIN, db_max=DB_MAX, levels=LEVELS):
+    """Persistenz-Histogramm (Pegel × Frequenz) über alle Frames à nfft → (freqs, PersistenceSpectrum)"""
+    nfft = min(nfft, len(signal))
+    ps   = PersistenceSpectrum(nfft // 2 + 1, db_min, db_max, levels)
+    for block in frame_blocks(signal, nfft, nfft, window):
+        ps.update(block)
+    return dsp.rfftfreq(nfft, fs), ps
 
 def compute_waterfall(signal, fs, nfft=512, n_slices=40):
-    step = max(1, len(signal) // n_slices)
-    slices = []
-    for i in range(n_slices):
-        start = i * step
-        chunk = signal[start: start + nfft]
-        if len(chunk) < nfft:
-            break
-        S = np.fft.rfft(chunk * np.hanning(len(chunk)))
-        slices.append((20 * np.log10(np.abs(S) + 1e-12)).tolist())
-    freqs = np.fft.rfftfreq(nfft, 1.0 / fs).tolist()
-    return freqs, slices
+    step   = max(1, len(signal) // n_slices)
+    starts = np.arange(n_slices) * step
+    starts = starts[starts + nfft <= len(signal)]
+    freqs  = dsp.rfftfreq(nfft, fs)
+    if not len(starts):
+        return freqs, np.empty((0, len(freqs)), dtype=dsp.REAL)
+    # Alle Slices als ein Batch → eine FFT mit workers Threads
+    frames = np.lib.stride_tricks.sliding_window_view(dsp.as_real(signal), nfft)[starts]
+    return freqs, dsp.frames_db(frames)
+
+# ── Level-of-Detail: Antwort auf Plotgröße reduzieren ────────────────────────
+DEFAULT_WIDTH, MAX_WIDTH   = 2048, 8192   # Pixel (Spektrum: bis 2 Punkte je Pixel)
+DEFAULT_HEIGHT, MAX_HEIGHT = 256, 2048    # Wasserfall-Zeilen
+MIN_NFFT, MAX_NFFT         = 16, 1 << 20
+
+def nfft_param(args, default=2048):
+    """FFT-Größe aus Query oder Formular; ValueError außerhalb MIN_NFFT…MAX_NFFT"""
+    nfft = int(args.get("nfft", default))
+    if not MIN_NFFT <= nfft <= MAX_NFFT:
+        raise ValueError(f"nfft {MIN_NFFT}–{MAX_NFFT}")
+    return nfft
+
+def display_params(args):
+    """width/height/lod aus Query oder Formular, begrenzt; ValueError bei Nicht-Zahlen"""
+    width  = min(max(int(args.get("width",  DEFAULT_WIDTH)), 16), MAX_WIDTH)
+    height = min(max(int(args.get("height", DEFAULT_HEIGHT)), 8), MAX_HEIGHT)
+    method = args.get("lod", "minmax")
+    return width, height, method if method in METHODS else "minmax"
+
+# ── Zoom-Modus: zoom_start/zoom_stop in Hz, zoom_points ──────────────────────
+ZOOM_POINTS, MIN_ZOOM_POINTS, MAX_ZOOM_POINTS = 2048, 16, 65536
+
+def zoom_params(args, fs):
+    """(start, stop, points) oder None ohne Zoom; ValueError bei ungültigem Bereich"""
+    if not args.get("zoom_start") and not args.get("zoom_stop"):
+        return None
+    f1 = float(args.get("zoom_start") or 0)
+    f2 = float(args.get("zoom_stop") or fs / 2)
+    m  = int(args.get("zoom_points", ZOOM_POINTS))
+    if not 0 <= f1 < f2 <= fs / 2:
+        raise ValueError(f"Zoom-Bereich muss 0 ≤ Start < Stopp ≤ {fs / 2:g} Hz sein")
+    if not MIN_ZOOM_POINTS <= m <= MAX_ZOOM_POINTS:
+        raise ValueError(f"zoom_points {MIN_ZOOM_POINTS}–{MAX_ZOOM_POINTS}")
+    return f1, f2, m
+
+def overlap_param(args):
+    """Segment-Überlappung für das gemittelte Spektrum (0 … MAX_OVERLAP)"""
+    overlap = float(args.get("overlap", OVERLAP))
+    if not 0 <= overlap <= MAX_OVERLAP:
+        raise ValueError(f"overlap 0–{MAX_OVERLAP}")
+    return overlap
+
+MAX_LEVELS = 256
+
+def persistence_params(args):
+    """(db_min, db_max, levels) für persistence=1, sonst None"""
+    if str(args.get("persistence", "")).lower() not in ("1", "true", "yes"):
+        return None
+    levels = int(args.get("persist_levels", LEVELS))
+    if not 2 <= levels <= MAX_LEVELS:
+        raise ValueError(f"persist_levels 2–{MAX_LEVELS}")
+    db_min = float(args.get("persist_min", DB_MIN))
+    db_max = float(args.get("persist_max", DB_MAX))
+    if not (math.isfinite(db_min) and math.isfinite(db_max)):
+        raise ValueError("persist_min/persist_max müssen endlich sein")
+    return db_min, db_max, levels
+
+def persistence_payload(freqs, ps, width):
+    """Heatmap auf die Plotbreite: Frequenz-Buckets per Maximum der Dichte"""
+    freqs, density = decimate_waterfall(freqs, ps.density(), width, ps.levels)
+    return {**ps.payload(density), "freqs": freqs.tolist()}
+
+def spectrum_payload(freqs, power_db, wf_freqs, waterfall, width, height, method):
+    n_bins = len(power_db)
+    freqs, power_db = decimate_trace(freqs, power_db, width, method)
+    wf_freqs, waterfall = decimate_waterfall(wf_freqs, waterfall, width, height)
+    return {"freqs": freqs.tolist(), "power_db": power_db.tolist(),
+            "wf_freqs": wf_freqs.tolist(), "waterfall": waterfall.tolist(),
+            "n_bins": n_bins, "lod": method}
 
 # ── Templates ────────────────────────────────────────────────────────────────
 INDEX_HTML = """<!doctype html>
@@ -90,7 +244,8 @@ INDEX_HTML = """<!doctype html>
         margin-bottom: 0.3rem;
       }
       select,
-      input[type="file"] {
+      input[type="file"],
+      input[type="number"] {
         background: #ffffff;
         color: #000000;
         border: 1px solid #30363d;
@@ -134,6 +289,17 @@ INDEX_HTML = """<!doctype html>
         color: #8b949e;
         margin-top: 0.8rem;
       }
+      .markers {
+        width: 100%;
+        border-collapse: collapse;
+        font-size: 0.85rem;
+      }
+      .markers th,
+      .markers td {
+        text-align: right;
+        padding: 0.2rem 0.6rem;
+        border-bottom: 1px solid #bbbbbb;
+      }
       #plots {
         margin-top: 1rem;
       }
@@ -376,7 +542,60 @@ INDEX_HTML = """<!doctype html>
           <option value="1024">1024</option>
           <option value="2048" selected>2048</option>
           <option value="4096">4096</option>
+          <option value="16384">16384</option>
+          <option value="65536">65536</option>
+          <option value="262144">262144</option>
+        </select>
+        <label>Overlap (Segmente à FFT-Größe, gemittelt über die ganze Aufnahme)</label>
+        <select id="overlap" style="width: auto">
+          <option value="0">0 %</option>
+          <option value="0.5" selected>50 %</option>
+          <option value="0.75">75 %</option>
         </select>
+        <label>Zoom (leer = volles Spektrum)</label>
+        <div class="row">
+          <div>
+            <label>Start / Stopp [kHz]</label>
+            <input type="number" id="zoomStart" min="0" step="any" placeholder="Start" />
+            <input type="number" id="zoomStop" min="0" step="any" placeholder="Stopp" />
+          </div>
+          <div>
+            <label>Punkte im Ausschnitt</label>
+            <input type="number" id="zoomPoints" min="16" max="65536" value="2048" />
+          </div>
+        </div>
+        <div class="row">
+          <div>
+            <label>Trace-Modus (über alle Frames à FFT-Größe)</label>
+            <select id="traceMode">
+              <option value="clear_write">Clear/Write (Momentan)</option>
+              <option value="max_hold">Max Hold</option>
+              <option value="min_hold">Min Hold</option>
+              <option value="average">Average (linear)</option>
+              <option value="log_average">Average (log)</option>
+              <option value="rms">RMS</option>
+            </select>
+          </div>
+          <div>
+            <label>Mittelungsanzahl (leer = alle Frames)</label>
+            <input type="number" id="avgCount" min="1" placeholder="alle" />
+          </div>
+        </div>
+        <label>
+          <input type="checkbox" id="persistence" style="width: auto" />
+          Persistenz-Spektrum (Pegel × Frequenz über alle Frames)
+        </label>
+        <div class="row">
+          <div>
+            <label>Marker (Peak-Suche, 0 = aus)</label>
+            <input type="number" id="markers" min="0" max="64" value="0" />
+          </div>
+          <div>
+            <label>Peak-Excursion [dB] / Mindestabstand [kHz]</label>
+            <input type="number" id="markerExcursion" min="0" step="any" placeholder="6" />
+            <input type="number" id="markerSeparation" min="0" step="any" placeholder="–" />
+          </div>
+        </div>
         <br />
         <button class="demo" onclick="loadDemo()">▶ Demo-Signal laden</button>
         <button onclick="analyzeFile()">▶ CSV analysieren</button>
@@ -386,10 +605,36 @@ INDEX_HTML = """<!doctype html>
       <div id="plots">
         <div class="card">
           <div id="fftPlot" style="width: 100%; height: 350px"></div>
+          <table class="markers" id="markerTable" style="display: none"></table>
         </div>
         <div class="card">
           <div id="waterfallPlot" style="width: 100%; height: 280px"></div>
         </div>
+        <div class="card" id="persistenceCard" style="display: none">
+          <div id="persistencePlot" style="width: 100%; height: 320px"></div>
+        </div>
+      </div>
+
+      <div class="card">
+        <h2>Kachel-Wasserfall (lange Aufnahmen)</h2>
+        <p class="sub">
+          Aufnahme einmal als Kachel-Pyramide speichern, dann per Ziehen/Mausrad
+          durch die Zeit scrollen und mit +/− zoomen. Ohne Datei: 20 s Demo
+          (Sweep 50–450 kHz, Bursts bei 300 kHz).
+        </p>
+        <label>Aufnahme (CSV oder float32 .f32/.bin, 1 MSps)</label>
+        <input type="file" id="captureFile" accept=".csv,.txt,.f32,.bin,.raw" />
+        <br />
+        <button class="demo" onclick="buildTiles()">▶ Aufnahme laden</button>
+        <button onclick="zoomTiles(-1)">+ Zoom</button>
+        <button onclick="zoomTiles(1)">− Zoom</button>
+        <div id="tileInfo"></div>
+        <canvas
+          id="tileCanvas"
+          width="768"
+          height="512"
+          style="width: 100%; background: #000000; cursor: grab"
+        ></canvas>
       </div>
     </div>
     <footer>
@@ -401,18 +646,101 @@ INDEX_HTML = """<!doctype html>
         document.getElementById("status").textContent = msg;
       }
 
+      // Server reduziert Spektrum/Wasserfall auf die Plotgröße (Min/Max-Hüllkurve)
+      function displaySize() {
+        return {
+          width: document.getElementById("fftPlot").clientWidth || 900,
+          height: document.getElementById("waterfallPlot").clientHeight || 280,
+        };
+      }
+
+      // Zoom-Ausschnitt (kHz im Formular, Hz an den Server); leer = kein Zoom
+      function zoomParams() {
+        const start = document.getElementById("zoomStart").value;
+        const stop = document.getElementById("zoomStop").value;
+        if (start === "" && stop === "") return {};
+        const params = { zoom_points: document.getElementById("zoomPoints").value };
+        if (start !== "") params.zoom_start = start * 1000;
+        if (stop !== "") params.zoom_stop = stop * 1000;
+        return params;
+      }
+
+      function traceParams() {
+        const mode = document.getElementById("traceMode").value;
+        if (mode === "clear_write") return {};
+        const params = { trace: mode };
+        const count = document.getElementById("avgCount").value;
+        if (count !== "") params.avg_count = count;
+        return params;
+      }
+
+      function persistenceParams() {
+        return document.getElementById("persistence").checked ? { persistence: 1 } : {};
+      }
+
+      // Peak-Suche: Anzahl, Excursion (dB), Mindestabstand (kHz im Formular, Hz an den Server)
+      function markerParams() {
+        const n = parseInt(document.getElementById("markers").value, 10);
+        if (!n) return {};
+        const params = { markers: n };
+        const exc = document.getElementById("markerExcursion").value;
+        const sep = document.getElementById("markerSeparation").value;
+        params.marker_excursion = exc === "" ? 6 : exc;
+        if (sep !== "") params.marker_separation = sep * 1000;
+        return params;
+      }
+
+      function renderMarkers(markers) {
+        const table = document.getElementById("markerTable");
+        if (!markers || !markers.length) {
+          table.style.display = "none";
+          return;
+        }
+        let html = "<tr><th>Marker</th><th>Frequenz [kHz]</th><th>Pegel [dB]</th>" +
+          "<th>Δf zu M1 [kHz]</th><th>Δ zu M1 [dB]</th></tr>";
+        for (const m of markers) {
+          html += "<tr><td>M" + m.marker + "</td><td>" + (m.freq / 1e3).toFixed(3) +
+            "</td><td>" + m.level_db.toFixed(2) + "</td><td>" +
+            (m.marker > 1 ? (m.delta_freq / 1e3).toFixed(3) : "") + "</td><td>" +
+            (m.marker > 1 ? m.delta_db.toFixed(2) : "") + "</td></tr>";
+        }
+        table.innerHTML = html;
+        table.style.display = "";
+      }
+
+      function modeStatus(data) {
+        if (data.trace) {
+          return " · Trace " + data.trace.mode + " über " + data.trace.n_frames + " Frames";
+        }
+        if (!data.zoom) return "";
+        return " · Zoom " + (data.zoom.start / 1e3).toFixed(2) + "–" +
+          (data.zoom.stop / 1e3).toFixed(2) + " kHz, " + data.zoom.points +
+          " Punkte, RBW " + data.zoom.rbw_hz.toFixed(1) + " Hz";
+      }
+
       async function loadDemo() {
         setStatus("Lade Demo-Signal...");
-        const res = await fetch(
-          "/spectrum/demo?window=" +
-            encodeURIComponent(document.getElementById("window").value) +
-            "&nfft=" +
-            document.getElementById("nfft").value,
-        );
+        const params = new URLSearchParams({
+          window: document.getElementById("window").value,
+          nfft: document.getElementById("nfft").value,
+          overlap: document.getElementById("overlap").value,
+          width: displaySize().width,
+          height: displaySize().height,
+          ...zoomParams(),
+          ...traceParams(),
+          ...persistenceParams(),
+          ...markerParams(),
+        });
+        const res = await fetch("/spectrum/demo?" + params);
         const data = await res.json();
+        if (data.error) {
+          setStatus("Fehler: " + data.error);
+          return;
+        }
         renderPlots(data);
         setStatus(
-          "Demo-Signal geladen: 200 kHz Träger + 350 kHz Interferenz + Rauschen",
+          "Demo-Signal geladen: 200 kHz Träger + 350 kHz Interferenz + Rauschen" +
+            modeStatus(data),
         );
       }
 
@@ -427,6 +755,14 @@ INDEX_HTML = """<!doctype html>
         fd.append("file", file);
         fd.append("window", document.getElementById("window").value);
         fd.append("nfft", document.getElementById("nfft").value);
+        fd.append("overlap", document.getElementById("overlap").value);
+        fd.append("width", displaySize().width);
+        fd.append("height", displaySize().height);
+        const extra = {
+          ...zoomParams(), ...traceParams(), ...persistenceParams(), ...markerParams(),
+        };
+        for (const [k, v] of Object.entries(extra))
+          fd.append(k, v);
         const res = await fetch("/spectrum/analyze", {
           method: "POST",
           body: fd,
@@ -437,23 +773,38 @@ INDEX_HTML = """<!doctype html>
           return;
         }
         renderPlots(data);
-        setStatus("Analyse abgeschlossen.");
+        setStatus("Analyse abgeschlossen." + modeStatus(data));
       }
 
       function renderPlots(data) {
+        renderPersistence(data.persistence);
+        renderMarkers(data.markers);
+        const traces = [
+          {
+            x: data.freqs.map((f) => (f / 1000).toFixed(2)),
+            y: data.power_db,
+            type: "scatter",
+            mode: "lines",
+            line: { color: "#000000", width: 1.5 },
+            name: "Leistung [dB]",
+          },
+        ];
+        if (data.markers) {
+          traces.push({
+            x: data.markers.map((m) => (m.freq / 1000).toFixed(2)),
+            y: data.markers.map((m) => m.level_db),
+            text: data.markers.map((m) => "M" + m.marker),
+            type: "scatter",
+            mode: "markers+text",
+            textposition: "top center",
+            marker: { color: "#c00000", symbol: "triangle-down", size: 9 },
+            name: "Marker",
+          });
+        }
         // FFT-Plot
         Plotly.newPlot(
           "fftPlot",
-          [
-            {
-              x: data.freqs.map((f) => (f / 1000).toFixed(2)),
-              y: data.power_db,
-              type: "scatter",
-              mode: "lines",
-              line: { color: "#000000", width: 1.5 },
-              name: "Leistung [dB]",
-            },
-          ],
+          traces,
           {
             paper_bgcolor: "#999999",
             plot_bgcolor: "#888888",
@@ -469,7 +820,8 @@ INDEX_HTML = """<!doctype html>
               color: "#111111",
             },
             title: {
-              text: "FFT-Spektrum",
+              text: data.zoom ? "Zoom-Spektrum"
+                : data.trace ? "FFT-Spektrum (" + data.trace.mode + ")" : "FFT-Spektrum",
               font: { color: "#000000", size: 14 },
             },
             margin: { t: 40, r: 20, b: 50, l: 60 },
@@ -512,6 +864,158 @@ INDEX_HTML = """<!doctype html>
         }
       }
 
+      // Persistenz: uint8-Zeilen (base64, Pegel aufsteigend), 0 = nie getroffen
+      function renderPersistence(p) {
+        const card = document.getElementById("persistenceCard");
+        if (!p) {
+          card.style.display = "none";
+          return;
+        }
+        card.style.display = "";
+        const bytes = Uint8Array.from(atob(p.density_u8), (c) => c.charCodeAt(0));
+        const z = [];
+        for (let r = 0; r < p.rows; r++) {
+          z.push(Array.from(bytes.subarray(r * p.cols, (r + 1) * p.cols), (v) => (v ? v : null)));
+        }
+        Plotly.newPlot(
+          "persistencePlot",
+          [
+            {
+              z: z,
+              x: p.freqs.map((f) => (f / 1000).toFixed(1)),
+              y: p.levels_db,
+              type: "heatmap",
+              colorscale: "Hot",
+              zmin: 1,
+              zmax: 255,
+              showscale: false,
+            },
+          ],
+          {
+            paper_bgcolor: "#999999",
+            plot_bgcolor: "#000000",
+            font: { color: "#000000" },
+            xaxis: { title: "Frequenz [kHz]", color: "#111111" },
+            yaxis: { title: "Pegel [dB]", color: "#111111" },
+            title: {
+              text: "Persistenz-Spektrum (" + p.n_frames + " Frames, Farbe log. Häufigkeit)",
+              font: { color: "#000000", size: 14 },
+            },
+            margin: { t: 40, r: 20, b: 50, l: 60 },
+          },
+          { responsive: true, displayModeBar: false },
+        );
+      }
+
+      // ── Kachel-Wasserfall ──────────────────────────────────────────────
+      // Kacheln: float16 (Zeilen = Zeit), Stufe 0 = volle Auflösung
+      const tileView = { meta: null, level: 0, row0: 0, cache: new Map() };
+      const HALF = new Float32Array(65536);
+      for (let h = 0; h < 65536; h++) {
+        const s = h & 0x8000 ? -1 : 1, e = (h >> 10) & 0x1f, f = h & 0x3ff;
+        HALF[h] = e === 0 ? s * Math.pow(2, -14) * (f / 1024)
+          : e === 31 ? (f ? NaN : s * Infinity)
+          : s * Math.pow(2, e - 15) * (1 + f / 1024);
+      }
+      const STOPS = [[68, 1, 84], [59, 82, 139], [33, 145, 140], [94, 201, 98], [253, 231, 37]];
+      function colour(db) {
+        const x = Math.min(Math.max((db + 110) / 100, 0), 1) * (STOPS.length - 1);
+        const i = Math.min(Math.floor(x), STOPS.length - 2), w = x - i;
+        return STOPS[i].map((c, k) => c + w * (STOPS[i + 1][k] - c));
+      }
+
+      async function buildTiles() {
+        document.getElementById("tileInfo").textContent = "Berechne Kachel-Pyramide...";
+        const fd = new FormData();
+        const file = document.getElementById("captureFile").files[0];
+        if (file) fd.append("file", file);
+        fd.append("nfft", 512);
+        const res = await fetch("/spectrum/tiles", { method: "POST", body: fd });
+        const meta = await res.json();
+        if (meta.error) {
+          document.getElementById("tileInfo").textContent = "Fehler: " + meta.error;
+          return;
+        }
+        Object.assign(tileView, { meta, level: meta.levels.length - 1, row0: 0 });
+        tileView.cache.clear();
+        drawTiles();
+      }
+
+      async function getTile(level, t, f) {
+        const key = level + "/" + t + "/" + f;
+        if (!tileView.cache.has(key)) {
+          tileView.cache.set(key, (async () => {
+            const res = await fetch("/spectrum/tiles/" + key + "?capture=" + tileView.meta.capture);
+            const rows = +res.headers.get("X-Tile-Rows"), cols = +res.headers.get("X-Tile-Cols");
+            const half = new Uint16Array(await res.arrayBuffer());
+            const img = new ImageData(cols, rows);
+            for (let i = 0; i < half.length; i++) {
+              const [r, g, b] = colour(HALF[half[i]]);
+              img.data.set([r, g, b, 255], 4 * i);
+            }
+            return { rows, cols, bitmap: await createImageBitmap(img) };
+          })());
+        }
+        return tileView.cache.get(key);
+      }
+
+      async function drawTiles() {
+        const { meta, level } = tileView;
+        if (!meta) return;
+        const canvas = document.getElementById("tileCanvas");
+        const ctx = canvas.getContext("2d");
+        const info = meta.levels[level], T = meta.tile;
+        tileView.row0 = Math.max(0, Math.min(tileView.row0, info.rows - canvas.height));
+        const row0 = tileView.row0, sx = canvas.width / info.bins;
+        ctx.imageSmoothingEnabled = false;
+        ctx.fillStyle = "#000000";
+        ctx.fillRect(0, 0, canvas.width, canvas.height);
+        const t1 = Math.min(info.tiles_t - 1, Math.floor((row0 + canvas.height - 1) / T));
+        const jobs = [];
+        for (let t = Math.floor(row0 / T); t <= t1; t++)
+          for (let f = 0; f < info.tiles_f; f++)
+            jobs.push(getTile(level, t, f).then((tile) => {
+              if (tileView.level !== level || tileView.row0 !== row0) return;
+              ctx.drawImage(tile.bitmap, f * T * sx, t * T - row0, tile.cols * sx, tile.rows);
+            }));
+        await Promise.all(jobs);
+        const t0s = row0 * info.dt_s, t1s = Math.min(info.rows, row0 + canvas.height) * info.dt_s;
+        document.getElementById("tileInfo").textContent =
+          "Stufe " + level + "/" + (meta.levels.length - 1) + " · " + t0s.toFixed(3) + "–" +
+          t1s.toFixed(3) + " s von " + meta.duration_s.toFixed(1) + " s · " +
+          (info.dt_s * 1e3).toFixed(2) + " ms/Zeile · " + (info.df_hz / 1e3).toFixed(2) +
+          " kHz/Bin · 0–" + (meta.fs / 2e3).toFixed(0) + " kHz";
+      }
+
+      function zoomTiles(dir) {
+        if (!tileView.meta) return;
+        const level = Math.min(Math.max(tileView.level + dir, 0), tileView.meta.levels.length - 1);
+        const half = document.getElementById("tileCanvas").height / 2;
+        const centre = (tileView.row0 + half) * Math.pow(2, tileView.level - level);
+        Object.assign(tileView, { level, row0: Math.round(centre - half) });
+        drawTiles();
+      }
+
+      (function () {
+        const canvas = document.getElementById("tileCanvas");
+        let dragY = null;
+        canvas.addEventListener("mousedown", (e) => { dragY = e.clientY; });
+        window.addEventListener("mouseup", () => { dragY = null; });
+        window.addEventListener("mousemove", (e) => {
+          if (dragY === null) return;
+          const scale = canvas.height / canvas.clientHeight;
+          tileView.row0 -= Math.round((e.clientY - dragY) * scale);
+          dragY = e.clientY;
+          drawTiles();
+        });
+        canvas.addEventListener("wheel", (e) => {
+          if (!tileView.meta) return;
+          e.preventDefault();
+          tileView.row0 += Math.round(e.deltaY);
+          drawTiles();
+        });
+      })();
+
       // Demo direkt beim Laden
       window.onload = loadDemo;
     </script>
@@ -611,19 +1115,52 @@ INDEX_HTML = """<!doctype html>
 """
 
 # ── Routes ────────────────────────────────────────────────────────────────────
+INDEX_PAGE = precompile(INDEX_HTML)
+
 @spectrum_bp.route("/")
+@immutable
 def index():
-    return render_template_string(INDEX_HTML)
+    return INDEX_PAGE.render()
+
+def spectrum_response(sig, fs, window, nfft, args):
+    """Spektrum (voll oder Zoom-Ausschnitt) + Wasserfall als JSON-Payload.
+    Alle Parameter werden vor der Rechnung geprüft (ValueError → 400)."""
+    zoom, trace = zoom_params(args, fs), trace_params(args)
+    if zoom is not None and trace is not None:
+        raise ValueError("Zoom und Trace-Modus sind nicht kombinierbar")
+    display = display_params(args)
+    overlap = overlap_param(args)
+    peaks   = peak_params(args)
+    persist = persistence_params(args)
+    if zoom is not None:
+        freqs, power_db, info = compute_zoom(sig, fs, *zoom, window)
+    elif trace is not None:
+        freqs, power_db, info = compute_trace(sig, fs, *trace, window, nfft)
+    else:
+        freqs, power_db = compute_fft(sig, fs, window, nfft, overlap)
+    wf_freqs, waterfall = compute_waterfall(sig, fs)
+    payload = spectrum_payload(freqs, power_db, wf_freqs, waterfall, *display)
+    if peaks is not None:
+        # Auf dem vollen Spektrum, nicht auf der für den Plot reduzierten Kurve
+        payload["markers"] = marker_table(find_peaks(freqs, power_db, **peaks), digits=1)
+    if persist is not None:
+        p_freqs, ps = compute_persistence(sig, fs, window, nfft, *persist)
+        payload["persistence"] = persistence_payload(p_freqs, ps, display[0])
+    if zoom is not None:
+        payload["zoom"] = info
+    elif trace is not None:
+        payload["trace"] = info
+    return payload
 
 @spectrum_bp.route("/demo")
 def demo():
     window = request.args.get("window", "hann")
-    nfft   = int(request.args.get("nfft", 2048))
     _, sig, fs = generate_demo_signal()
-    freqs, power_db = compute_fft(sig, fs, window, nfft)
-    wf_freqs, waterfall = compute_waterfall(sig, fs)
-    return jsonify({"freqs": freqs, "power_db": power_db,
-                    "wf_freqs": wf_freqs, "waterfall": waterfall})
+    try:
+        nfft = nfft_param(request.args)
+        return jsonify(spectrum_response(sig, fs, window, nfft, request.args))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
 @spectrum_bp.route("/analyze", methods=["POST"])
 def analyze():
@@ -631,15 +1168,93 @@ def analyze():
     if not f:
         return jsonify({"error": "Keine Datei"}), 400
     window = request.form.get("window", "hann")
-    nfft   = int(request.form.get("nfft", 2048))
     try:
+        nfft = nfft_param(request.form)
+        display_params(request.form)       # vor dem Einlesen der Datei prüfen
+        fs = parse_fs(request.form)          # Default: 1 MSps
         data = np.loadtxt(io.StringIO(f.read().decode("utf-8")), delimiter=",")
         if data.ndim > 1:
             data = data[:, 0]
-        fs = 1e6  # Default: 1 MSps
-        freqs, power_db = compute_fft(data, fs, window, nfft)
-        wf_freqs, waterfall = compute_waterfall(data, fs)
-        return jsonify({"freqs": freqs, "power_db": power_db,
-                        "wf_freqs": wf_freqs, "waterfall": waterfall})
+        return jsonify(spectrum_response(data, fs, window, nfft, request.form))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+# ── Kachel-Wasserfall (Pan/Zoom über lange Aufnahmen) ────────────────────────
+CAPTURE_RE = re.compile(r"^[0-9a-f]{16}$")
+
+@spectrum_bp.route("/tiles", methods=["POST"])
+def tiles_build():
+    """Pyramide für Upload (CSV oder .f32) bzw. ohne Datei für die Demo-Aufnahme"""
+    try:
+        nfft = int(request.form.get("nfft", 512))
+        hop  = int(request.form.get("hop", nfft))
+        fs   = float(request.form.get("fs", 1e6))
+    except ValueError:
+        return jsonify({"error": "nfft/hop/fs müssen Zahlen sein"}), 400
+    if not (32 <= nfft <= 65536 and nfft // MAX_OVERLAP_FACTOR <= hop <= nfft
+            and math.isfinite(fs) and fs > 0):
+        return jsonify({"error": f"nfft 32–65536, hop nfft/{MAX_OVERLAP_FACTOR}–nfft, "
+                                 "fs > 0"}), 400
+    f = request.files.get("file")
+    if f is None:
+        try:          # vor dem Erzeugen der 20-s-Demo prüfen
+            check_size(int(DEMO_CAPTURE_FS * DEMO_CAPTURE_S), nfft, hop)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        pyramid = demo_pyramid(nfft, hop)
+        if not os.path.isdir(pyramid.path):      # inzwischen per LRU geräumt
+            demo_pyramid.cache_clear()
+            pyramid = demo_pyramid(nfft, hop)
+        return jsonify(pyramid.meta)
+    os.makedirs(TILE_DIR, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=TILE_DIR, prefix=".upload-") as workdir:
+        try:
+            pyramid = TilePyramid.build(load_capture(f, workdir), fs, nfft, hop)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    return jsonify(pyramid.meta)
+
+@lru_cache(maxsize=4)
+def demo_pyramid(nfft, hop):
+    sig, fs = generate_capture_demo()
+    return TilePyramid.build(sig, fs, nfft, hop)
+
+def get_pyramid(capture):
+    if not CAPTURE_RE.match(capture or ""):
+        return None
+    try:
+        return open_pyramid(capture)
+    except FileNotFoundError:
+        return None
+
+@spectrum_bp.route("/tiles/<capture>")
+def tiles_meta(capture):
+    pyramid = get_pyramid(capture)
+    if pyramid is None:
+        return jsonify({"error": f"Unbekannte Aufnahme: {capture}"}), 404
+    return jsonify(pyramid.meta)
+
+@spectrum_bp.route("/tiles/<int:level>/<int:t>/<int:f>")
+def tile(level, t, f):
+    """Eine Kachel als float16 (little endian, Zeilen = Zeit) – oder ?format=json"""
+    pyramid = get_pyramid(request.args.get("capture"))
+    if pyramid is None:
+        return jsonify({"error": "Parameter capture fehlt oder unbekannt"}), 404
+    try:
+        data = pyramid.tile(level, t, f)
+    except KeyError:
+        return jsonify({"error": f"Keine Kachel {level}/{t}/{f}"}), 404
+    info = pyramid.meta["levels"][level]
+    headers = {
+        "Cache-Control": "public, max-age=31536000, immutable",   # Inhaltsadresse
+        "X-Tile-Rows": str(data.shape[0]), "X-Tile-Cols": str(data.shape[1]),
+        "X-Time-Start": repr(t * pyramid.meta["tile"] * info["dt_s"]),
+        "X-Freq-Start": repr(f * pyramid.meta["tile"] * info["df_hz"]),
+        "X-Time-Step": repr(info["dt_s"]), "X-Freq-Step": repr(info["df_hz"]),
+    }
+    if request.args.get("format") == "json":
+        return jsonify(np.asarray(data, dtype=float).round(2).tolist()), 200, headers
+    return Response(np.ascontiguousarray(data, dtype="<f2").tobytes(),
+                    mimetype="application/octet-stream", headers=headers)
@@ -0,0 +1,96 @@
+"""
+Modul 1: Level-of-Detail für die Anzeige
+Spektren werden auf die Pixelbreite des Plots reduziert, ohne schmale Peaks zu
+verlieren: Min/Max-Hüllkurve (je Pixel-Bucket tiefster und höchster Punkt) oder
+LTTB (Largest-Triangle-Three-Buckets). Wasserfälle werden in beiden Achsen per
+Max-Pooling verkleinert. Die Antwortgröße hängt damit vom Bildschirm ab, nicht
+von der FFT-Länge.
+"""
+import numpy as np
+
+METHODS = ("minmax", "lttb")
+
+
+def bucket_edges(n, buckets):
+    """Gleichmäßige Bucket-Grenzen (Indizes) für n Punkte"""
+    return (np.arange(buckets + 1) * n) // buckets
+
+
+def _first_match(y, seg_val, edges):
+    """Je Segment der erste Index, an dem y den Segmentwert erreicht"""
+    hits = np.flatnonzero(y == np.repeat(seg_val, np.diff(edges)))
+    return hits[np.searchsorted(hits, edges[:-1])]
+
+
+def minmax_indices(y, width):
+    """Indizes der Min/Max-Hüllkurve (≤ 2·width Punkte, in x-Reihenfolge)"""
+    y = np.asarray(y)
+    n = len(y)
+    if n <= 2 * width:
+        return np.arange(n)
+    edges = bucket_edges(n, width)
+    starts = edges[:-1]
+    i_min = _first_match(y, np.minimum.reduceat(y, starts), edges)
+    i_max = _first_match(y, np.maximum.reduceat(y, starts), edges)
+    idx = np.empty(2 * width, dtype=np.intp)
+    idx[0::2] = np.minimum(i_min, i_max)
+    idx[1::2] = np.maximum(i_min, i_max)
+    keep = np.ones(len(idx), dtype=bool)
+    keep[1:] = idx[1:] != idx[:-1]            # flache Buckets: Punkt nicht doppelt
+    return idx[keep]
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: n_out Punkte, erster und letzter bleiben"""
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    edges = 1 + bucket_edges(n - 2, n_out - 2)   # innere Buckets ohne Randpunkte
+    idx = np.empty(n_out, dtype=np.intp)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        if b + 2 < len(edges):                  # Mittelwert des nächsten Buckets
+            nlo, nhi = edges[b + 1], edges[b + 2]
+            cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + int(np.argmax(area))
+        idx[b + 1] = a
+    return idx
+
+
+def decimate_trace(freqs, power_db, width, method="minmax"):
+    """Spektrum auf ca. width Pixel reduzieren → (freqs, power_db) als Arrays"""
+    freqs, power_db = np.asarray(freqs), np.asarray(power_db)
+    if method == "lttb":
+        idx = lttb_indices(freqs, power_db, 2 * width)
+    else:
+        idx = minmax_indices(power_db, width)
+    return freqs[idx], power_db[idx]
+
+
+def max_pool(a, rows, cols):
+    """2-D-Array per Maximum auf höchstens rows × cols Zellen verkleinern"""
+    a = np.asarray(a)
+    if a.shape[0] > rows:
+        a = np.maximum.reduceat(a, bucket_edges(a.shape[0], rows)[:-1], axis=0)
+    if a.shape[1] > cols:
+        a = np.maximum.reduceat(a, bucket_edges(a.shape[1], cols)[:-1], axis=1)
+    return a
+
+
+def decimate_waterfall(freqs, slices, width, height):
+    """Wasserfall (Zeit × Frequenz) auf height × width; Frequenzachse = Bucket-Mitten"""
+    freqs = np.asarray(freqs, dtype=float)
+    if not len(slices):
+        return freqs, np.empty((0, len(freqs)))
+    z = max_pool(slices, height, width)
+    if len(freqs) > width:
+        edges = bucket_edges(len(freqs), width)
+        freqs = np.add.reduceat(freqs, edges[:-1]) / np.diff(edges)
+    return freqs, z
@@ -0,0 +1,206 @@
+"""
+Modul 1: Wasserfall als Kachel-Pyramide (Zeit × Frequenz, float16 dB)
+Ein Spektrogramm wird einmal blockweise berechnet und als memory-mapped .npy
+je Stufe abgelegt: Stufe 0 volle Auflösung, jede weitere Stufe halbiert die
+Zeitachse (und die Frequenzachse, solange sie breiter als eine Kachel ist) per
+Max-Pooling (Peaks bleiben sichtbar). Eine Kachel ist ein Slice
+TILE × TILE aus der Stufen-Datei – konstante Lesezeit, keine FFT beim Pannen.
+
+Ablage: <TILE_DIR>/<capture>/meta.json, level_<k>.npy
+capture = Hash aus Rohdaten und FFT-Parametern (gleicher Upload → gleiche Pyramide).
+Übersteigt TILE_DIR nach einem Build TILE_DIR_MAX_BYTES, werden die am längsten
+nicht benutzten Pyramiden gelöscht (LRU über die mtime des Verzeichnisses).
+Builds verschiedener Aufnahmen laufen parallel, gleiche warten aufeinander.
+Stufe 0 ist auf MAX_CELLS Werte begrenzt, hop auf mindestens nfft/MAX_OVERLAP_FACTOR;
+gerechnet und gepoolt wird in Blöcken von FRAME_BLOCK_SAMPLES Werten.
+"""
+import hashlib, json, os, shutil, tempfile, threading
+from functools import lru_cache
+import numpy as np
+from modules import dsp
+
+TILE_DIR   = os.environ.get("SPECTRUM_TILE_DIR") or os.path.join(tempfile.gettempdir(), "sdr-tiles")
+TILE       = 256          # Kachelkante (Zeilen und Bins)
+FRAME_BLOCK_SAMPLES = 1 << 20   # Werte (Zeilen × nfft bzw. Bins) pro Rechenblock
+MAX_CELLS  = 1 << 28      # Werte in Stufe 0 (512 MiB float16)
+MAX_OVERLAP_FACTOR = 16   # hop ≥ nfft // 16
+DTYPE      = np.float16
+TILE_DIR_MAX_BYTES = int(float(os.environ.get("SPECTRUM_TILE_MAX_MB", 4096)) * 2 ** 20)
+
+_locks_guard = threading.Lock()
+_build_locks = {}                 # capture → Lock (ein Build je Aufnahme gleichzeitig)
+_evict_lock  = threading.Lock()
+
+
+def build_lock(cid):
+    with _locks_guard:
+        return _build_locks.setdefault(cid, threading.Lock())
+
+
+def touch(path):
+    """Letzte Nutzung einer Pyramide für die LRU-Räumung vermerken"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def dir_size(path):
+    return sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+
+
+def evict(root=TILE_DIR, max_bytes=TILE_DIR_MAX_BYTES, keep=()):
+    """Älteste Pyramiden löschen, bis root höchstens max_bytes belegt (keep bleibt);
+    laufende Builds/Uploads (.build-*, .upload-*) zählen nicht mit"""
+    with _evict_lock:
+        entries = []
+        for e in os.scandir(root):
+            if e.is_dir() and not e.name.startswith("."):
+                try:
+                    entries.append((e.stat().st_mtime, dir_size(e.path), e.name))
+                except OSError:
+                    continue              # gerade von einem anderen Prozess gelöscht
+        total, removed = sum(size for _, size, _ in entries), []
+        for _, size, cid in sorted(entries):
+            if total <= max_bytes:
+                break
+            if cid in keep:
+                continue
+            shutil.rmtree(os.path.join(root, cid), ignore_errors=True)
+            total -= size
+            removed.append(cid)
+        if removed:
+            # Offene memmaps hielten den Platz sonst bis zum Prozessende belegt
+            open_pyramid.cache_clear()
+            with _locks_guard:
+                for cid in removed:
+                    _build_locks.pop(cid, None)
+        return removed
+
+
+def capture_id(data, fs, nfft, hop):
+    """Inhaltsadresse: gleiche Samples + Parameter → gleiche Pyramide"""
+    h = hashlib.sha256(np.ascontiguousarray(data).view(np.uint8))
+    h.update(f"{fs}:{nfft}:{hop}".encode())
+    return h.hexdigest()[:16]
+
+
+def check_size(n_samples, nfft, hop):
+    """ValueError, wenn hop zu klein ist oder Stufe 0 MAX_CELLS übersteigen würde"""
+    if n_samples < nfft:
+        raise ValueError(f"Signal kürzer als nfft ({n_samples} < {nfft})")
+    if hop < max(1, nfft // MAX_OVERLAP_FACTOR):
+        raise ValueError(f"hop muss mindestens nfft/{MAX_OVERLAP_FACTOR} sein")
+    n_frames = (n_samples - nfft) // hop + 1
+    if n_frames * (nfft // 2) > MAX_CELLS:
+        raise ValueError(f"Spektrogramm zu groß ({n_frames} × {nfft // 2} > {MAX_CELLS} "
+                         "Werte), nfft oder hop erhöhen")
+
+
+def spectrogram_blocks(signal, nfft, hop):
+    """Spektrogramm-Zeilen in Blöcken von höchstens FRAME_BLOCK_SAMPLES Samples
+    (dB, nfft/2 Bins ohne Nyquist)"""
+    n_frames = (len(signal) - nfft) // hop + 1
+    rows = max(1, FRAME_BLOCK_SAMPLES // nfft)
+    for r0 in range(0, n_frames, rows):
+        r1 = min(n_frames, r0 + rows)
+        seg = dsp.as_real(signal[r0 * hop:(r1 - 1) * hop + nfft])
+        frames = np.lib.stride_tricks.sliding_window_view(seg, nfft)[::hop]
+        yield r0, dsp.frames_db(frames)[:, :nfft // 2] - 20 * np.log10(nfft)
+
+
+def pool2(src, dst, pool_f=True):
+    """dst = 2×2- (bzw. 2×1-) Max-Pooling von src, blockweise (ungerade Ränder einzeln)"""
+    rows, bins = src.shape
+    step = 2 * max(1, FRAME_BLOCK_SAMPLES // (2 * bins))
+    for r0 in range(0, rows, step):
+        a = np.asarray(src[r0:r0 + step], dtype=np.float32)
+        if len(a) % 2:
+            a = np.vstack([a, a[-1:]])
+        a = np.maximum(a[0::2], a[1::2])
+        if pool_f:
+            if bins % 2:
+                a = np.hstack([a, a[:, -1:]])
+            a = np.maximum(a[:, 0::2], a[:, 1::2])
+        dst[r0 // 2:r0 // 2 + len(a)] = a
+
+
+class TilePyramid:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.levels = [np.load(os.path.join(path, f"level_{k}.npy"), mmap_mode="r")
+                       for k in range(len(self.meta["levels"]))]
+
+    @classmethod
+    def build(cls, signal, fs, nfft=512, hop=None, root=TILE_DIR):
+        """Pyramide anlegen (oder vorhandene öffnen); signal darf ein memmap sein"""
+        hop = hop or nfft
+        check_size(len(signal), nfft, hop)
+        cid = capture_id(signal, fs, nfft, hop)
+        path = os.path.join(root, cid)
+        with build_lock(cid):
+            if not os.path.exists(os.path.join(path, "meta.json")):
+                os.makedirs(root, exist_ok=True)
+                tmp = tempfile.mkdtemp(dir=root, prefix=".build-")
+                try:
+                    cls._write(tmp, signal, fs, nfft, hop, cid)
+                    os.replace(tmp, path)      # erst vollständig sichtbar
+                except OSError:
+                    shutil.rmtree(tmp, ignore_errors=True)
+                    if not os.path.exists(os.path.join(path, "meta.json")):
+                        raise                  # sonst: anderer Prozess war schneller
+                except BaseException:
+                    shutil.rmtree(tmp, ignore_errors=True)
+                    raise
+                evict(root, keep=(cid,))
+            touch(path)
+        return open_pyramid(cid, root)
+
+    @staticmethod
+    def _write(path, signal, fs, nfft, hop, cid):
+        n_frames = (len(signal) - nfft) // hop + 1
+        shape = (n_frames, nfft // 2)
+        level = np.lib.format.open_memmap(os.path.join(path, "level_0.npy"), "w+", DTYPE, shape)
+        for r0, block in spectrogram_blocks(signal, nfft, hop):
+            level[r0:r0 + len(block)] = block
+        levels, f_dec = [(shape, 1)], 1
+        while shape[0] > TILE or shape[1] > TILE:
+            pool_f = shape[1] > TILE
+            f_dec *= 2 if pool_f else 1
+            shape = ((shape[0] + 1) // 2, (shape[1] + 1) // 2 if pool_f else shape[1])
+            nxt = np.lib.format.open_memmap(os.path.join(path, f"level_{len(levels)}.npy"),
+                                            "w+", DTYPE, shape)
+            pool2(level, nxt, pool_f)
+            level.flush()
+            level, levels = nxt, levels + [(shape, f_dec)]
+        level.flush()
+        meta = {
+            "capture": cid, "fs": fs, "nfft": nfft, "hop": hop, "tile": TILE,
+            "duration_s": len(signal) / fs,
+            "levels": [{"level": k, "rows": r, "bins": b,
+                        "tiles_t": -(-r // TILE), "tiles_f": -(-b // TILE),
+                        "dt_s": hop * 2 ** k / fs, "df_hz": fs / nfft * fd}
+                       for k, ((r, b), fd) in enumerate(levels)],
+        }
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+    def tile(self, level, t, f):
+        """Kachel (t, f) der Stufe level; Randkacheln sind kleiner. KeyError wenn außerhalb"""
+        if not 0 <= level < len(self.levels):
+            raise KeyError(level)
+        info = self.meta["levels"][level]
+        if not (0 <= t < info["tiles_t"] and 0 <= f < info["tiles_f"]):
+            raise KeyError((level, t, f))
+        return self.levels[level][t * TILE:(t + 1) * TILE, f * TILE:(f + 1) * TILE]
+
+
+@lru_cache(maxsize=32)
+def open_pyramid(cid, root=TILE_DIR):
+    """Geöffnete Pyramide (memmaps bleiben offen); FileNotFoundError wenn unbekannt"""
+    path = os.path.join(root, cid)
+    pyramid = TilePyramid(path)
+    touch(path)
+    return pyramid
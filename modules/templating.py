@@ -0,0 +1,27 @@
+"""
+Vorkompilierte Seiten-Templates
+render_template_string kompiliert den Quelltext bei jedem Aufruf neu. Hier wird
+jedes Template einmal beim Import kompiliert; Seiten ohne Jinja-Syntax werden
+direkt als fertiges HTML ausgeliefert.
+"""
+from jinja2 import Environment
+
+# Wie Flask bei render_template_string: Autoescaping an, tojson-Filter von Jinja
+ENV = Environment(autoescape=True)
+
+
+class StaticPage:
+    """HTML ohne Template-Variablen – Ausgabe identisch zu Jinja (ohne
+    abschließenden Zeilenumbruch, keep_trailing_newline=False)"""
+    def __init__(self, source):
+        self.html = source[:-1] if source.endswith("\n") else source
+
+    def render(self, **context):
+        return self.html
+
+
+def precompile(source):
+    """Template einmal kompilieren; .render(**context) liefert den HTML-String"""
+    if any(tok in source for tok in ("{{", "{%", "{#")):
+        return ENV.from_string(source)
+    return StaticPage(source)
@@ -0,0 +1,94 @@
+"""
+Trace-Modi wie am Spektrumanalysator (FSW: Clear/Write, Max/Min Hold, Average)
+Ein TraceAccumulator hält genau ein vorab angelegtes Array je Trace und wird
+mit jedem neuen Frame (oder Block von Frames) in place aktualisiert – der
+Speicherbedarf hängt nur von der Bin-Zahl ab, nicht von der Aufnahmelänge.
+
+Mittelung über `count` Frames: bis count kumulativ (exakter Mittelwert),
+danach gleitend exponentiell mit Gewicht 1/count (wie SENS:AVER:COUN).
+  average      linear über Beträge (Spannung)  → 20·log10(mean |S|)
+  log_average  über dB-Werte (Video-Mittelung) → mean dB
+  rms          über Leistung                   → 10·log10(mean |S|²)
+Frames kommen immer in dB (20·log10 |S|) an.
+"""
+import numpy as np
+
+MODES = ("clear_write", "max_hold", "min_hold", "average", "log_average", "rms")
+
+# dB → Mittelungsbereich und zurück
+_TO_LIN   = {"average": 1 / 20, "rms": 1 / 10}
+_FROM_LIN = {"average": 20, "rms": 10}
+
+
+class TraceAccumulator:
+    def __init__(self, n_bins, mode="clear_write", count=None):
+        if mode not in MODES:
+            raise ValueError(f"Trace-Modus muss einer von {', '.join(MODES)} sein")
+        if count is not None and count < 1:
+            raise ValueError("count muss ≥ 1 sein")
+        self.mode  = mode
+        self.count = count
+        self.acc   = np.empty(n_bins, dtype=np.float64)
+        self.reset()
+
+    def reset(self):
+        self.n_frames = 0
+        self.acc.fill(np.nan)
+
+    def update(self, frames_db):
+        """Ein Frame (n_bins) oder Block (n_frames × n_bins) in dB; gibt self zurück"""
+        block = np.atleast_2d(frames_db)
+        m = len(block)
+        if m == 0:
+            return self
+        if block.shape[1] != len(self.acc):
+            raise ValueError(f"Frame hat {block.shape[1]} statt {len(self.acc)} Bins")
+        acc, mode = self.acc, self.mode
+        if mode == "clear_write":
+            acc[:] = block[-1]
+        elif mode == "max_hold":
+            red = block.max(axis=0)
+            np.fmax(acc, red, out=acc)
+        elif mode == "min_hold":
+            red = block.min(axis=0)
+            np.fmin(acc, red, out=acc)
+        else:
+            x = block if mode == "log_average" else np.power(10.0, block * _TO_LIN[mode])
+            self._average(x)
+        self.n_frames += m
+        return self
+
+    def _average(self, x):
+        acc, n = self.acc, self.n_frames
+        if n == 0:
+            acc.fill(0.0)
+        # Kumulativer Teil: bis count exakter Mittelwert
+        k = len(x) if self.count is None else max(0, min(len(x), self.count - n))
+        if k:
+            acc *= n / (n + k)
+            acc += x[:k].sum(axis=0) / (n + k)
+        rest = x[k:]
+        if len(rest):
+            # Exponentiell: acc ← (1−a)^m·acc + Σ a(1−a)^(m−1−i)·x_i
+            a = 1.0 / self.count
+            w = a * (1 - a) ** np.arange(len(rest) - 1, -1, -1)
+            acc *= (1 - a) ** len(rest)
+            acc += w @ rest
+
+    def trace_db(self):
+        """Aktueller Trace in dB (NaN solange kein Frame kam)"""
+        if self.mode in _FROM_LIN:
+            return _FROM_LIN[self.mode] * np.log10(self.acc + 1e-30)
+        return self.acc.copy()
+
+    def info(self):
+        return {"mode": self.mode, "count": self.count, "n_frames": self.n_frames}
+
+
+def trace_params(args):
+    """(mode, count) aus trace/avg_count; None für den Momentan-Trace"""
+    mode = args.get("trace") or "clear_write"
+    if mode == "clear_write":
+        return None
+    count = args.get("avg_count")
+    return mode, int(count) if count not in (None, "") else None
@@ -0,0 +1,46 @@
+"""
+Produktiv-Launcher: startet N gunicorn-Instanzen (je 1 eventlet/gevent-Worker)
+auf aufeinanderfolgenden Ports. Ab 2 Instanzen ist eine Socket.IO-Message-Queue
+Pflicht, damit Stream-Events alle Clients erreichen.
+
+    python serve.py --mode eventlet --instances 4 --base-port 5001 \\
+        --message-queue redis://127.0.0.1:6379/0
+"""
+import argparse, os, signal, subprocess, sys
+
+
+def main():
+    ap = argparse.ArgumentParser(description="SDR Dashboard – Produktivstart mit gunicorn")
+    ap.add_argument("--mode", choices=["eventlet", "gevent"], default="eventlet")
+    ap.add_argument("--instances", type=int, default=1)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--base-port", type=int, default=5001)
+    ap.add_argument("--worker-connections", type=int, default=2000)
+    ap.add_argument("--message-queue", default=os.environ.get("SOCKETIO_MESSAGE_QUEUE"))
+    args = ap.parse_args()
+
+    if args.instances > 1 and not args.message_queue:
+        ap.error("--message-queue (z.B. redis://127.0.0.1:6379/0) ist ab 2 Instanzen erforderlich")
+
+    procs = []
+    for i in range(args.instances):
+        env = dict(os.environ,
+                   SOCKETIO_ASYNC_MODE=args.mode,
+                   BIND=f"{args.host}:{args.base_port + i}",
+                   WORKER_CONNECTIONS=str(args.worker_connections))
+        if args.message_queue:
+            env["SOCKETIO_MESSAGE_QUEUE"] = args.message_queue
+        procs.append(subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"], env=env))
+        print(f"🚀 Instanz {i + 1}/{args.instances} ({args.mode}) auf {env['BIND']}")
+
+    def shutdown(*_):
+        for p in procs:
+            p.terminate()
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    sys.exit(max(p.wait() for p in procs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""
+WSGI-Einstieg für den Produktivbetrieb (gunicorn, siehe gunicorn.conf.py)
+Monkey-Patching muss vor allen anderen Imports passieren, daher eigenes Modul.
+"""
+import os
+
+ASYNC_MODE = os.environ.setdefault("SOCKETIO_ASYNC_MODE", "eventlet")
+
+if ASYNC_MODE == "eventlet":
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+
+from main import app, socketio  # noqa: E402